@@ -24,12 +24,19 @@ from runbook_agent.incident_webhooks.app import router as incident_webhook_route
 from runbook_agent.runbook_sources.services.azure_service.app import (
     router as azure_router,
 )
-from runbook_agent.incident_webhooks.app import init
+from runbook_agent.incident_webhooks.app import (
+    init,
+    start_incident_workers,
+    stop_incident_workers,
+)
 from runbook_agent.runbook_executor.runbook_execution_factory import (
     ExecutionServiceFactory,
 )
+from runbook_agent.config import init_config
 import os
 
+cfg = init_config()
+
 # Create FastAPI app instance
 app = FastAPI()
 
@@ -62,7 +69,9 @@ async def init_runbook_source_manager():
     await init_prisma_client()
     # Initialize the necessary services
     repository = getAutomationRunbookService(get_prisma_client())
-    vectorStore = VectorStoreService(VectorStores.LANCEDB, "incident_agent_runbook")
+    vectorStore = VectorStoreService(
+        VectorStores(cfg.vector_store.backend), "incident_agent_runbook"
+    )
     embedding_provider = EmbeddingServiceFactory.create_embedding_service(
         provider_type=EmbeddingModels.OPENAI,
         model_id=OPENAIModels.TEXT_EMBEDDING_3_SMALL.value,
@@ -83,6 +92,8 @@ async def init_runbook_source_manager():
         c=config.get("azure"),
         client=get_prisma_client()
     )
+    # Drain the incident queue, including jobs left over from a previous run
+    start_incident_workers()
 
     indexingService = IndexingEngine(
         embedding_provider=embedding_provider, vector_store=vectorStore
@@ -108,3 +119,9 @@ async def init_runbook_source_manager():
 async def startup():
     # Initialize the runbook source manager during startup
     await init_runbook_source_manager()
+
+
+# FastAPI shutdown event to stop the incident workers
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_incident_workers()
@@ -0,0 +1,258 @@
+import asyncio
+import email.utils
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import httpx
+from azure.identity import ClientSecretCredential
+from azure.mgmt.automation import AutomationClient
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+MANAGEMENT_URL = "https://management.azure.com"
+MANAGEMENT_SCOPE = "https://management.azure.com/.default"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AzureManagementClient:
+    """
+    Shared access to the Azure management API for one service principal.
+
+    Holds a single credential, the SDK clients built on it, and a pair of
+    keep-alive HTTP pools (sync and async) for the REST calls the SDK doesn't
+    cover. Access tokens are cached and refreshed shortly before they expire, so
+    requests don't wait on a token fetch. Requests answered with 429 or a 5xx are
+    retried, waiting as long as `Retry-After` asks when it is given.
+    """
+
+    def __init__(
+        self,
+        tenant_id: str,
+        client_id: str,
+        client_secret: str,
+        subscription_id: str,
+        max_connections: int = cfg.azure_management.max_connections,
+        timeout: float = cfg.azure_management.timeout,
+        max_retries: int = cfg.azure_management.max_retries,
+        backoff_base: float = cfg.azure_management.backoff_base,
+        backoff_max: float = cfg.azure_management.backoff_max,
+        token_refresh_margin: float = cfg.azure_management.token_refresh_margin,
+    ):
+        """
+        Initialize the management client.
+
+        Args:
+            tenant_id (str): Tenant of the service principal.
+            client_id (str): Client id of the service principal.
+            client_secret (str): Client secret of the service principal.
+            subscription_id (str): Subscription the requests are made against.
+            max_connections (int): Size of each connection pool.
+            timeout (float): Seconds before a request times out.
+            max_retries (int): Retries of a throttled or failed request.
+            backoff_base (float): Seconds waited before the first retry when the
+                response has no Retry-After, doubled on every retry.
+            backoff_max (float): Longest wait between two retries.
+            token_refresh_margin (float): Seconds before expiry a token is refreshed.
+        """
+        self.subscription_id = subscription_id
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.token_refresh_margin = token_refresh_margin
+        self.credential = ClientSecretCredential(
+            tenant_id=tenant_id,
+            client_id=client_id,
+            client_secret=client_secret,
+        )
+        self.automation_client = AutomationClient(self.credential, subscription_id)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._http = httpx.Client(
+            base_url=MANAGEMENT_URL, limits=limits, timeout=timeout
+        )
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._async_http_args = {
+            "base_url": MANAGEMENT_URL,
+            "limits": limits,
+            "timeout": timeout,
+        }
+        self._token = None
+        self._token_lock = threading.Lock()
+
+    def get_token(self) -> str:
+        """
+        Returns a management API access token, fetching a new one when the cached
+        token is about to expire.
+        """
+        token = self._token
+        if (
+            token is not None
+            and token.expires_on - time.time() > self.token_refresh_margin
+        ):
+            return token.token
+        with self._token_lock:
+            token = self._token
+            if (
+                token is None
+                or token.expires_on - time.time() <= self.token_refresh_margin
+            ):
+                token = self.credential.get_token(MANAGEMENT_SCOPE)
+                self._token = token
+            return token.token
+
+    async def async_get_token(self) -> str:
+        """
+        Returns a management API access token without blocking the event loop on
+        a refresh.
+        """
+        token = self._token
+        if (
+            token is not None
+            and token.expires_on - time.time() > self.token_refresh_margin
+        ):
+            return token.token
+        return await asyncio.to_thread(self.get_token)
+
+    def automation_account_path(
+        self, resource_group: str, automation_account: str
+    ) -> str:
+        """
+        Returns the API path of an automation account.
+        """
+        return (
+            f"/subscriptions/{self.subscription_id}"
+            f"/resourceGroups/{resource_group}"
+            f"/providers/Microsoft.Automation/automationAccounts/{automation_account}"
+        )
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request to the management API, retrying throttled and failed ones.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path of the resource below the management endpoint.
+            **kwargs: Passed on to httpx.
+
+        Returns:
+            httpx.Response: The successful response.
+
+        Raises:
+            httpx.HTTPStatusError: If the request failed after every retry.
+        """
+        for attempt in range(self.max_retries + 1):
+            response = self._http.request(
+                method, path, headers=self._headers(self.get_token()), **kwargs
+            )
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    async def async_request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Async version of `request`.
+        """
+        if self._async_http is None:
+            # Created lazily so it binds to the running event loop
+            self._async_http = httpx.AsyncClient(**self._async_http_args)
+        for attempt in range(self.max_retries + 1):
+            response = await self._async_http.request(
+                method,
+                path,
+                headers=self._headers(await self.async_get_token()),
+                **kwargs,
+            )
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("GET", path, **kwargs)
+
+    async def async_get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.async_request("GET", path, **kwargs)
+
+    async def aclose(self):
+        """
+        Closes the connection pools.
+        """
+        self._http.close()
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+
+    @staticmethod
+    def _headers(token: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        if response.status_code not in RETRY_STATUS_CODES:
+            return None
+        if attempt >= self.max_retries:
+            return None
+        delay = self._parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = self.backoff_base * (2**attempt)
+        delay = min(delay, self.backoff_max)
+        logger.warning(
+            f"Azure management request {response.request.method} "
+            f"{response.request.url.path} returned {response.status_code}, "
+            f"retrying in {delay:.1f}s"
+        )
+        return delay
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        # Retry-After can also be an HTTP date
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+
+# Management clients, one per service principal and subscription
+_azure_management_clients: Dict[Tuple[str, str, str], AzureManagementClient] = {}
+_azure_management_clients_lock = threading.Lock()
+
+
+def get_azure_management_client(
+    tenant_id: str, client_id: str, client_secret: str, subscription_id: str
+) -> AzureManagementClient:
+    """
+    Returns the shared management client of a service principal and subscription,
+    creating it on first use.
+    """
+    key = (tenant_id, client_id, subscription_id)
+    with _azure_management_clients_lock:
+        client = _azure_management_clients.get(key)
+        if client is None:
+            client = AzureManagementClient(
+                tenant_id=tenant_id,
+                client_id=client_id,
+                client_secret=client_secret,
+                subscription_id=subscription_id,
+            )
+            _azure_management_clients[key] = client
+        return client
@@ -1,5 +1,6 @@
 import boto3
 import threading
+from botocore.config import Config
 from runbook_agent.config import init_config
 
 cfg = init_config()
@@ -26,6 +27,10 @@ class BedrockClientSingleton:
                         aws_access_key_id=cfg.aws.access_key_id,
                         aws_secret_access_key=cfg.aws.secret_access_key,
                         region_name=cfg.aws.region,
+                        # Size the connection pool for concurrent embedding requests
+                        config=Config(
+                            max_pool_connections=cfg.bedrock.max_pool_connections
+                        ),
                     )
         return cls._instance
 
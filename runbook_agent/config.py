@@ -2,6 +2,7 @@
 from dotenv import load_dotenv
 from easydict import EasyDict as edict
 from typing import Any
+import json
 import os
 
 # Load environment variables from the .env file
@@ -12,6 +13,9 @@ def init_config() -> edict[Any]:
     cfg = edict()
     cfg.openai = edict()
     cfg.openai.API_KEY = os.getenv("OPENAI_API_KEY")
+    # Anthropic on Bedrock, which requires a completion budget on every call
+    cfg.anthropic = edict()
+    cfg.anthropic.max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096"))
     # Azure
     cfg.azure = edict()
     cfg.azure.tenant_id = os.getenv("AZURE_TENANT_ID", "default_tenant_id")
@@ -34,12 +38,244 @@ def init_config() -> edict[Any]:
         "AZURE_RUNBOOK_WEBHOOK_NAME", "default_webhook_name"
     )
 
+    # Azure management API client
+    cfg.azure_management = edict()
+    cfg.azure_management.max_connections = int(
+        os.getenv("AZURE_MANAGEMENT_MAX_CONNECTIONS", "20")
+    )
+    cfg.azure_management.timeout = float(os.getenv("AZURE_MANAGEMENT_TIMEOUT", "30"))
+    cfg.azure_management.max_retries = int(
+        os.getenv("AZURE_MANAGEMENT_MAX_RETRIES", "5")
+    )
+    cfg.azure_management.backoff_base = float(
+        os.getenv("AZURE_MANAGEMENT_BACKOFF_BASE", "1")
+    )
+    cfg.azure_management.backoff_max = float(
+        os.getenv("AZURE_MANAGEMENT_BACKOFF_MAX", "60")
+    )
+    cfg.azure_management.token_refresh_margin = float(
+        os.getenv("AZURE_MANAGEMENT_TOKEN_REFRESH_MARGIN", "300")
+    )
+
     # AWS
     cfg.aws = edict()
     cfg.aws.access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
     cfg.aws.secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
     cfg.aws.region = os.getenv("AWS_REGION")
+    # Bedrock
+    cfg.bedrock = edict()
+    cfg.bedrock.max_pool_connections = int(
+        os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "32")
+    )
+    cfg.bedrock.embedding_concurrency = int(
+        os.getenv("BEDROCK_EMBEDDING_CONCURRENCY", "16")
+    )
+    cfg.bedrock.max_retries = int(os.getenv("BEDROCK_MAX_RETRIES", "6"))
     # LanceDB
     cfg.lance = edict()
     cfg.lance.db_uri = os.getenv("LANCE_DB_URI")
+    # Runbook job watcher
+    cfg.job_watcher = edict()
+    cfg.job_watcher.initial_interval = float(
+        os.getenv("JOB_WATCHER_INITIAL_INTERVAL", "5")
+    )
+    cfg.job_watcher.max_interval = float(os.getenv("JOB_WATCHER_MAX_INTERVAL", "60"))
+    cfg.job_watcher.backoff_factor = float(
+        os.getenv("JOB_WATCHER_BACKOFF_FACTOR", "1.5")
+    )
+    cfg.job_watcher.batch_size = int(os.getenv("JOB_WATCHER_BATCH_SIZE", "50"))
+    cfg.job_watcher.max_concurrent_polls = int(
+        os.getenv("JOB_WATCHER_MAX_CONCURRENT_POLLS", "10")
+    )
+    # Runbook indexing pipeline
+    cfg.indexing = edict()
+    cfg.indexing.fetch_concurrency = int(os.getenv("INDEXING_FETCH_CONCURRENCY", "8"))
+    cfg.indexing.analysis_concurrency = int(
+        os.getenv("INDEXING_ANALYSIS_CONCURRENCY", "4")
+    )
+    cfg.indexing.embed_batch_size = int(os.getenv("INDEXING_EMBED_BATCH_SIZE", "32"))
+    cfg.indexing.embed_batch_timeout = float(
+        os.getenv("INDEXING_EMBED_BATCH_TIMEOUT", "2")
+    )
+    cfg.indexing.write_batch_size = int(os.getenv("INDEXING_WRITE_BATCH_SIZE", "1000"))
+    # Indexing notifications
+    cfg.indexing_notifier = edict()
+    cfg.indexing_notifier.channel = os.getenv(
+        "INDEXING_NOTIFIER_CHANNEL", "runbook_indexing"
+    )
+    # LISTEN needs a session, so prefer the direct URL over a pooled one
+    cfg.indexing_notifier.database_url = os.getenv("DIRECT_URL") or os.getenv(
+        "DATABASE_URL"
+    )
+    cfg.indexing_notifier.cross_replica = (
+        os.getenv("INDEXING_NOTIFIER_CROSS_REPLICA", "true").lower() == "true"
+    )
+    cfg.indexing_notifier.reconcile_interval = float(
+        os.getenv("INDEXING_RECONCILE_INTERVAL", "1800")
+    )
+    # Embedding cache
+    cfg.embedding_cache = edict()
+    cfg.embedding_cache.enabled = (
+        os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    )
+    cfg.embedding_cache.dir = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+    cfg.embedding_cache.max_memory_entries = int(
+        os.getenv("EMBEDDING_CACHE_MAX_MEMORY_ENTRIES", "10000")
+    )
+    cfg.embedding_cache.max_disk_bytes = int(
+        os.getenv("EMBEDDING_CACHE_MAX_DISK_BYTES", str(512 * 1024 * 1024))
+    )
+    # Incident work queue
+    cfg.incident_queue = edict()
+    cfg.incident_queue.workers = int(os.getenv("INCIDENT_QUEUE_WORKERS", "4"))
+    cfg.incident_queue.max_attempts = int(os.getenv("INCIDENT_QUEUE_MAX_ATTEMPTS", "5"))
+    cfg.incident_queue.lease_seconds = int(
+        os.getenv("INCIDENT_QUEUE_LEASE_SECONDS", "300")
+    )
+    cfg.incident_queue.poll_interval = float(
+        os.getenv("INCIDENT_QUEUE_POLL_INTERVAL", "2")
+    )
+    cfg.incident_queue.retry_backoff_base = float(
+        os.getenv("INCIDENT_QUEUE_RETRY_BACKOFF_BASE", "10")
+    )
+    cfg.incident_queue.retry_backoff_max = float(
+        os.getenv("INCIDENT_QUEUE_RETRY_BACKOFF_MAX", "600")
+    )
+    # Concurrent actions on the entities named by an incident
+    cfg.incident_fanout = edict()
+    cfg.incident_fanout.max_concurrency = int(
+        os.getenv("INCIDENT_FANOUT_MAX_CONCURRENCY", "8")
+    )
+    # Incident correlation
+    cfg.correlation = edict()
+    cfg.correlation.enabled = (
+        os.getenv("INCIDENT_CORRELATION_ENABLED", "true").lower() == "true"
+    )
+    cfg.correlation.window_seconds = int(
+        os.getenv("INCIDENT_CORRELATION_WINDOW_SECONDS", "900")
+    )
+    # LLM response cache
+    cfg.llm_cache = edict()
+    cfg.llm_cache.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    cfg.llm_cache.ttl_seconds = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    cfg.llm_cache.similarity_threshold = float(
+        os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.97")
+    )
+    cfg.llm_cache.max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    # LLM gateway, limits apply per provider and model
+    cfg.llm_gateway = edict()
+    cfg.llm_gateway.rpm = int(os.getenv("LLM_GATEWAY_RPM", "500"))
+    cfg.llm_gateway.tpm = int(os.getenv("LLM_GATEWAY_TPM", "200000"))
+    cfg.llm_gateway.max_concurrency = int(
+        os.getenv("LLM_GATEWAY_MAX_CONCURRENCY", "16")
+    )
+    # JSON object of limits by "provider:model", e.g.
+    # {"openai:gpt-4o": {"rpm": 5000, "tpm": 800000, "max_concurrency": 32}}
+    cfg.llm_gateway.model_limits = json.loads(
+        os.getenv("LLM_GATEWAY_MODEL_LIMITS", "{}")
+    )
+    cfg.llm_gateway.max_rate_limit_retries = int(
+        os.getenv("LLM_GATEWAY_MAX_RATE_LIMIT_RETRIES", "5")
+    )
+    cfg.llm_gateway.rate_limit_backoff = float(
+        os.getenv("LLM_GATEWAY_RATE_LIMIT_BACKOFF", "2")
+    )
+    cfg.llm_gateway.coalesce = (
+        os.getenv("LLM_GATEWAY_COALESCE", "true").lower() == "true"
+    )
+    # LLM provider routing, hedging and failover between OpenAI and Bedrock
+    cfg.llm_routing = edict()
+    cfg.llm_routing.enabled = (
+        os.getenv(
+            "LLM_ROUTING_ENABLED", "true" if os.getenv("AWS_ACCESS_KEY_ID") else "false"
+        ).lower()
+        == "true"
+    )
+    # JSON object of the Anthropic-on-Bedrock model standing in for each OpenAI model
+    cfg.llm_routing.fallback_models = json.loads(
+        os.getenv(
+            "LLM_ROUTING_FALLBACK_MODELS",
+            json.dumps(
+                {
+                    "gpt-4o-mini": "anthropic.claude-3-5-haiku-20241022-v1:0",
+                    "gpt-4o": "anthropic.claude-3-5-sonnet-20241022-v2:0",
+                }
+            ),
+        )
+    )
+    cfg.llm_routing.hedge_percentile = float(
+        os.getenv("LLM_ROUTING_HEDGE_PERCENTILE", "0.95")
+    )
+    cfg.llm_routing.hedge_min_delay = float(
+        os.getenv("LLM_ROUTING_HEDGE_MIN_DELAY", "2")
+    )
+    cfg.llm_routing.hedge_default_delay = float(
+        os.getenv("LLM_ROUTING_HEDGE_DEFAULT_DELAY", "15")
+    )
+    cfg.llm_routing.min_samples = int(os.getenv("LLM_ROUTING_MIN_SAMPLES", "20"))
+    cfg.llm_routing.latency_window = int(os.getenv("LLM_ROUTING_LATENCY_WINDOW", "500"))
+    cfg.llm_routing.failure_threshold = int(
+        os.getenv("LLM_ROUTING_FAILURE_THRESHOLD", "5")
+    )
+    cfg.llm_routing.reset_timeout = float(os.getenv("LLM_ROUTING_RESET_TIMEOUT", "30"))
+    # Runbook metadata cache
+    cfg.runbook_cache = edict()
+    cfg.runbook_cache.enabled = (
+        os.getenv("RUNBOOK_CACHE_ENABLED", "true").lower() == "true"
+    )
+    cfg.runbook_cache.ttl_seconds = float(os.getenv("RUNBOOK_CACHE_TTL_SECONDS", "600"))
+    cfg.runbook_cache.max_entries = int(os.getenv("RUNBOOK_CACHE_MAX_ENTRIES", "5000"))
+    # Log analysis
+    cfg.log_analysis = edict()
+    cfg.log_analysis.model = os.getenv("LOG_ANALYSIS_MODEL", "gpt-4o")
+    cfg.log_analysis.concurrency = int(os.getenv("LOG_ANALYSIS_CONCURRENCY", "4"))
+    cfg.log_analysis.context_lines = int(os.getenv("LOG_ANALYSIS_CONTEXT_LINES", "5"))
+    cfg.log_analysis.max_chunks = int(os.getenv("LOG_ANALYSIS_MAX_CHUNKS", "50"))
+    cfg.log_analysis.max_line_length = int(
+        os.getenv("LOG_ANALYSIS_MAX_LINE_LENGTH", "2000")
+    )
+    # Vector search
+    cfg.vector_search = edict()
+    cfg.vector_search.query_type = os.getenv("VECTOR_SEARCH_QUERY_TYPE", "hybrid")
+    cfg.vector_search.top_k = int(os.getenv("VECTOR_SEARCH_TOP_K", "5"))
+    cfg.vector_search.rrf_k = int(os.getenv("VECTOR_SEARCH_RRF_K", "60"))
+    cfg.vector_search.candidate_multiplier = int(
+        os.getenv("VECTOR_SEARCH_CANDIDATE_MULTIPLIER", "4")
+    )
+    cfg.vector_search.batch_workers = int(os.getenv("VECTOR_SEARCH_BATCH_WORKERS", "4"))
+    # Vector store backend, "lancedb" or "numpy"
+    cfg.vector_store = edict()
+    cfg.vector_store.backend = os.getenv("VECTOR_STORE_BACKEND", "lancedb")
+    # In-process NumPy vector store
+    cfg.numpy_store = edict()
+    cfg.numpy_store.dir = os.getenv("NUMPY_STORE_DIR", ".cache/vector_store")
+    cfg.numpy_store.dtype = os.getenv("NUMPY_STORE_DTYPE", "float32")
+    cfg.numpy_store.max_log_entries = int(
+        os.getenv("NUMPY_STORE_MAX_LOG_ENTRIES", "1000")
+    )
+    cfg.numpy_store.max_deleted_ratio = float(
+        os.getenv("NUMPY_STORE_MAX_DELETED_RATIO", "0.2")
+    )
+    # Vector index maintenance
+    cfg.vector_index = edict()
+    cfg.vector_index.max_fragments = int(os.getenv("VECTOR_INDEX_MAX_FRAGMENTS", "32"))
+    cfg.vector_index.max_unindexed_rows = int(
+        os.getenv("VECTOR_INDEX_MAX_UNINDEXED_ROWS", "500")
+    )
+    cfg.vector_index.max_deleted_ratio = float(
+        os.getenv("VECTOR_INDEX_MAX_DELETED_RATIO", "0.1")
+    )
+    cfg.vector_index.max_versions = int(os.getenv("VECTOR_INDEX_MAX_VERSIONS", "100"))
+    cfg.vector_index.min_rows_for_ann = int(
+        os.getenv("VECTOR_INDEX_MIN_ROWS_FOR_ANN", "5000")
+    )
+    cfg.vector_index.sub_vector_dim = int(
+        os.getenv("VECTOR_INDEX_SUB_VECTOR_DIM", "16")
+    )
+    cfg.vector_index.cleanup_older_than_seconds = int(
+        os.getenv("VECTOR_INDEX_CLEANUP_OLDER_THAN_SECONDS", "3600")
+    )
+    cfg.vector_index.maintenance_interval = float(
+        os.getenv("VECTOR_INDEX_MAINTENANCE_INTERVAL", "600")
+    )
     return cfg
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Any
 from runbook_agent.embedding_provider.models import Embedding
@@ -30,3 +31,22 @@ class BaseEmbeddingProvider(ABC):
     ) -> List[Embedding]:
         """Get a list of text embeddings, with batching."""
         pass
+
+    async def aget_text_embedding(self, text: str) -> Embedding:
+        """
+        Async version of `get_text_embedding`.
+
+        Providers without a native async client run the sync call in a worker thread.
+        """
+        return await asyncio.to_thread(self.get_text_embedding, text)
+
+    async def aget_text_embedding_batch(
+        self,
+        texts: List[str],
+        show_progress: bool = False,
+        **kwargs: Any,
+    ) -> List[Embedding]:
+        """Async version of `get_text_embedding_batch`."""
+        return await asyncio.to_thread(
+            self.get_text_embedding_batch, texts, show_progress, **kwargs
+        )
@@ -1,19 +1,27 @@
+import asyncio
 from runbook_agent.embedding_provider.base_embedding_provider import (
     BaseEmbeddingProvider,
 )
-from typing import List, Any
+from runbook_agent.embedding_provider.embedding_cache import EmbeddingCache
+from typing import Dict, List, Any, Optional, Tuple
 from runbook_agent.embedding_provider.models import Embedding
 
 
 class BaseEmbeddingRepository(BaseEmbeddingProvider):
-    def __init__(self, embedding_provider: BaseEmbeddingProvider):
+    def __init__(
+        self,
+        embedding_provider: BaseEmbeddingProvider,
+        cache: Optional[EmbeddingCache] = None,
+    ):
         """
         A wrapper for embedding providers to add additional logic (e.g., logging, caching, etc.)
 
         Args:
             embedding_provider (BaseEmbeddingProvider): The actual embedding provider instance (e.g. Bedrock, OpenAI).
+            cache (EmbeddingCache, optional): Cache consulted before calling the provider.
         """
         self.__embedding_provider = embedding_provider
+        self.__cache = cache
 
     def get_text_embedding(self, text: str) -> Embedding:
         """
@@ -25,7 +33,14 @@ class BaseEmbeddingRepository(BaseEmbeddingProvider):
         Returns:
             List[float]: The list of embedding values.
         """
+        if self.__cache is not None:
+            embeddings = self.__cache.get(text)
+            if embeddings is not None:
+                return embeddings
+
         embeddings = self.__embedding_provider.get_text_embedding(text)
+        if self.__cache is not None:
+            self.__cache.put(text, embeddings)
         return embeddings
 
     def get_text_embedding_batch(
@@ -34,6 +49,98 @@ class BaseEmbeddingRepository(BaseEmbeddingProvider):
         show_progress: bool = False,
         **kwargs: Any,
     ) -> List[Embedding]:
-        return self.__embedding_provider.get_text_embedding_batch(
-            texts=texts, show_progress=show_progress, kwargs=kwargs
+        if self.__cache is None:
+            return self.__embedding_provider.get_text_embedding_batch(
+                texts=texts, show_progress=show_progress, **kwargs
+            )
+
+        results, missing_texts = self._lookup_batch(texts)
+        if not missing_texts:
+            return results
+        embeddings = self.__embedding_provider.get_text_embedding_batch(
+            texts=missing_texts, show_progress=show_progress, **kwargs
+        )
+        return self._merge_batch(texts, results, missing_texts, embeddings)
+
+    async def aget_text_embedding(self, text: str) -> Embedding:
+        """
+        Async version of `get_text_embedding`, using the provider's async client when it has one.
+        """
+        if self.__cache is not None:
+            # Memory hits are served inline, the disk tier is read off the event loop
+            embeddings = self.__cache.get_from_memory(text)
+            if embeddings is None:
+                embeddings = await asyncio.to_thread(self.__cache.get, text)
+            if embeddings is not None:
+                return embeddings
+
+        if hasattr(self.__embedding_provider, "aget_text_embedding"):
+            embeddings = await self.__embedding_provider.aget_text_embedding(text)
+        else:
+            embeddings = await asyncio.to_thread(
+                self.__embedding_provider.get_text_embedding, text
+            )
+        if self.__cache is not None:
+            await asyncio.to_thread(self.__cache.put, text, embeddings)
+        return embeddings
+
+    async def aget_text_embedding_batch(
+        self,
+        texts: List[str],
+        show_progress: bool = False,
+        **kwargs: Any,
+    ) -> List[Embedding]:
+        """Async version of `get_text_embedding_batch`."""
+        if hasattr(self.__embedding_provider, "aget_text_embedding_batch"):
+            if self.__cache is None:
+                return await self.__embedding_provider.aget_text_embedding_batch(
+                    texts, show_progress=show_progress, **kwargs
+                )
+            # The cache tiers touch the disk, keep them off the event loop
+            results, missing_texts = await asyncio.to_thread(self._lookup_batch, texts)
+            if not missing_texts:
+                return results
+            embeddings = await self.__embedding_provider.aget_text_embedding_batch(
+                missing_texts, show_progress=show_progress, **kwargs
+            )
+            return await asyncio.to_thread(
+                self._merge_batch, texts, results, missing_texts, embeddings
+            )
+        return await asyncio.to_thread(
+            self.get_text_embedding_batch, texts, show_progress, **kwargs
         )
+
+    def _lookup_batch(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[Embedding]], List[str]]:
+        results = self.__cache.get_many(texts)
+        # Only send each distinct missing text to the provider once
+        missing_texts = list(
+            dict.fromkeys(
+                text for text, result in zip(texts, results) if result is None
+            )
+        )
+        return results, missing_texts
+
+    def _merge_batch(
+        self,
+        texts: List[str],
+        results: List[Optional[Embedding]],
+        missing_texts: List[str],
+        embeddings: List[Embedding],
+    ) -> List[Embedding]:
+        computed = dict(zip(missing_texts, embeddings))
+        for text, embedding in computed.items():
+            self.__cache.put(text, embedding)
+        return [
+            computed[text] if result is None else result
+            for text, result in zip(texts, results)
+        ]
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        """
+        Returns the embedding cache counters, or None when caching is disabled.
+        """
+        if self.__cache is None:
+            return None
+        return self.__cache.stats()
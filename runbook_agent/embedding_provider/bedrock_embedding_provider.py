@@ -1,4 +1,12 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from runbook_agent.clients.bedrock_runtime_client import bedrock_runtime_client
 from typing import List, Any
 from llama_index.core.utils import get_tqdm_iterable
@@ -7,20 +15,48 @@ from runbook_agent.config import init_config
 
 cfg = init_config()
 
+# Bedrock error codes that are worth retrying with backoff
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+def _is_throttling_error(exception: BaseException) -> bool:
+    return (
+        isinstance(exception, ClientError)
+        and exception.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+    )
+
 
 class BedrockEmbeddingProvider:
-    def __init__(self, model_id: str):
+    def __init__(
+        self, model_id: str, max_workers: int = cfg.bedrock.embedding_concurrency
+    ):
         """
         Initialize the Bedrock client and embedding provider for generating embeddings.
 
         Args:
             model_id (str): The ID of the Bedrock embedding model.
-            region_name (str): The AWS region where the Bedrock service is available.
+            max_workers (int): Maximum number of concurrent Bedrock requests of a batch.
         """
         self.client = bedrock_runtime_client
         self.model_id = model_id
         self.embed_batch_size = 10
+        self.max_workers = max_workers
+        # boto3 clients are thread safe, all workers share the client connection pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bedrock-embedding"
+        )
 
+    @retry(
+        retry=retry_if_exception(_is_throttling_error),
+        wait=wait_random_exponential(min=1, max=20),
+        stop=stop_after_attempt(cfg.bedrock.max_retries),
+        reraise=True,
+    )
     def get_text_embedding(self, text: str) -> Embedding:
         """
         Get embeddings from Bedrock for the provided text.
@@ -50,12 +86,12 @@ class BedrockEmbeddingProvider:
 
     def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
         """
-        Embed the input sequence of text synchronously.
+        Embed the input sequence of text concurrently, keeping the input order.
 
-        Subclasses can implement this method if batch queries are supported.
+        Titan has no multi-text endpoint, so each text is its own request and the
+        requests of a batch run in parallel on the shared thread pool.
         """
-        # Default implementation just loops over _get_text_embedding
-        return [self.get_text_embedding(text) for text in texts]
+        return list(self._executor.map(self.get_text_embedding, texts))
 
     def get_text_embedding_batch(
         self,
@@ -66,6 +102,8 @@ class BedrockEmbeddingProvider:
         """Get a list of text embeddings, with batching."""
         cur_batch: List[str] = []
         result_embeddings: List[Embedding] = []
+        # Keep every worker busy, a batch is a unit of progress reporting only
+        batch_size = max(self.embed_batch_size, self.max_workers)
 
         queue_with_progress = enumerate(
             get_tqdm_iterable(texts, show_progress, "Generating embeddings")
@@ -73,7 +111,7 @@ class BedrockEmbeddingProvider:
 
         for idx, text in queue_with_progress:
             cur_batch.append(text)
-            if idx == len(texts) - 1 or len(cur_batch) == self.embed_batch_size:
+            if idx == len(texts) - 1 or len(cur_batch) == batch_size:
                 embeddings = self._get_text_embeddings(cur_batch)
                 result_embeddings.extend(embeddings)
                 cur_batch = []
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from runbook_agent.embedding_provider.models import Embedding
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, two-tier cache for embeddings.
+
+    Entries are keyed by hash(model_id, dimensions, text). The first tier is an
+    in-memory LRU, the second an on-disk store of raw float32 arrays (one file per
+    entry) that survives restarts. Both tiers are size bounded and evict the least
+    recently used entries first.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        dimensions: int,
+        cache_dir: Optional[str] = cfg.embedding_cache.dir,
+        max_memory_entries: int = cfg.embedding_cache.max_memory_entries,
+        max_disk_bytes: int = cfg.embedding_cache.max_disk_bytes,
+    ):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            model_id (str): The embedding model the cached vectors belong to.
+            dimensions (int): Dimensions of the cached vectors.
+            cache_dir (str, optional): Directory of the on-disk tier. Disabled when None.
+            max_memory_entries (int): Maximum number of entries kept in memory.
+            max_disk_bytes (int): Maximum total size of the on-disk tier in bytes.
+        """
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # key -> file size, ordered from least to most recently used
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+        if self.cache_dir:
+            self._load_disk_index()
+
+    def key(self, text: str) -> str:
+        """
+        Returns the cache key of a text for this model and dimension.
+        """
+        content = f"{self.model_id}\x00{self.dimensions}\x00{text}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[Embedding]:
+        """
+        Returns the cached embedding of a text, or None on a miss.
+        """
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return vector.tolist()
+
+            vector = self._read_from_disk(key)
+            if vector is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._put_in_memory(key, vector)
+            return vector.tolist()
+
+    def get_from_memory(self, text: str) -> Optional[Embedding]:
+        """
+        Returns the embedding of a text if it is in the in-memory tier, without
+        touching the disk. A miss here is not counted, the caller is expected to
+        fall back to `get`.
+        """
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is None:
+                return None
+            self._memory.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return vector.tolist()
+
+    def get_many(self, texts: List[str]) -> List[Optional[Embedding]]:
+        """
+        Returns the cached embeddings of the texts, with None for every miss.
+        """
+        return [self.get(text) for text in texts]
+
+    def put(self, text: str, embedding: Embedding):
+        """
+        Stores the embedding of a text in both tiers.
+        """
+        key = self.key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._put_in_memory(key, vector)
+            self._write_to_disk(key, vector)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit/miss counters and the current size of both tiers.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (
+                (stats["memory_hits"] + stats["disk_hits"]) / lookups
+                if lookups
+                else 0.0
+            )
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = len(self._disk_index)
+            stats["disk_bytes"] = self._disk_bytes
+            return stats
+
+    def _put_in_memory(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["memory_evictions"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.f32")
+
+    def _load_disk_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file_name in files:
+                if not file_name.endswith(".f32"):
+                    continue
+                stat = os.stat(os.path.join(root, file_name))
+                entries.append((stat.st_mtime, file_name[: -len(".f32")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        self._evict_from_disk()
+
+    def _read_from_disk(self, key: str) -> Optional[np.ndarray]:
+        if not self.cache_dir or key not in self._disk_index:
+            return None
+        path = self._path(key)
+        try:
+            vector = np.fromfile(path, dtype=np.float32)
+            # Record the access so eviction survives restarts in LRU order
+            os.utime(path)
+        except OSError:
+            self._disk_bytes -= self._disk_index.pop(key)
+            return None
+        self._disk_index.move_to_end(key)
+        return vector
+
+    def _write_to_disk(self, key: str, vector: np.ndarray):
+        if not self.cache_dir or key in self._disk_index:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            vector.tofile(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Unable to write embedding to disk cache: {str(e)}")
+            return
+        self._disk_index[key] = vector.nbytes
+        self._disk_bytes += vector.nbytes
+        self._evict_from_disk()
+
+    def _evict_from_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            self._counters["disk_evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
@@ -1,15 +1,25 @@
 from runbook_agent.embedding_provider.base_embedding_provider import (
     BaseEmbeddingProvider,
 )
+from runbook_agent.embedding_provider.base_embedding_service import (
+    BaseEmbeddingRepository,
+)
 from runbook_agent.embedding_provider.bedrock_embedding_provider import (
     BedrockEmbeddingProvider,
 )
+from runbook_agent.embedding_provider.embedding_cache import EmbeddingCache
 from runbook_agent.embedding_provider.models import (
     EmbeddingModels,
 )
+from runbook_agent.config import init_config
 from llama_index.embeddings.openai import OpenAIEmbedding
 import os
 
+cfg = init_config()
+
+# Dimensions of the vectors stored in the vector store
+EMBEDDING_DIMENSIONS = 512
+
 
 class EmbeddingServiceFactory:
     """
@@ -18,7 +28,11 @@ class EmbeddingServiceFactory:
 
     @staticmethod
     def create_embedding_service(
-        provider_type: EmbeddingModels, model_id: str, *args, **kwargs
+        provider_type: EmbeddingModels,
+        model_id: str,
+        *args,
+        use_cache: bool = cfg.embedding_cache.enabled,
+        **kwargs,
     ) -> BaseEmbeddingProvider:
         """
         Creates the embedding service based on the provider type.
@@ -26,6 +40,7 @@ class EmbeddingServiceFactory:
         Args:
             provider_type (str): Type of the embedding provider (e.g., "bedrock", "openai").
             model_id (str): The model ID to initialize the embedding provider (e.g., Bedrock's model ID).
+            use_cache (bool): Whether to wrap the provider with the embedding cache.
             *args, **kwargs: Additional arguments passed to the embedding provider initialization.
 
         Returns:
@@ -35,14 +50,17 @@ class EmbeddingServiceFactory:
             embedding_provider = BedrockEmbeddingProvider(
                 model_id=model_id, *args, **kwargs
             )
-        if provider_type == EmbeddingModels.OPENAI:
+        elif provider_type == EmbeddingModels.OPENAI:
             embedding_provider = OpenAIEmbedding(
                 model=model_id,
-                dimensions=512,
+                dimensions=EMBEDDING_DIMENSIONS,
                 api_key=os.getenv("OPENAI_API_KEY"),
             )
         else:
             raise ValueError(f"Unsupported provider type: {provider_type}")
 
         # Wrap the embedding provider with the repository
-        return embedding_provider
+        cache = None
+        if use_cache:
+            cache = EmbeddingCache(model_id=model_id, dimensions=EMBEDDING_DIMENSIONS)
+        return BaseEmbeddingRepository(embedding_provider, cache=cache)
@@ -1,28 +1,51 @@
 # api/webhook.py
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from runbook_agent.query_engine.query_engine import QueryEngine
 from runbook_agent.embedding_provider.base_embedding_provider import (
     BaseEmbeddingProvider,
 )
 from runbook_agent.repository.vector_store.base_repository import VectorBaseRepository
+from runbook_agent.repository.vector_store.schemas import VectorFilters
 from runbook_agent.repository.automation_runbook_documents.base_automation_runbook_documents_service import (
     AbstractAutomationRunbookService,
 )
 from runbook_agent.runbook_sources.prompts import (
     function_map,
-    select_runbook_for_execution,
+    async_select_runbook_for_execution,
     RunbookDetails,
-    action_sequences,
+    async_batch_action_sequences,
+    async_get_VM_names,
 )
 from runbook_agent.runbook_executor.runbook_execution_factory import (
     BaseExecutionService,
 )
+from runbook_agent.runbook_executor.job_watcher import RunbookJobWatcher
+from runbook_agent.repository.incident_jobs.incident_job_service import (
+    IncidentJobQueue,
+)
+from runbook_agent.incident_webhooks.incident_workers import (
+    IncidentWorkerPool,
+    JobProgress,
+)
+from runbook_agent.incident_webhooks.incident_correlator import IncidentCorrelator
+from runbook_agent.incident_webhooks.entity_fanout import EntityFanout, EntityOutcome
+from runbook_agent.repository.automation_runbook_documents.runbook_cache import (
+    get_runbook_cache,
+)
+from runbook_agent.llms.response_cache import (
+    get_response_cache,
+    init_response_cache,
+)
+from runbook_agent.llms.gateway import get_llm_gateway
+from runbook_agent.llms.routing import get_llm_router
+from runbook_agent.config import init_config
 from runbook_agent.runbook_sources.services.azure_service.azure_runbook_models import (
     WebhookConfig,
 )
-import requests
+import httpx
 import os
+from dataclasses import asdict, dataclass
 from datetime import datetime
 import pytz
 import uuid
@@ -32,6 +55,8 @@ from runbook_agent.incident_webhooks.log_analysis_agent import LogAnalysisAgent
 import re
 from typing import Optional
 
+cfg = init_config()
+
 # Create a router instance
 router = APIRouter()
 
@@ -47,6 +72,15 @@ class Payload(BaseModel):
     correlation_id: Optional[str]
 
 
+@dataclass
+class IncidentUpdate:
+    # The outcome reported on the ticket once the action finished
+    status: str
+    output: str
+    runbook_name: str
+    resolve: Optional[bool] = None
+
+
 def init(
     embedding_provider: BaseEmbeddingProvider,
     vector_store: VectorBaseRepository,
@@ -58,19 +92,55 @@ def init(
     global queryEngine
     global repository
     global azureExecutor
+    global jobWatcher
     global config
     global prisma_client
+    global incidentQueue
+    global incidentWorkers
+    global incidentCorrelator
     repository = r
     queryEngine = QueryEngine(
         embedding_provider=embedding_provider, vector_store=vector_store
     )
+    # Near-duplicate incidents reuse cached runbook selections and plans
+    init_response_cache(embedding_provider)
     azureExecutor = executor
+    jobWatcher = RunbookJobWatcher(executor)
     config = c
     prisma_client = client
+    incidentQueue = IncidentJobQueue(client)
+    incidentWorkers = IncidentWorkerPool(
+        incidentQueue, process_incident_job, on_complete=update_folded_incidents
+    )
+    incidentCorrelator = IncidentCorrelator(client, incidentQueue)
+
+
+def start_incident_workers():
+    """
+    Starts the incident workers of this process. Must be called after init.
+    """
+    incidentWorkers.start()
+
+
+async def stop_incident_workers():
+    await incidentWorkers.stop()
 
 
 @router.post("/service_now/webhook")
-async def receive_payload(payload: Payload, background_tasks: BackgroundTasks):
+async def receive_payload(payload: Payload):
+    correlation = None
+    if cfg.correlation.enabled:
+        # Fold tickets of an ongoing storm into the action already in flight
+        correlation = await incidentCorrelator.submit(
+            sys_id=payload.sys_id,
+            description=payload.description,
+            severity=payload.severity,
+            payload=payload.model_dump(),
+        )
+        job = correlation.job
+    else:
+        job = await incidentQueue.enqueue(payload.sys_id, payload.model_dump())
+
     existing_incident = None
     if payload.correlation_id:
         existing_incident = await prisma_client.incident.find_first(
@@ -78,39 +148,174 @@ async def receive_payload(payload: Payload, background_tasks: BackgroundTasks):
         )
 
     if not existing_incident:
-        await prisma_client.incident.create(
-            data={
-                "org_id": "6fed2673-1fc3-4367-be99-2dd985d78319",
-                "subject": payload.short_description,
-                "start_time": datetime.now().utcnow(),
-                "end_time": datetime.now().utcnow(),
-                "severity": "critical",
-                "description": payload.description,
-                "status": "new",
-                "urgency": 3,
-                "impact": 3,
-                "url": f"https://dev209832.service-now.com/nav_to.do?uri=incident.do?sys_id={payload.sys_id}",
-            }
-        )
+        data = {
+            "org_id": "6fed2673-1fc3-4367-be99-2dd985d78319",
+            "subject": payload.short_description,
+            "start_time": datetime.now().utcnow(),
+            "end_time": datetime.now().utcnow(),
+            "severity": "critical",
+            "description": payload.description,
+            "status": "new",
+            "urgency": 3,
+            "impact": 3,
+            "url": f"https://dev209832.service-now.com/nav_to.do?uri=incident.do?sys_id={payload.sys_id}",
+        }
+        if correlation is not None:
+            data["events"] = {"connect": [{"id": correlation.event_id}]}
+        await prisma_client.incident.create(data=data)
+
+    if correlation is not None and correlation.duplicate:
+        return {
+            "message": "Duplicate of an incident already being processed.",
+            "job_id": job.id,
+            "status": job.status,
+            "correlation_key": correlation.correlation_key,
+            "occurrence_count": correlation.occurrence_count,
+        }
+
+    incidentWorkers.notify()
+    return {
+        "message": "Payload received and queued for processing.",
+        "job_id": job.id,
+        "status": job.status,
+    }
+
+
+@router.get("/service_now/jobs/{job_id}")
+async def get_incident_job(job_id: str):
+    job = await incidentQueue.get_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job.id,
+        "sys_id": job.sys_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
 
-    background_tasks.add_task(take_incident_action, payload)
-    return {"message": "Payload received and processing started in the background."}
+@router.get("/service_now/jobs")
+async def get_incident_queue_stats():
+    return await incidentQueue.stats()
 
 
-async def take_incident_action(payload: Payload):
+@router.get("/service_now/llm_cache")
+async def get_llm_cache_stats():
+    return get_response_cache().stats()
+
+
+@router.get("/service_now/llm_gateway")
+async def get_llm_gateway_stats():
+    return get_llm_gateway().stats()
+
+
+@router.get("/service_now/llm_routing")
+async def get_llm_routing_stats():
+    return get_llm_router().stats()
+
+
+@router.get("/service_now/runbook_cache")
+async def get_runbook_cache_stats():
+    return get_runbook_cache().stats()
+
+
+@router.get("/service_now/vector_index")
+async def get_vector_index_state():
+    state = await asyncio.to_thread(queryEngine.vector_store.get_index_state)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Index state not available")
+    return asdict(state)
+
+
+async def process_incident_job(
+    payload: dict, progress: JobProgress
+) -> Optional[IncidentUpdate]:
+    return await take_incident_action(Payload(**payload), progress)
+
+
+async def update_folded_incidents(job, update: Optional[IncidentUpdate]):
+    """
+    Reports the outcome of a completed job on the duplicate incidents folded into it.
+    """
+    if job is None or update is None:
+        return
+    sys_ids = [
+        sys_id
+        for sys_id in dict.fromkeys(job.folded_sys_ids or [])
+        if sys_id != job.sys_id
+    ]
+    for sys_id in sys_ids:
+        await report_incident(sys_id, update)
+
+
+async def report_incident(sys_id: str, update: IncidentUpdate):
+    """
+    Records the outcome of the action on the incident and its ServiceNow ticket.
+    """
+    await update_incident_table(
+        update.status, update.output, sys_id, update.runbook_name
+    )
+    await update_description(
+        update.status,
+        update.output,
+        os.getenv("SERVICE_NOW_URL"),
+        sys_id,
+        os.getenv("SERVICE_NOW_USERNAME"),
+        os.getenv("SERVICE_NOW_PASSWORD"),
+        resolve=update.resolve,
+    )
+
+
+async def take_incident_action(
+    payload: Payload, progress: JobProgress
+) -> Optional[IncidentUpdate]:
+    # A retry of a job whose actions all finished only reports their outcome again
+    recorded = progress.get("update")
+    if recorded is not None:
+        update = IncidentUpdate(**recorded)
+        await report_incident(payload.sys_id, update)
+        return update
+
     # You can perform any action here with the received data
-    results = queryEngine.query_vector_store(payload.description)
+    # Only runbooks the Azure executor can run are worth showing to the LLM
+    results = await queryEngine.async_query_vector_store(
+        payload.description, filters=VectorFilters(source="azure")
+    )
     searched_runbooks = [
         RunbookDetails(doc_id=result.doc_id, description=result.text)
         for result in results
     ]
-    selected_runbook = select_runbook_for_execution(
-        description=payload.description, runbooks=searched_runbooks
+    # Execution is prepared from the streamed responses, while the rest of each
+    # response is still being generated
+    prefetched = {}
+
+    def on_selection_partial(selection):
+        # The doc_id is complete once the description has started
+        if selection.doc_id and selection.description is not None:
+            doc_id = selection.doc_id
+            _prefetch(
+                prefetched,
+                f"runbook:{doc_id}",
+                lambda: _prepare_runbook(doc_id, payload.description, prefetched),
+            )
+
+    selected_runbook = await async_select_runbook_for_execution(
+        description=payload.description,
+        runbooks=searched_runbooks,
+        on_partial=on_selection_partial,
     )
-    if selected_runbook.doc_id == "":
+    if selected_runbook is None or selected_runbook.doc_id == "":
         return
 
-    runbook_details = await repository.get_by_id(selected_runbook.doc_id)
+    runbook_details = await _prefetched_or(
+        prefetched,
+        f"runbook:{selected_runbook.doc_id}",
+        lambda: repository.get_by_id(selected_runbook.doc_id),
+    )
     if runbook_details is None:
         return
     parameters = {}
@@ -128,19 +333,47 @@ async def take_incident_action(payload: Payload):
             return
         if funcName == "get_vm_names()":
             vmArgName = parameterKey
-            vmNamesResponse = func(payload.description)
+            vmNamesResponse = await _prefetched_or(
+                prefetched,
+                "vm_names",
+                lambda: async_get_VM_names(payload.description),
+            )
             continue
         parameters[parameterKey] = func()
 
+    def on_action_partial(action):
+        # The function name is complete once the arguments have started
+        if action.func_name and action.args is not None:
+            _prefetch(prefetched, "automation_account", _prepare_automation_account)
+
     if vmNamesResponse is not None and len(vmNamesResponse.vm_names) > 0:
-        for vm in vmNamesResponse.vm_names:
-            parameters[vmArgName] = vm
-            action_pipeline = action_sequences(
-                ticket_description=payload.description,
-                selected_runbook_description=selected_runbook.description,
-                user_entity_information=f"Focus only on actions to be taken for entity {vm}",
-            )
+
+        def on_plan_partial(plan):
+            for action in plan.actions or []:
+                on_action_partial(action)
+
+        # One call plans every VM, ambiguous ones are planned again on their own
+        plans = await async_batch_action_sequences(
+            ticket_description=payload.description,
+            selected_runbook_description=selected_runbook.description,
+            entities=vmNamesResponse.vm_names,
+            doc_id=selected_runbook.doc_id,
+            on_partial=on_plan_partial,
+        )
+
+        async def plan_and_submit(vm: str):
+            submitted = progress.entity(vm)
+            if submitted is not None:
+                # Submitted by an earlier attempt, only its outcome is awaited
+                if "job_id" in submitted:
+                    return submitted["job_id"]
+                return EntityOutcome(**submitted["outcome"])
+            action_pipeline = plans.get(vm)
             print(action_pipeline)
+            if action_pipeline is None:
+                return EntityOutcome(vm, "Skipped", "No action planned")
+            # Entities run concurrently, each gets its own parameters
+            entity_parameters = {**parameters, vmArgName: vm}
             if action_pipeline.func_name == "SchdeuleTaskForExecution":
                 timezone = pytz.timezone(action_pipeline.args["time_zone"])
                 start_time = datetime.fromisoformat(action_pipeline.args["start_time"])
@@ -154,93 +387,169 @@ async def take_incident_action(payload: Payload):
                     )
                 interval = action_pipeline.args["interval"]
                 frequency = action_pipeline.args["frequency"]
-                id = azureExecutor.schedule_runbook_execution(
+                await asyncio.to_thread(
+                    azureExecutor.schedule_runbook_execution,
                     resource_group=config.resource_group,
                     automation_account_name=config.automation_account,
                     schedule_name=uuid.uuid4(),
                     runbook_name=runbook_details.name,
-                    parameters=parameters,
+                    parameters=entity_parameters,
                     start_time=start_time,
                     expiry_time=expiry_time,
                     interval=interval,
                     frequency=frequency,
                     time_zone=timezone,
                 )
-                update_description(
-                    "Completed",
-                    f"Task scheduled for {vm}",
-                    os.getenv("SERVICE_NOW_URL"),
-                    payload.sys_id,
-                    os.getenv("SERVICE_NOW_USERNAME"),
-                    os.getenv("SERVICE_NOW_PASSWORD"),
-                )
-                update_incident_table(
-                    "Completed",
-                    f"Task scheduled for {vm}",
-                    payload.sys_id,
-                    runbook_details.name,
-                )
+                outcome = EntityOutcome(vm, "Completed", f"Task scheduled for {vm}")
+                await progress.record_entity(vm, {"outcome": asdict(outcome)})
+                return outcome
             if action_pipeline.func_name == "TriggerTaskImmediately":
-                id = azureExecutor.trigger_runbook(
+                job_id = await asyncio.to_thread(
+                    azureExecutor.trigger_runbook,
                     resource_group=config.resource_group,
                     automation_account_name=config.automation_account,
                     runbook_name=runbook_details.name,
-                    parameters=parameters,
+                    parameters=entity_parameters,
                 )
-                await poll_job(id, payload.sys_id, vm, runbook_details.name)
+                await progress.record_entity(vm, {"job_id": job_id})
+                # The job id, waited for outside of the concurrency limit
+                return job_id
+            return EntityOutcome(
+                vm, "Skipped", f"Unsupported action {action_pipeline.func_name}"
+            )
+
+        async def wait_for_job(vm: str, job_id: str):
+            status, output = await jobWatcher.wait_for_completion(
+                resource_group=config.resource_group,
+                automation_account_name=config.automation_account,
+                job_id=job_id,
+            )
+            output = await analyse_job_output(runbook_details.name, output or "")
+            return EntityOutcome(
+                vm, status, output, resolved="resolving" in output.lower()
+            )
+
+        # Entities submitted by an earlier attempt are awaited even if the VM
+        # names were read differently this time
+        entities = [*vmNamesResponse.vm_names, *progress.get("entities", {})]
+        outcomes = await EntityFanout().run(entities, plan_and_submit, wait_for_job)
+        # A single update for the whole ticket once every entity is done
+        status, output, resolved = EntityFanout.aggregate(outcomes)
+        update = IncidentUpdate(status, output, runbook_details.name, resolve=resolved)
     elif vmArgName == "":
-        id = azureExecutor.trigger_runbook(
-            resource_group=config.resource_group,
-            automation_account_name=config.automation_account,
-            runbook_name=runbook_details.name,
-            parameters=parameters,
-        )
-        await poll_job(id, payload.sys_id, "", runbook_details.name)
+        submitted = progress.entity("")
+        if submitted is not None:
+            id = submitted["job_id"]
+        else:
+            id = await asyncio.to_thread(
+                azureExecutor.trigger_runbook,
+                resource_group=config.resource_group,
+                automation_account_name=config.automation_account,
+                runbook_name=runbook_details.name,
+                parameters=parameters,
+            )
+            await progress.record_entity("", {"job_id": id})
+        update = await poll_job(id, runbook_details.name)
+    else:
+        return None
 
+    # Recorded first, so a failed report is retried without acting again
+    await progress.record("update", asdict(update))
+    await report_incident(payload.sys_id, update)
+    return update
 
-async def poll_job(id: str, sys_id: str, vm: str, runbook_name: str):
-    def hook(status, output):
-        if runbook_name == "cpu_and_jvm_logs":
-            try:
-                replacement_url = "https://test-collection-21-oct-2024.s3.us-west-2.amazonaws.com/was_logs_dump/20241208174017_native_stdout.log"
-                pattern = r"(native_stdout\.log S3 URL: ).*"
-                output = re.sub(pattern, rf"\1{replacement_url}", output)
 
-                log_analysis_agent = LogAnalysisAgent()
-                log_analysis_output = log_analysis_agent.analyse_logs(
-                    "https://test-collection-21-oct-2024.s3.us-west-2.amazonaws.com/was_logs_dump/20241208174017_native_stdout.log",
-                    500,
-                )
-                if log_analysis_output:
-                    for issue in log_analysis_output.issues:
-                        output += "\n"
-                        output += "-" * 25 + "\n"
-                        output += f"Potential Issue: {issue.potential_issue}\n"
-                        output += "-" * 25 + "\n"
-                        output += f"Log Items: {issue.log_items}\n"
-                        output += "-" * 25 + "\n"
-                        output += f"Insights: {issue.insights}\n"
-            except Exception:
-                pass
-        update_incident_table("completed", output, sys_id, runbook_name)
-        return update_description(
-            status,
-            output,
-            os.getenv("SERVICE_NOW_URL"),
-            sys_id,
-            os.getenv("SERVICE_NOW_USERNAME"),
-            os.getenv("SERVICE_NOW_PASSWORD"),
-        )
+def _prefetch(prefetched: dict, key: str, prepare):
+    """
+    Starts `prepare` in the background unless it was already started for `key`.
+    """
+    if key not in prefetched:
+        prefetched[key] = asyncio.create_task(_quietly(key, prepare))
+
 
-    azureExecutor.wait_for_runbook_completion(
+async def _quietly(key: str, prepare):
+    # A failed prefetch is redone by the code that needs its result
+    try:
+        return await prepare()
+    except Exception as e:
+        print(f"Prefetch of {key} failed: {e}")
+        return None
+
+
+async def _prefetched_or(prefetched: dict, key: str, fetch):
+    """
+    Returns the prefetched result of `key`, fetching it now when there is none.
+    """
+    task = prefetched.get(key)
+    if task is not None:
+        result = await task
+        if result is not None:
+            return result
+    return await fetch()
+
+
+async def _prepare_runbook(doc_id: str, description: str, prefetched: dict):
+    # Loads the selected runbook and starts resolving the VMs it targets
+    runbook_details = await repository.get_by_id(doc_id)
+    if runbook_details is not None and any(
+        item.endswith(":get_vm_names()") for item in runbook_details.args
+    ):
+        _prefetch(prefetched, "vm_names", lambda: async_get_VM_names(description))
+    return runbook_details
+
+
+async def _prepare_automation_account():
+    # Warms the executor's automation account lookup used by trigger_runbook
+    return await asyncio.to_thread(
+        azureExecutor.get_automation_account,
+        config.resource_group,
+        config.automation_account,
+    )
+
+
+async def analyse_job_output(runbook_name: str, output: str) -> str:
+    """
+    Appends the log analysis to the output of the runbooks that collect logs.
+    """
+    if runbook_name == "cpu_and_jvm_logs":
+        try:
+            replacement_url = "https://test-collection-21-oct-2024.s3.us-west-2.amazonaws.com/was_logs_dump/20241208174017_native_stdout.log"
+            pattern = r"(native_stdout\.log S3 URL: ).*"
+            output = re.sub(pattern, rf"\1{replacement_url}", output)
+
+            log_analysis_agent = LogAnalysisAgent()
+            log_analysis_output = await log_analysis_agent.async_analyse_logs(
+                "https://test-collection-21-oct-2024.s3.us-west-2.amazonaws.com/was_logs_dump/20241208174017_native_stdout.log",
+                500,
+            )
+            if log_analysis_output:
+                for issue in log_analysis_output.issues:
+                    output += "\n"
+                    output += "-" * 25 + "\n"
+                    output += f"Potential Issue: {issue.potential_issue}\n"
+                    output += "-" * 25 + "\n"
+                    output += f"Log Items: {issue.log_items}\n"
+                    output += "-" * 25 + "\n"
+                    output += f"Insights: {issue.insights}\n"
+        except Exception:
+            pass
+    return output
+
+
+async def poll_job(id: str, runbook_name: str) -> IncidentUpdate:
+    """
+    Waits for a runbook job and returns the update reporting its outcome.
+    """
+    status, output = await jobWatcher.wait_for_completion(
         resource_group=config.resource_group,
         automation_account_name=config.automation_account,
         job_id=id,
-        hook_function=hook,
     )
+    output = await analyse_job_output(runbook_name, output or "")
+    return IncidentUpdate(status, output, runbook_name)
 
 
-def update_incident_table(status, output, sys_id, runbook_name):
+async def update_incident_table(status, output, sys_id, runbook_name):
     runbook_link_template = (
         "https://portal.azure.com/#@futurepath.dev/resource/subscriptions/8a73585c-429c-4438-900a-3202dc668d02/"
         "resourceGroups/nva_auto_resolve_demo_rg/providers/Microsoft.Automation/"
@@ -250,16 +559,7 @@ def update_incident_table(status, output, sys_id, runbook_name):
     # Generate the runbook link
     runbook_link = runbook_link_template.format(runbook_name=runbook_name)
 
-    try:
-        # Try to get the current running loop
-        loop = asyncio.get_running_loop()
-        # Use asyncio.create_task to schedule the coroutine
-        loop.create_task(
-            _update_incident_async(status, output, sys_id, runbook_link, runbook_name)
-        )
-    except RuntimeError:
-        # If no event loop is running, create a new loop and run the coroutine
-        asyncio.run(_update_incident_async(status, output, sys_id, runbook_link))
+    await _update_incident_async(status, output, sys_id, runbook_link, runbook_name)
 
 
 async def _update_incident_async(status, output, sys_id, runbook_link, runbook_name):
@@ -280,46 +580,47 @@ async def _update_incident_async(status, output, sys_id, runbook_link, runbook_n
         print(e)
 
 
-def update_description(status, output, instance_url, sys_id, username, password):
+async def update_description(
+    status, output, instance_url, sys_id, username, password, resolve=None
+):
     url = f"{instance_url}/api/now/table/incident/{sys_id}"
 
     # Headers to indicate the content type
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
-    get_response = requests.get(url, auth=(username, password), headers=headers)
-
-    if get_response.status_code == 200:
-        current_description = (
-            get_response.json().get("result", {}).get("description", "")
-        )
-        if current_description != "":
-            current_description = f"{current_description}\n\n"
-    else:
-        print(f"Failed to retrieve incident. Status code: {get_response.status_code}")
-        return
-
-    # Construct the URL for the record in ServiceNow
-    url = f"{instance_url}/api/now/table/incident/{sys_id}"
+    async with httpx.AsyncClient(
+        auth=(username, password), headers=headers, timeout=30
+    ) as client:
+        get_response = await client.get(url)
 
-    # Headers to indicate the content type
-    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if get_response.status_code == 200:
+            current_description = (
+                get_response.json().get("result", {}).get("description", "")
+            )
+            if current_description != "":
+                current_description = f"{current_description}\n\n"
+        else:
+            print(
+                f"Failed to retrieve incident. Status code: {get_response.status_code}"
+            )
+            return
 
-    # The payload to update the description
-    payload = {
-        "description": f"{current_description}-----------------------------------\nJob execution status : {status} at {datetime.now().strftime("%d-%m-%Y %H:%M")} \n\nOutput:\n{output}\n-----------------------------------\n"
-    }
-    if "resolving" in output.lower():
-        payload["state"] = "6"  # ServiceNow state value for 'Resolved'
-        payload["close_code"] = "Solution provided"
-        payload["close_notes"] = "Cleared temporary files"
-        payload["description"] = (
-            f"{current_description}-----------------------------------\nJob execution status : {status} at {datetime.now().strftime("%d-%m-%Y %H:%M")} \n\nOutput:\n{''.join(output.splitlines()[-3:])}\n-----------------------------------\n"
-        )
+        # The payload to update the description
+        payload = {
+            "description": f"{current_description}-----------------------------------\nJob execution status : {status} at {datetime.now().strftime("%d-%m-%Y %H:%M")} \n\nOutput:\n{output}\n-----------------------------------\n"
+        }
+        # Without an explicit decision the ticket is resolved from the output
+        if resolve or (resolve is None and "resolving" in output.lower()):
+            payload["state"] = "6"  # ServiceNow state value for 'Resolved'
+            payload["close_code"] = "Solution provided"
+            payload["close_notes"] = "Cleared temporary files"
+        if resolve is None and "resolving" in output.lower():
+            payload["description"] = (
+                f"{current_description}-----------------------------------\nJob execution status : {status} at {datetime.now().strftime("%d-%m-%Y %H:%M")} \n\nOutput:\n{''.join(output.splitlines()[-3:])}\n-----------------------------------\n"
+            )
 
-    # Make the PUT request to update the description
-    response = requests.patch(
-        url, auth=(username, password), headers=headers, json=payload
-    )
+        # Make the PATCH request to update the description
+        response = await client.patch(url, json=payload)
 
     # Check if the update was successful
     if response.status_code == 200:
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Tuple
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EntityOutcome:
+    entity: str
+    status: str
+    output: str = ""
+    resolved: bool = False
+
+
+class EntityFanout:
+    """
+    Runs the actions of an incident that targets several entities (VMs)
+    concurrently.
+
+    Each entity goes through two steps. `prepare` plans and submits its action,
+    at most `max_concurrency` entities at a time since it calls the LLM and the
+    Azure API. `complete` waits for the submitted job, which costs nothing while
+    the job watcher polls, so it runs for every entity at once. A failing entity
+    never stops the others.
+    """
+
+    def __init__(self, max_concurrency: int = cfg.incident_fanout.max_concurrency):
+        """
+        Initialize the fan-out.
+
+        Args:
+            max_concurrency (int): Entities planned and submitted at once.
+        """
+        self.max_concurrency = max_concurrency
+
+    async def run(
+        self,
+        entities: List[str],
+        prepare: Callable[[str], Awaitable[Any]],
+        complete: Callable[[str, Any], Awaitable[EntityOutcome]],
+    ) -> List[EntityOutcome]:
+        """
+        Prepares and completes the action of every entity.
+
+        Args:
+            entities (List[str]): The entities to act on.
+            prepare (Callable): Coroutine function planning and submitting the
+                action of an entity. Returning an EntityOutcome ends the entity
+                there, anything else is passed on to `complete`.
+            complete (Callable): Coroutine function waiting for the submitted
+                action of an entity and returning its outcome.
+
+        Returns:
+            List[EntityOutcome]: The outcome of each entity, in order.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_entity(entity: str) -> EntityOutcome:
+            try:
+                async with semaphore:
+                    prepared = await prepare(entity)
+                if isinstance(prepared, EntityOutcome):
+                    return prepared
+                return await complete(entity, prepared)
+            except Exception as e:
+                logger.exception(f"Action on entity {entity} failed")
+                return EntityOutcome(entity=entity, status="Failed", output=str(e))
+
+        # Duplicate names would run the same action twice
+        entities = list(dict.fromkeys(entities))
+        return list(await asyncio.gather(*(run_entity(e) for e in entities)))
+
+    @staticmethod
+    def aggregate(outcomes: List[EntityOutcome]) -> Tuple[str, str, bool]:
+        """
+        Combines the outcomes of all entities into a single status and output.
+
+        Returns:
+            Tuple[str, str, bool]: The overall status, the output of every entity,
+                and whether every entity was resolved.
+        """
+        counts = Counter(outcome.status for outcome in outcomes)
+        if len(counts) == 1:
+            status = next(iter(counts))
+        else:
+            status = ", ".join(f"{count} {status}" for status, count in counts.items())
+        output = "\n\n".join(
+            f"Entity: {outcome.entity}\nStatus: {outcome.status}\n{outcome.output}"
+            for outcome in outcomes
+        )
+        resolved = bool(outcomes) and all(outcome.resolved for outcome in outcomes)
+        return status, output, resolved
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from prisma import Prisma
+from runbook_agent.repository.incident_jobs.incident_job_service import (
+    IncidentJobQueue,
+)
+from runbook_agent.repository.incident_jobs.models import (
+    IncidentJobModel,
+    IncidentJobStatus,
+)
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Host references, matched on the lower-cased description
+HOST_PATTERNS = [
+    # IPv4 addresses
+    re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
+    # Fully qualified domain names
+    re.compile(r"\b[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]+)+\.[a-z]{2,}\b"),
+    # Names following a label, e.g. "vm: web-01" or "host app42"
+    re.compile(
+        r"\b(?:host|hostname|vm|server|machine|node|device)(?:\s*name)?\s*[:=]?\s*"
+        r"([a-z0-9][a-z0-9_-]*[0-9][a-z0-9_-]*)"
+    ),
+    # Hyphenated names containing a digit, e.g. "prod-web-01"
+    re.compile(r"\b[a-z][a-z0-9]*(?:-[a-z0-9]+)+\b"),
+]
+# Volatile tokens that differ between otherwise identical tickets
+VOLATILE_PATTERNS = [
+    (
+        re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"),
+        "<id>",
+    ),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{16,}\b"), "<id>"),
+    (
+        re.compile(r"\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?z?"),
+        "<time>",
+    ),
+    (re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b"), "<time>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+]
+
+
+@dataclass
+class CorrelationResult:
+    correlation_key: str
+    event_id: str
+    occurrence_count: int
+    duplicate: bool
+    job: Optional[IncidentJobModel]
+
+
+class IncidentCorrelator:
+    """
+    Folds near-identical incidents into a single action.
+
+    Incidents are fingerprinted by their normalized description and the hosts
+    they mention. The first incident of a fingerprint creates an Event and queues
+    a job. Later incidents with the same fingerprint that arrive within the
+    correlation window only bump the Event counters and are attached to the job
+    that is still queued or running, which reports its outcome on every attached
+    incident. Once that job has finished a new incident is queued again.
+    """
+
+    def __init__(
+        self,
+        prisma_client: Prisma,
+        queue: IncidentJobQueue,
+        window_seconds: int = cfg.correlation.window_seconds,
+        org_id: str = "6fed2673-1fc3-4367-be99-2dd985d78319",
+    ):
+        """
+        Initialize the correlator.
+
+        Args:
+            prisma_client (Prisma): Connected Prisma client.
+            queue (IncidentJobQueue): Queue the first incident of a fingerprint is sent to.
+            window_seconds (int): Seconds after the last occurrence during which
+                incidents with the same fingerprint are treated as duplicates.
+            org_id (str): Organization the Events are recorded for.
+        """
+        self.client = prisma_client
+        self.queue = queue
+        self.window_seconds = window_seconds
+        self.org_id = org_id
+        # Per-key locks with the number of requests holding or waiting on them
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    def extract_hosts(self, text: str) -> List[str]:
+        """
+        Returns the sorted, de-duplicated host references found in a text.
+        """
+        text = text.lower()
+        hosts = set()
+        for pattern in HOST_PATTERNS:
+            for match in pattern.finditer(text):
+                host = match.group(match.lastindex or 0)
+                if any(char.isdigit() for char in host) or "." in host:
+                    hosts.add(host)
+        return sorted(hosts)
+
+    def normalize(self, text: str, hosts: List[str]) -> str:
+        """
+        Returns the description with hosts, ids, timestamps and numbers masked.
+        """
+        text = text.lower()
+        # Longest first so a host is not partially masked by a shorter one
+        for host in sorted(hosts, key=len, reverse=True):
+            text = text.replace(host, "<host>")
+        for pattern, replacement in VOLATILE_PATTERNS:
+            text = pattern.sub(replacement, text)
+        text = re.sub(r"[^\w<>]+", " ", text)
+        return " ".join(text.split())
+
+    def fingerprint(self, description: str) -> str:
+        """
+        Returns the correlation key of an incident description.
+        """
+        hosts = self.extract_hosts(description)
+        content = f"{self.normalize(description, hosts)}\x00{','.join(hosts)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    async def submit(
+        self,
+        sys_id: str,
+        description: str,
+        severity: str,
+        payload: dict,
+    ) -> CorrelationResult:
+        """
+        Correlates an incident and queues it unless it duplicates a recent one.
+
+        Args:
+            sys_id (str): The ServiceNow sys_id of the incident.
+            description (str): The incident description used for the fingerprint.
+            severity (str): The incident severity.
+            payload (dict): The webhook payload queued for processing.
+
+        Returns:
+            CorrelationResult: The correlation key, Event and job of the incident.
+        """
+        correlation_key = self.fingerprint(description)
+        lock, users = self._locks.get(correlation_key, (asyncio.Lock(), 0))
+        self._locks[correlation_key] = (lock, users + 1)
+        try:
+            async with lock:
+                # The advisory lock serialises the same key across API processes
+                async with self.client.tx(timeout=timedelta(seconds=30)) as tx:
+                    await tx.query_raw(
+                        "SELECT 1 FROM (SELECT pg_advisory_xact_lock(hashtext($1))) AS l",
+                        correlation_key,
+                    )
+                    return await self._correlate(
+                        tx, correlation_key, sys_id, description, severity, payload
+                    )
+        finally:
+            lock, users = self._locks[correlation_key]
+            if users == 1:
+                del self._locks[correlation_key]
+            else:
+                self._locks[correlation_key] = (lock, users - 1)
+
+    async def _correlate(
+        self,
+        tx: Prisma,
+        correlation_key: str,
+        sys_id: str,
+        description: str,
+        severity: str,
+        payload: dict,
+    ) -> CorrelationResult:
+        now = datetime.now(timezone.utc)
+        event = await tx.event.find_first(
+            where={
+                "correlation_key": correlation_key,
+                "last_occurrence_time": {
+                    "gte": now - timedelta(seconds=self.window_seconds)
+                },
+            },
+            order={"last_occurrence_time": "desc"},
+        )
+
+        if event is None:
+            hosts = self.extract_hosts(description)
+            event = await tx.event.create(
+                data={
+                    "org_id": self.org_id,
+                    "description": description,
+                    "manager": "servicenow",
+                    "metric_type": "incident",
+                    "severity": severity,
+                    "created_at": now,
+                    "hostname": ",".join(hosts),
+                    "service": "servicenow",
+                    "correlation_key": correlation_key,
+                    "occurrence_count": 1,
+                    "first_occurrence_time": now,
+                    "last_occurrence_time": now,
+                }
+            )
+        else:
+            event = await tx.event.update(
+                where={"id": event.id},
+                data={
+                    "occurrence_count": {"increment": 1},
+                    "last_occurrence_time": now,
+                },
+            )
+            job = await self.queue.get_latest_by_correlation_key(correlation_key, tx=tx)
+            # Only an action that is still queued or running is joined. Once it
+            # finished, or was dead-lettered, the new incident gets its own action.
+            if (
+                job is not None
+                and job.status
+                in (IncidentJobStatus.QUEUED.value, IncidentJobStatus.LEASED.value)
+                and await self.queue.fold(job, sys_id, tx=tx)
+            ):
+                logger.info(
+                    f"Incident {sys_id} folded into job {job.id} "
+                    f"(occurrence {event.occurrence_count})"
+                )
+                return CorrelationResult(
+                    correlation_key=correlation_key,
+                    event_id=event.id,
+                    occurrence_count=event.occurrence_count,
+                    duplicate=True,
+                    job=job,
+                )
+
+        job = await self.queue.enqueue(sys_id, payload, correlation_key, tx=tx)
+        return CorrelationResult(
+            correlation_key=correlation_key,
+            event_id=event.id,
+            occurrence_count=event.occurrence_count,
+            duplicate=False,
+            job=job,
+        )
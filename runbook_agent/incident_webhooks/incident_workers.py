@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from runbook_agent.repository.incident_jobs.incident_job_service import (
+    IncidentJobQueue,
+)
+from runbook_agent.repository.incident_jobs.models import IncidentJobModel
+from runbook_agent.llms.gateway import LLMPriority, llm_priority
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+
+class JobProgress:
+    """
+    Side effects a job already caused, kept on the job so that a retry resumes
+    from them instead of causing them again, e.g. triggering a runbook twice.
+
+    Progress is a JSON object and only the worker holding the lease writes it.
+    """
+
+    def __init__(self, queue: IncidentJobQueue, job: IncidentJobModel, worker_id: str):
+        self.queue = queue
+        self.job = job
+        self.worker_id = worker_id
+        self.data: Dict[str, Any] = dict(job.progress or {})
+        # Writes replace the whole object, they must not overtake each other
+        self._lock = asyncio.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def entity(self, entity: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns what was recorded for an entity (VM) of the job, if anything.
+        """
+        return self.data.get("entities", {}).get(entity)
+
+    async def record(self, key: str, value: Any):
+        """
+        Records a step of the job before its outcome is acted on.
+        """
+        async with self._lock:
+            self.data[key] = value
+            await self._save()
+
+    async def record_entity(self, entity: str, value: Dict[str, Any]):
+        """
+        Records the action submitted for an entity (VM) of the job.
+        """
+        async with self._lock:
+            self.data.setdefault("entities", {})[entity] = value
+            await self._save()
+
+    async def _save(self):
+        if not await self.queue.save_progress(self.job, self.worker_id, self.data):
+            logger.warning(
+                f"Worker {self.worker_id} lost the lease on {self.job.id}, "
+                "progress not saved"
+            )
+
+
+class IncidentWorkerPool:
+    """
+    Pool of worker coroutines draining the incident queue.
+
+    Each worker leases one job at a time, so the number of incidents processed
+    concurrently by this process is bounded by the pool size no matter how many
+    webhooks arrive. Throughput scales by raising the pool size or by running
+    more processes against the same database.
+    """
+
+    def __init__(
+        self,
+        queue: IncidentJobQueue,
+        handler: Callable[[Dict[str, Any], JobProgress], Awaitable[Any]],
+        workers: int = cfg.incident_queue.workers,
+        poll_interval: float = cfg.incident_queue.poll_interval,
+        on_complete: Optional[Callable[[IncidentJobModel, Any], Awaitable[Any]]] = None,
+    ):
+        """
+        Initialize the worker pool.
+
+        Args:
+            queue (IncidentJobQueue): Queue to lease jobs from.
+            handler (Callable): Coroutine function processing a job payload, given
+                the progress recorded by earlier attempts of the job.
+            workers (int): Number of worker coroutines.
+            poll_interval (float): Seconds an idle worker waits before polling again.
+            on_complete (Callable, optional): Coroutine function called with the
+                completed job, as stored after completion, and the result of the
+                handler.
+        """
+        self.queue = queue
+        self.handler = handler
+        self.on_complete = on_complete
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._worker_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """
+        Starts the worker coroutines on the running event loop.
+        """
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(f"{self._worker_prefix}-{index}"))
+            for index in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} incident workers")
+
+    async def stop(self):
+        """
+        Stops the worker coroutines. Jobs in progress are picked up again once
+        their lease expires.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """
+        Wakes up idle workers, used after enqueueing from this process.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self, worker_id: str):
+        while True:
+            try:
+                job = await self.queue.lease(worker_id)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} could not lease a job: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job, worker_id)
+
+    async def _process(self, job: IncidentJobModel, worker_id: str):
+        # A job whose worker kept dying is taken over with its attempts exhausted
+        if job.attempts > job.max_attempts:
+            await self.queue.fail(job, job.last_error or "Lease expired", worker_id)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job, worker_id))
+        try:
+            # Incident LLM calls are admitted ahead of background indexing
+            with llm_priority(LLMPriority.INCIDENT):
+                result = await self.handler(
+                    job.payload, JobProgress(self.queue, job, worker_id)
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Incident job {job.id} failed")
+            await self.queue.fail(job, f"{type(e).__name__}: {str(e)}", worker_id)
+            return
+        finally:
+            heartbeat.cancel()
+
+        if not await self.queue.complete(job, worker_id):
+            return
+        if self.on_complete is not None:
+            # Re-read once completed, no incident can be folded into it any more
+            completed = await self.queue.get_status(job.id)
+            try:
+                await self.on_complete(completed, result)
+            except Exception:
+                logger.exception(f"Completion hook of incident job {job.id} failed")
+
+    async def _heartbeat(self, job: IncidentJobModel, worker_id: str):
+        # Renew the lease well before it expires so long runbook jobs keep it
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.queue.extend_lease(job, worker_id):
+                    logger.warning(f"Worker {worker_id} lost the lease on {job.id}")
+                    return
+            except Exception as e:
+                logger.error(f"Could not extend lease on job {job.id}: {str(e)}")
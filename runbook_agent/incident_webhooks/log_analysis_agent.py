@@ -2,11 +2,74 @@ from pydantic import BaseModel, Field
 import sys
 
 sys.path.append("/Users/akhileshjain/Documents/FuturePath/incident_agent")
-from runbook_agent.llms.open_ai import chat_completion_request_instructor
-from typing import List
+from runbook_agent.llms.open_ai import async_chat_completion_request_instructor
+from runbook_agent.config import init_config
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import httpx
+import re
 import requests
 import time
 
+cfg = init_config()
+
+# Fast pre-filter, only windows around lines matching one of these reach the LLM
+SIGNAL_PATTERNS: Dict[str, re.Pattern] = {
+    "cpu": re.compile(
+        r"\bcpu\b|load average|high load|throttl|hung thread|stuck thread|"
+        r"blocked thread|thread starvation|100%",
+        re.IGNORECASE,
+    ),
+    "disk": re.compile(
+        r"no space left|disk (?:full|usage|quota)|file ?system.*full|enospc|"
+        r"insufficient (?:disk|storage)|quota exceeded|inode",
+        re.IGNORECASE,
+    ),
+    "oom": re.compile(
+        r"outofmemoryerror|out of memory|oom[- ]?kill|killed process|"
+        r"java heap space|metaspace|unable to create new native thread|"
+        r"cannot allocate memory",
+        re.IGNORECASE,
+    ),
+    "gc": re.compile(
+        r"\bgc\b|garbage collect|full gc|gc overhead|allocation failure|"
+        r"concurrent mode failure|pause time|<af\b|\baf\[",
+        re.IGNORECASE,
+    ),
+}
+
+log_analysis_prompt = """
+You are a log analysis expert. You are given excerpts of machine logs, each line prefixed with its line number. The excerpts were selected because they mention {categories}. Your goal is to identify log lines that could potentially explain the following issues:
+1. The machine is experiencing high CPU usage.
+2. The machine is running low on disk space.
+3. The process is running out of memory.
+4. The JVM is spending excessive time in garbage collection.
+
+if an issue is not found, ignore it from mentioning in the response.
+
+Your steps should be:
+- Skim through each provided log line.
+- Identify any log entries that indicate or suggest one of the issues above (e.g., warnings or errors mentioning CPU load, out-of-space errors, OutOfMemoryError, long or frequent GC pauses).
+- From the logs you identify, extract and return the lines, with their line numbers, that would help analyze the cause of these issues.
+- Provide a summarized explanation of why these logs might explain the potential issue.
+- If no relevant logs are found, return None.
+
+Here are the logs:
+{logs}
+"""
+
+reduce_prompt = """
+You are a log analysis expert. Several excerpts of the same log were analysed separately and produced the potential issues below. Merge them into a final list:
+- Combine entries that describe the same underlying issue, keeping the most relevant log lines of each.
+- Order the issues from the most to the least likely root cause.
+- Do not invent issues or log lines that are not present below.
+
+Potential issues:
+{issues}
+"""
+
 
 class IssueResponse(BaseModel):
     potential_issue: str = Field(
@@ -28,6 +91,30 @@ class LogAnalysisResponse(BaseModel):
 
 
 class LogAnalysisAgent:
+    def __init__(
+        self,
+        model: str = cfg.log_analysis.model,
+        concurrency: int = cfg.log_analysis.concurrency,
+        context_lines: int = cfg.log_analysis.context_lines,
+        max_chunks: int = cfg.log_analysis.max_chunks,
+        max_line_length: int = cfg.log_analysis.max_line_length,
+    ):
+        """
+        Initialize the log analysis agent.
+
+        Args:
+            model (str): The model used to analyse log excerpts.
+            concurrency (int): Maximum number of excerpts analysed at the same time.
+            context_lines (int): Lines kept before and after every matching line.
+            max_chunks (int): Maximum number of excerpts sent to the model per log.
+            max_line_length (int): Lines longer than this are truncated.
+        """
+        self.model = model
+        self.concurrency = concurrency
+        self.context_lines = context_lines
+        self.max_chunks = max_chunks
+        self.max_line_length = max_line_length
+
     def preprocess_logs(self, logs: str, chunk_size: int) -> List[str]:
         log_lines = logs.split("\n")
         log_chunks = [
@@ -46,42 +133,188 @@ class LogAnalysisAgent:
             print("Log Items: ", issue.log_items)
             print("Insights: ", issue.insights)
 
-    def analyse_logs(
+    async def stream_log_lines(self, log_file_path: str) -> AsyncIterator[str]:
+        """
+        Yields the lines of a remote log as they are downloaded.
+        """
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30, read=300)) as client:
+            async with client.stream("GET", log_file_path) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    yield line
+
+    async def select_windows(
+        self, lines: AsyncIterator[str], chunk_size: int
+    ) -> AsyncIterator[Tuple[List[str], List[str]]]:
+        """
+        Filters a stream of log lines down to windows around matching lines.
+
+        Overlapping windows are merged and packed into chunks. A chunk is cut once
+        it holds `chunk_size` lines and the current window has ended, or at
+        `2 * chunk_size` lines while a window keeps matching. Only the context
+        window and the chunk being filled are held in memory, whatever the size
+        of the log.
+
+        Yields:
+            Tuple[List[str], List[str]]: The numbered lines of a chunk and the
+                signal categories it matched.
+        """
+        before = deque(maxlen=self.context_lines)
+        chunk: List[str] = []
+        categories = set()
+        remaining_after = 0
+        line_number = 0
+        last_kept = 0
+
+        def keep(number: int, text: str):
+            nonlocal last_kept
+            # Mark gaps so the model does not read separate windows as one sequence
+            if chunk and number != last_kept + 1:
+                chunk.append("...")
+            chunk.append(text)
+            last_kept = number
+
+        async for line in lines:
+            line_number += 1
+            line = line.rstrip("\r")[: self.max_line_length]
+            numbered = (line_number, f"L{line_number}: {line}")
+            matched = [
+                category
+                for category, pattern in SIGNAL_PATTERNS.items()
+                if pattern.search(line)
+            ]
+
+            if matched:
+                for number, text in before:
+                    keep(number, text)
+                before.clear()
+                keep(*numbered)
+                categories.update(matched)
+                remaining_after = self.context_lines
+            elif remaining_after > 0:
+                keep(*numbered)
+                remaining_after -= 1
+            else:
+                before.append(numbered)
+
+            # Prefer cutting between windows so excerpts keep their context, but
+            # never let a run of matching lines grow a chunk without bound
+            if len(chunk) >= chunk_size and (
+                remaining_after == 0 or len(chunk) >= 2 * chunk_size
+            ):
+                yield chunk, sorted(categories)
+                chunk, categories = [], set()
+
+        if chunk:
+            yield chunk, sorted(categories)
+
+    async def analyse_chunk(
+        self, chunk: List[str], categories: List[str]
+    ) -> Optional[LogAnalysisResponse]:
+        """
+        Asks the model for potential issues in one chunk of log excerpts.
+        """
+        prompt = log_analysis_prompt.format(
+            categories=", ".join(categories), logs="\n".join(chunk)
+        )
+        return await async_chat_completion_request_instructor(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_model=LogAnalysisResponse,
+        )
+
+    async def reduce_issues(self, issues: List[IssueResponse]) -> LogAnalysisResponse:
+        """
+        Merges the issues found in separate chunks into one response.
+        """
+        # Drop exact repeats before spending tokens on the merge
+        unique: Dict[Tuple[str, str], IssueResponse] = {}
+        for issue in issues:
+            unique.setdefault(
+                (issue.potential_issue.strip().lower(), issue.log_items.strip()), issue
+            )
+        issues = list(unique.values())
+        if len(issues) <= 1:
+            return LogAnalysisResponse(issues=issues or None)
+
+        formatted = "\n\n".join(
+            f"Potential Issue: {issue.potential_issue}\n"
+            f"Log Items: {issue.log_items}\n"
+            f"Insights: {issue.insights}"
+            for issue in issues
+        )
+        response = await async_chat_completion_request_instructor(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": reduce_prompt.format(issues=formatted)}
+            ],
+            response_model=LogAnalysisResponse,
+        )
+        if response is None or not response.issues:
+            return LogAnalysisResponse(issues=issues)
+        return response
+
+    async def async_analyse_logs(
         self, log_file_path: str, chunk_size: int = 1000
-    ) -> LogAnalysisResponse:
-        start_time = time.time()
-        logs_content = self.load_log_weblink(log_file_path)
-        end_time = time.time()
-        print(f"Time taken to load log weblink: {end_time - start_time} seconds")
+    ) -> Optional[LogAnalysisResponse]:
+        """
+        Streams a log, analyses the excerpts matching known signals concurrently
+        and merges the findings.
+
+        Args:
+            log_file_path (str): URL of the log.
+            chunk_size (int): Number of log lines after which a chunk is sent to the
+                model once its current window ends. A chunk never exceeds twice
+                this size.
+
+        Returns:
+            Optional[LogAnalysisResponse]: The merged issues, or None if none were found.
+        """
         start_time = time.time()
-        numbered_logs = self.preprocess_logs(logs_content, chunk_size)
-        end_time = time.time()
-        print(f"Time taken to preprocess logs: {end_time - start_time} seconds")
-        for idx, each_log in enumerate(numbered_logs):
-            print(f"processing {idx} of {len(numbered_logs)}")
-            prompt = f"""
-            You are a log analysis expert. You are given a list of machine logs. Your goal is to identify log lines that could potentially explain the following issues:
-            1. The machine is experiencing high CPU usage.
-            2. The machine is running low on disk space.
-
-            if an issue is not found, ignore it from mentioning in the response.
-
-            Your steps should be:
-            - Skim through each provided log line.
-            - Identify any log entries that indicate or suggest high CPU usage (e.g., warnings or errors mentioning CPU load, processes using excessive CPU time, CPU temperature warnings).
-            - Identify any log entries that indicate or suggest low disk space (e.g., disk usage threshold exceeded, out-of-space errors, failed writes due to insufficient storage).
-            - From the logs you identify, extract and return the lines that would help analyze the cause of these issues.
-            - Provide a summarized explanation of why these logs might explain the potential issue.
-            - If no relevant logs (i.e., no errors or warnings related to CPU or disk issues) are found, return None.
-
-            Here are the logs:
-            {each_log}
-            """
-            response = chat_completion_request_instructor(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt.format(logs=each_log)}],
-                response_model=LogAnalysisResponse,
-            )
-            if response.issues:
-                return response
-        return None
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = []
+
+        async def analyse(chunk, categories):
+            async with semaphore:
+                try:
+                    return await self.analyse_chunk(chunk, categories)
+                except Exception as e:
+                    print(f"Error analysing log chunk: {e}")
+                    return None
+
+        # Closed explicitly so stopping early releases the download right away
+        lines = self.stream_log_lines(log_file_path)
+        async with aclosing(lines), aclosing(
+            self.select_windows(lines, chunk_size)
+        ) as windows:
+            async for chunk, categories in windows:
+                if len(tasks) >= self.max_chunks:
+                    print(f"Reached {self.max_chunks} log chunks, skipping the rest")
+                    break
+                tasks.append(asyncio.create_task(analyse(chunk, categories)))
+                # Stop reading ahead while the model is busy so memory stays bounded
+                while sum(not task.done() for task in tasks) >= self.concurrency * 2:
+                    await asyncio.wait(
+                        [task for task in tasks if not task.done()],
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+
+        responses = await asyncio.gather(*tasks)
+        print(f"Analysed {len(tasks)} log chunks in {time.time() - start_time} seconds")
+        issues = [
+            issue
+            for response in responses
+            if response is not None and response.issues
+            for issue in response.issues
+        ]
+        if not issues:
+            return None
+        return await self.reduce_issues(issues)
+
+    def analyse_logs(
+        self, log_file_path: str, chunk_size: int = 1000
+    ) -> Optional[LogAnalysisResponse]:
+        """
+        Blocking variant of `async_analyse_logs`.
+        """
+        return asyncio.run(self.async_analyse_logs(log_file_path, chunk_size))
@@ -1,4 +1,5 @@
 import logging
+from typing import List
 from runbook_agent.embedding_provider.base_embedding_provider import (
     BaseEmbeddingProvider,
 )
@@ -6,8 +7,11 @@ from runbook_agent.repository.vector_store.vector_store_service import (
     VectorStoreService,
 )
 from runbook_agent.repository.vector_store.schemas import VectorTable
+from runbook_agent.indexing_service.models import TextDocument
+from runbook_agent.config import init_config
 
 # Initialize configuration and logger
+cfg = init_config()
 logging = logging.getLogger(__name__)
 
 
@@ -16,6 +20,7 @@ class IndexingEngine:
         self,
         embedding_provider: BaseEmbeddingProvider,  # The embedding provider instance
         vector_store: VectorStoreService,  # The vector store instance
+        write_batch_size: int = cfg.indexing.write_batch_size,
     ):
         """
         Initialize the indexing engine with the provided embedding provider and vector store.
@@ -23,9 +28,11 @@ class IndexingEngine:
         Args:
             embedding_provider (BaseEmbeddingRepository): The embedding provider instance.
             vector_store (VectorStoreService): The vector store instance (Faiss, Qdrant, etc.).
+            write_batch_size (int): Maximum number of rows written to the vector store in one commit.
         """
         self.embedding_provider = embedding_provider
         self.vector_store = vector_store
+        self.write_batch_size = write_batch_size
 
     def insert_text_to_vector_store(
         self, doc_id: str, file_name: str, label: str, text: str
@@ -52,7 +59,47 @@ class IndexingEngine:
                 page_label=label,
             )
 
-            # Insert the vector into the vector store
-            self.vector_store.insert_vectors([vector_doc])
+            # Replace any previous version of the document
+            self.vector_store.upsert_vectors([vector_doc])
         except Exception as e:
             raise e
+
+    def insert_texts_to_vector_store(self, docs: List[TextDocument]) -> int:
+        """
+        Insert many texts into the vector store.
+
+        Texts are embedded through the provider's batch API and written in batches of
+        `write_batch_size` rows, with a single upsert per batch, so a full reindex costs
+        a handful of commits instead of one per document.
+
+        Args:
+            docs (List[TextDocument]): The documents to be inserted.
+
+        Returns:
+            int: The number of documents written.
+        """
+        written = 0
+        for start in range(0, len(docs), self.write_batch_size):
+            batch = docs[start : start + self.write_batch_size]
+            embeddings = self.embedding_provider.get_text_embedding_batch(
+                [doc.text for doc in batch]
+            )
+            vector_docs = [
+                VectorTable(
+                    doc_id=doc.doc_id,
+                    vector=embedding,
+                    text=doc.text,
+                    file_name=doc.file_name,
+                    page_label=doc.label,
+                    source=doc.source,
+                    runbook_type=doc.runbook_type,
+                    os_supported=VectorTable.format_os_supported(doc.os_supported),
+                )
+                for doc, embedding in zip(batch, embeddings)
+            ]
+
+            # Replace any previous version of the documents in the same commit
+            self.vector_store.upsert_vectors(vector_docs)
+            written += len(vector_docs)
+            logging.info(f"Wrote {written}/{len(docs)} documents to the vector store")
+        return written
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Iterable, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import asyncpg
+from runbook_agent.clients.prisma import get_prisma_client
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Connection string parameters understood by Prisma but rejected by asyncpg
+PRISMA_URL_PARAMS = {"schema", "connection_limit", "pool_timeout", "pgbouncer"}
+
+
+class IndexingNotifier:
+    """
+    Wakes the runbook indexer as soon as runbooks need indexing.
+
+    Producers in this process (the publish webhook, the startup sync) call
+    `notify` with the ids of the runbooks to index, or with no ids when only a
+    full scan for unindexed runbooks will find them. `publish` also sends a
+    Postgres NOTIFY so the indexers of other replicas wake up, which `listen`
+    receives when asyncpg is installed.
+
+    The indexer waits with a timeout, and a timeout means a reconciliation sweep
+    is due, which catches anything a lost notification missed.
+    """
+
+    def __init__(
+        self,
+        channel: str = cfg.indexing_notifier.channel,
+        database_url: Optional[str] = cfg.indexing_notifier.database_url,
+        cross_replica: bool = cfg.indexing_notifier.cross_replica,
+    ):
+        """
+        Initialize the notifier.
+
+        Args:
+            channel (str): Postgres channel the notifications are sent on.
+            database_url (str, optional): Database listened on for notifications
+                from other replicas.
+            cross_replica (bool): Send and receive notifications through Postgres.
+        """
+        self.channel = channel
+        self.database_url = database_url
+        self.cross_replica = cross_replica
+        self._sender_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._pending_ids: Set[str] = set()
+        self._scan_requested = False
+        self._event: Optional[asyncio.Event] = None
+
+    @property
+    def event(self) -> asyncio.Event:
+        # Created lazily so it binds to the running event loop
+        if self._event is None:
+            self._event = asyncio.Event()
+        return self._event
+
+    def notify(self, runbook_ids: Optional[Iterable[str]] = None):
+        """
+        Wakes the indexer of this process.
+
+        Args:
+            runbook_ids (Iterable[str], optional): Runbooks to index. When not
+                given the indexer scans for every unindexed runbook.
+        """
+        if runbook_ids is None:
+            self._scan_requested = True
+        else:
+            self._pending_ids.update(runbook_ids)
+        self.event.set()
+
+    async def publish(self, runbook_ids: Optional[Iterable[str]] = None):
+        """
+        Wakes the indexer of this process and, through Postgres, of every replica.
+
+        Args:
+            runbook_ids (Iterable[str], optional): Runbooks to index. When not
+                given the indexers scan for every unindexed runbook.
+        """
+        runbook_ids = list(runbook_ids) if runbook_ids is not None else None
+        self.notify(runbook_ids)
+        if not self.cross_replica:
+            return
+        payload = json.dumps({"sender": self._sender_id, "ids": runbook_ids})
+        try:
+            await get_prisma_client().query_raw(
+                "SELECT pg_notify($1, $2)", self.channel, payload
+            )
+        except Exception as e:
+            # The reconciliation sweep of the other replicas still picks it up
+            logger.warning(f"Unable to notify other indexers: {str(e)}")
+
+    async def wait(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Waits for runbooks to index.
+
+        Args:
+            timeout (float): Seconds to wait before a reconciliation sweep is due.
+
+        Returns:
+            Optional[Set[str]]: The ids of the runbooks to index, or None when every
+                unindexed runbook should be scanned for.
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.event.clear()
+        runbook_ids, self._pending_ids = self._pending_ids, set()
+        if self._scan_requested:
+            self._scan_requested = False
+            return None
+        return runbook_ids
+
+    async def listen(self):
+        """
+        Relays the notifications of other replicas to this process until cancelled,
+        reconnecting when the connection drops.
+        """
+        if not self.cross_replica:
+            logger.info("Cross-replica indexing notifications are disabled")
+            return
+        if not self.database_url:
+            logger.warning(
+                "Cross-replica indexing notifications are enabled but no database "
+                "url is configured, other replicas' runbooks wait for the next scan"
+            )
+            return
+
+        def on_notification(connection, pid, channel, payload):
+            try:
+                message = json.loads(payload)
+            except json.JSONDecodeError:
+                return
+            if message.get("sender") != self._sender_id:
+                self.notify(message.get("ids"))
+
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._asyncpg_dsn())
+                await connection.add_listener(self.channel, on_notification)
+                logger.info(f"Listening for indexing notifications on {self.channel}")
+                if reconnecting:
+                    # Anything published while disconnected is only seen by a scan
+                    self.notify()
+                reconnecting = True
+                while not connection.is_closed():
+                    await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Indexing notification listener failed: {str(e)}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(5)
+
+    def _asyncpg_dsn(self) -> str:
+        parts = urlsplit(self.database_url)
+        query = [
+            (key, value)
+            for key, value in parse_qsl(parts.query)
+            if key not in PRISMA_URL_PARAMS
+        ]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+# Singleton instance of the indexing notifier
+_indexing_notifier = None
+
+
+def get_indexing_notifier() -> IndexingNotifier:
+    """
+    Returns the shared indexing notifier, creating it on first use.
+    """
+    global _indexing_notifier
+    if _indexing_notifier is None:
+        _indexing_notifier = IndexingNotifier()
+    return _indexing_notifier
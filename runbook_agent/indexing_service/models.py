@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class TextDocument(BaseModel):
+    """
+    A text to be embedded and written to the vector store.
+    """
+
+    doc_id: str
+    file_name: str
+    text: str
+    label: Optional[str] = ""
+    source: Optional[str] = None
+    runbook_type: Optional[str] = None
+    os_supported: Optional[List[str]] = None
@@ -0,0 +1,557 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import heapq
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from pydantic import BaseModel
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Longest a waiter sleeps before checking the limits again on its own, in case
+# a wake-up was missed
+MAX_WAIT_SLICE = 1.0
+
+# Result handed to coalesced callers when the call they joined was cancelled
+_ABANDONED = object()
+
+
+class LLMPriority(IntEnum):
+    """
+    Order in which waiting LLM calls are admitted, lowest first.
+    """
+
+    INCIDENT = 0
+    DEFAULT = 1
+    BACKGROUND = 2
+
+
+_current_priority: contextvars.ContextVar[LLMPriority] = contextvars.ContextVar(
+    "llm_priority", default=LLMPriority.DEFAULT
+)
+
+
+@contextmanager
+def llm_priority(priority: LLMPriority):
+    """
+    Sets the priority of the LLM calls made inside the block, including the
+    ones made from tasks and threads started inside it.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_llm_priority() -> LLMPriority:
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens a minute, holding
+    at most a minute's worth. Not thread safe, the owning limiter locks it.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Returns the seconds until `amount` tokens are available.
+        """
+        self._refill()
+        # A request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+    wake: Callable[[], None] = field(compare=False)
+
+
+class ModelLimiter:
+    """
+    Client-side limits of one provider and model: requests a minute, tokens a
+    minute and calls in flight.
+
+    Waiting calls are admitted strictly in priority order, first come first
+    served within a priority, so background work never overtakes an incident.
+    Sync callers block their thread and async callers await, both share the
+    same queue.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int, max_concurrency: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            name (str): Provider and model the limits apply to.
+            rpm (int): Requests allowed a minute.
+            tpm (int): Tokens allowed a minute.
+            max_concurrency (int): Calls allowed in flight at once.
+        """
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        # Sequence numbers of the waiters already counted as throttled
+        self._throttled = set()
+        self._lock = threading.Lock()
+        self._counters = {"admitted": 0, "throttled": 0, "rate_limited": 0}
+
+    def acquire(self, tokens: int, priority: LLMPriority):
+        """
+        Blocks until a call of `tokens` estimated tokens may start.
+        """
+        event = threading.Event()
+        waiter = self._enqueue(tokens, priority, event.set)
+        while True:
+            event.clear()
+            wait = self._try_admit(waiter)
+            if wait is None:
+                return
+            event.wait(min(wait, MAX_WAIT_SLICE))
+
+    async def async_acquire(self, tokens: int, priority: LLMPriority):
+        """
+        Waits until a call of `tokens` estimated tokens may start.
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(
+            tokens, priority, lambda: loop.call_soon_threadsafe(event.set)
+        )
+        try:
+            while True:
+                event.clear()
+                wait = self._try_admit(waiter)
+                if wait is None:
+                    return
+                try:
+                    await asyncio.wait_for(
+                        event.wait(), timeout=min(wait, MAX_WAIT_SLICE)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            self._cancel(waiter)
+            raise
+
+    def release(self, estimated_tokens: int, used_tokens: Optional[int] = None):
+        """
+        Ends a call, settling its token estimate against the actual usage.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if used_tokens is not None:
+                if used_tokens < estimated_tokens:
+                    self.tokens.give_back(estimated_tokens - used_tokens)
+                else:
+                    self.tokens.take(used_tokens - estimated_tokens)
+            self._wake_head()
+
+    def pause(self, seconds: float):
+        """
+        Holds every waiting call back after the provider answered with a 429.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._counters["rate_limited"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = self._in_flight
+            stats["waiting"] = len(self._waiters)
+            stats["available_requests"] = int(self.requests.available)
+            stats["available_tokens"] = int(self.tokens.available)
+            return stats
+
+    def _enqueue(
+        self, tokens: int, priority: LLMPriority, wake: Callable[[], None]
+    ) -> _Waiter:
+        waiter = _Waiter(int(priority), next(self._sequence), tokens, wake)
+        with self._lock:
+            heapq.heappush(self._waiters, waiter)
+        return waiter
+
+    def _try_admit(self, waiter: _Waiter) -> Optional[float]:
+        # Returns None once the waiter is admitted, else how long to wait
+        with self._lock:
+            if self._waiters[0] is not waiter:
+                return MAX_WAIT_SLICE
+            wait = self._paused_until - time.monotonic()
+            if wait > 0:
+                return wait
+            if self._in_flight >= self.max_concurrency:
+                return MAX_WAIT_SLICE
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens))
+            if wait > 0:
+                if waiter.sequence not in self._throttled:
+                    self._throttled.add(waiter.sequence)
+                    self._counters["throttled"] += 1
+                return wait
+            self._throttled.discard(waiter.sequence)
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            heapq.heappop(self._waiters)
+            self._wake_head()
+            return None
+
+    def _cancel(self, waiter: _Waiter):
+        with self._lock:
+            self._throttled.discard(waiter.sequence)
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._wake_head()
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0].wake()
+
+
+class LLMGateway:
+    """
+    Single entry point of every LLM call.
+
+    Each call waits for the client-side limits of its provider and model
+    (`ModelLimiter`), so parallel incidents and the indexer share the provider's
+    rate limits instead of all receiving 429s and sleeping blindly. A 429 that
+    still gets through pauses that model for every caller, for as long as the
+    provider's Retry-After asks.
+
+    Identical calls already in flight are coalesced, the later callers receive
+    the result of the first one. When the first caller is cancelled, the others
+    make the call again instead of being cancelled with it.
+    """
+
+    def __init__(
+        self,
+        default_rpm: int = cfg.llm_gateway.rpm,
+        default_tpm: int = cfg.llm_gateway.tpm,
+        default_max_concurrency: int = cfg.llm_gateway.max_concurrency,
+        model_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_rate_limit_retries: int = cfg.llm_gateway.max_rate_limit_retries,
+        rate_limit_backoff: float = cfg.llm_gateway.rate_limit_backoff,
+        coalesce: bool = cfg.llm_gateway.coalesce,
+    ):
+        """
+        Initialize the gateway.
+
+        Args:
+            default_rpm (int): Requests a minute of a model without its own limits.
+            default_tpm (int): Tokens a minute of a model without its own limits.
+            default_max_concurrency (int): Calls in flight of a model without its own limits.
+            model_limits (Dict[str, Dict[str, int]], optional): Limits by
+                "provider:model", with any of "rpm", "tpm" and "max_concurrency".
+            max_rate_limit_retries (int): Retries of a call answered with a 429.
+            rate_limit_backoff (float): Seconds a model is paused after a 429
+                without Retry-After.
+            coalesce (bool): Share the result of identical in-flight calls.
+        """
+        self.default_limits = {
+            "rpm": default_rpm,
+            "tpm": default_tpm,
+            "max_concurrency": default_max_concurrency,
+        }
+        self.model_limits = (
+            model_limits if model_limits is not None else cfg.llm_gateway.model_limits
+        )
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.rate_limit_backoff = rate_limit_backoff
+        self.coalesce = coalesce
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._in_flight: Dict[str, concurrent.futures.Future] = {}
+        self._async_in_flight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    def limiter(self, provider: str, model: str) -> ModelLimiter:
+        """
+        Returns the limiter of a provider and model, creating it on first use.
+        """
+        name = f"{provider}:{model}"
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limits = {**self.default_limits, **self.model_limits.get(name, {})}
+                limiter = ModelLimiter(name, **limits)
+                self._limiters[name] = limiter
+            return limiter
+
+    def call(
+        self,
+        provider: str,
+        model: str,
+        messages,
+        request: Callable[[], Any],
+        max_tokens: Optional[int] = None,
+        request_key: Optional[Dict[str, Any]] = None,
+        priority: Optional[LLMPriority] = None,
+    ) -> Any:
+        """
+        Performs a blocking LLM call through the limits of its model.
+
+        Args:
+            provider (str): Provider of the model.
+            model (str): Model called.
+            messages: Prompt messages, used to estimate the tokens of the call.
+            request (Callable): Performs the call.
+            max_tokens (int, optional): Completion tokens the call may use.
+            request_key (Dict[str, Any], optional): Everything that makes the call
+                unique. Identical in-flight calls are coalesced when given.
+            priority (LLMPriority, optional): Defaults to the priority of the
+                current context.
+
+        Returns:
+            Any: The result of `request`.
+        """
+        key = self._coalesce_key(provider, model, messages, request_key)
+        if key is None:
+            return self._call(provider, model, messages, request, max_tokens, priority)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+            else:
+                self._coalesced += 1
+        if not leader:
+            return self._copy(future.result())
+
+        try:
+            result = self._call(
+                provider, model, messages, request, max_tokens, priority
+            )
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    async def async_call(
+        self,
+        provider: str,
+        model: str,
+        messages,
+        request: Callable[[], Awaitable[Any]],
+        max_tokens: Optional[int] = None,
+        request_key: Optional[Dict[str, Any]] = None,
+        priority: Optional[LLMPriority] = None,
+    ) -> Any:
+        """
+        Async version of `call`, `request` is a coroutine function.
+        """
+        key = self._coalesce_key(provider, model, messages, request_key)
+        if key is None:
+            return await self._async_call(
+                provider, model, messages, request, max_tokens, priority
+            )
+
+        # Futures are bound to their loop, calls only coalesce within a loop
+        loop_key = (id(asyncio.get_running_loop()), key)
+        future = self._async_in_flight.get(loop_key)
+        while future is not None:
+            result = await asyncio.shield(future)
+            if result is not _ABANDONED:
+                self._coalesced += 1
+                return self._copy(result)
+            # The caller that made the call was cancelled, this one was not: join
+            # the call another follower made since or make it again
+            future = self._async_in_flight.get(loop_key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_in_flight[loop_key] = future
+        try:
+            result = await self._async_call(
+                provider, model, messages, request, max_tokens, priority
+            )
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # The cancellation is this caller's own, it must not reach the callers
+            # that joined the call
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting on it, don't log it as never retrieved
+            future.exception()
+            raise
+        finally:
+            self._async_in_flight.pop(loop_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters of every model limiter and of coalesced calls.
+        """
+        with self._lock:
+            limiters = list(self._limiters.values())
+            coalesced = self._coalesced
+        return {
+            "coalesced": coalesced,
+            "models": {limiter.name: limiter.stats() for limiter in limiters},
+        }
+
+    def _call(self, provider, model, messages, request, max_tokens, priority):
+        limiter = self.limiter(provider, model)
+        estimate = self.estimate_tokens(messages, max_tokens)
+        priority = current_llm_priority() if priority is None else priority
+        for attempt in range(self.max_rate_limit_retries + 1):
+            limiter.acquire(estimate, priority)
+            used = None
+            try:
+                result = request()
+                used = self._used_tokens(result)
+                return result
+            except Exception as e:
+                if not self._handle_rate_limit(limiter, e, attempt):
+                    raise
+            finally:
+                limiter.release(estimate, used)
+
+    async def _async_call(
+        self, provider, model, messages, request, max_tokens, priority
+    ):
+        limiter = self.limiter(provider, model)
+        estimate = self.estimate_tokens(messages, max_tokens)
+        priority = current_llm_priority() if priority is None else priority
+        for attempt in range(self.max_rate_limit_retries + 1):
+            await limiter.async_acquire(estimate, priority)
+            used = None
+            try:
+                result = await request()
+                used = self._used_tokens(result)
+                return result
+            except Exception as e:
+                if not self._handle_rate_limit(limiter, e, attempt):
+                    raise
+            finally:
+                limiter.release(estimate, used)
+
+    def _handle_rate_limit(
+        self, limiter: ModelLimiter, error: Exception, attempt: int
+    ) -> bool:
+        # Pauses the model and returns True when the call should be retried
+        if getattr(error, "status_code", None) != 429:
+            return False
+        delay = self._retry_after(error) or self.rate_limit_backoff * (2**attempt)
+        limiter.pause(delay)
+        logger.warning(f"{limiter.name} rate limited, pausing for {delay:.1f}s")
+        return attempt < self.max_rate_limit_retries
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            try:
+                return float(headers[header]) * scale
+            except (KeyError, TypeError, ValueError):
+                continue
+        return None
+
+    @staticmethod
+    def estimate_tokens(messages, max_tokens: Optional[int] = None) -> int:
+        """
+        Estimates the tokens a call counts against the tokens-a-minute limit: the
+        prompt at about four characters a token, plus the completion budget.
+        """
+        prompt = json.dumps(messages, default=str)
+        return len(prompt) // 4 + (max_tokens or 0)
+
+    @staticmethod
+    def _used_tokens(result: Any) -> Optional[int]:
+        # Instructor keeps the raw completion on the parsed response
+        raw = getattr(result, "_raw_response", result)
+        usage = getattr(raw, "usage", None)
+        if usage is None:
+            return None
+        total = getattr(usage, "total_tokens", None)
+        if total is None:
+            # Anthropic only reports input and output tokens
+            total = (getattr(usage, "input_tokens", 0) or 0) + (
+                getattr(usage, "output_tokens", 0) or 0
+            )
+        return int(total) if total else None
+
+    def _coalesce_key(self, provider, model, messages, request_key) -> Optional[str]:
+        if not self.coalesce or request_key is None:
+            return None
+        content = json.dumps(
+            [provider, model, messages, request_key], sort_keys=True, default=str
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _copy(result: Any) -> Any:
+        # Callers may change the structured responses they get back
+        if isinstance(result, BaseModel):
+            return result.model_copy(deep=True)
+        return result
+
+
+# Singleton instance of the LLM gateway
+_llm_gateway = None
+_llm_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Returns the shared LLM gateway, creating it on first use.
+    """
+    global _llm_gateway
+    if _llm_gateway is None:
+        with _llm_gateway_lock:
+            if _llm_gateway is None:
+                _llm_gateway = LLMGateway()
+    return _llm_gateway
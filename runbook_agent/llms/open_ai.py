@@ -1,6 +1,7 @@
+import inspect
 import logging
 from tenacity import retry, wait_random_exponential, stop_after_attempt
-from typing import Optional
+from typing import Any, Callable, Optional
 from runbook_agent.llms.llm_clients import (
     openai_client,
     async_openai_client,
@@ -12,6 +13,8 @@ from runbook_agent.llms.llm_clients import (
     anthropic_instructor_async,
 )
 from runbook_agent import config
+from runbook_agent.llms.gateway import get_llm_gateway
+from runbook_agent.llms.routing import get_llm_router
 from runbook_agent.llms.utils import (
     Providers,
     convert_anthropic_to_openai_response_format,
@@ -25,6 +28,51 @@ cfg = config.init_config()
 log = logging.getLogger(__name__)
 
 
+def _create_structured(
+    instructor_client, response_model, on_partial: Optional[Callable] = None, **kwargs
+):
+    """
+    Creates a structured completion. With `on_partial` the response is streamed
+    and every partial response is passed to it as its fields arrive, so callers
+    can act on the first fields before the rest is generated. Streamed calls
+    are not coalesced, each caller needs its own partials.
+    """
+    if on_partial is None:
+        return instructor_client.chat.completions.create(
+            response_model=response_model, **kwargs
+        )
+    partial = None
+    for partial in instructor_client.chat.completions.create_partial(
+        response_model=response_model, **kwargs
+    ):
+        on_partial(partial)
+    if partial is None:
+        return None
+    return response_model.model_validate(partial.model_dump())
+
+
+async def _async_create_structured(
+    instructor_client, response_model, on_partial: Optional[Callable] = None, **kwargs
+):
+    """
+    Async version of `_create_structured`, `on_partial` may be a coroutine function.
+    """
+    if on_partial is None:
+        return await instructor_client.chat.completions.create(
+            response_model=response_model, **kwargs
+        )
+    partial = None
+    async for partial in instructor_client.chat.completions.create_partial(
+        response_model=response_model, **kwargs
+    ):
+        result = on_partial(partial)
+        if inspect.isawaitable(result):
+            await result
+    if partial is None:
+        return None
+    return response_model.model_validate(partial.model_dump())
+
+
 @retry(wait=wait_random_exponential(min=1, max=40), stop=stop_after_attempt(5))
 def chat_completion_request(
     messages,
@@ -45,17 +93,34 @@ def chat_completion_request(
     if provider == Providers.OPENAI.value:
         model = model or get_default_model_for_provider(provider)
         try:
-            completion = openai_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                seed=seed,
-                top_p=top_p,
-                response_format=response_format,
+            completion = get_llm_gateway().call(
+                Providers.OPENAI.value,
+                model,
+                messages,
+                lambda: openai_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    seed=seed,
+                    top_p=top_p,
+                    response_format=response_format,
+                    max_tokens=max_tokens,
+                    tools=tools,
+                    function_call=function_call,
+                    tool_choice=tool_choice,
+                ),
                 max_tokens=max_tokens,
-                tools=tools,
-                function_call=function_call,
-                tool_choice=tool_choice,
+                request_key={
+                    "kind": "chat",
+                    "temperature": temperature,
+                    "seed": seed,
+                    "top_p": top_p,
+                    "response_format": response_format,
+                    "max_tokens": max_tokens,
+                    "tools": tools,
+                    "function_call": function_call,
+                    "tool_choice": tool_choice,
+                },
             )
 
             # Extract token usage from the completion response
@@ -70,13 +135,27 @@ def chat_completion_request(
     # provider is Anthropic
     elif provider == Providers.ANTHROPIC.value:
         model = model or get_default_model_for_provider(provider)
+        # Callers written for OpenAI, or failed over from it, may not set one
+        max_tokens = max_tokens or cfg.anthropic.max_tokens
         try:
-            completion = anthropic_client.messages.create(
-                messages=messages,
-                model=model,
-                tools=tools,
+            completion = get_llm_gateway().call(
+                Providers.ANTHROPIC.value,
+                model,
+                messages,
+                lambda: anthropic_client.messages.create(
+                    messages=messages,
+                    model=model,
+                    tools=tools,
+                    max_tokens=max_tokens,
+                    tool_choice=tool_choice,
+                ),
                 max_tokens=max_tokens,
-                tool_choice=tool_choice,
+                request_key={
+                    "kind": "chat",
+                    "tools": tools,
+                    "max_tokens": max_tokens,
+                    "tool_choice": tool_choice,
+                },
             )
             completion = convert_anthropic_to_openai_response_format(completion)
             # Extract token usage from the completion response
@@ -104,7 +183,28 @@ def chat_completion_request_instructor(
     function_call=None,
     response_model=None,
     provider: Optional[str] = None,
+    on_partial: Optional[Callable[[Any], Any]] = None,
 ):
+    # Without an explicit provider the router picks it, failing over to the
+    # other provider
+    if provider is None and model is not None and get_llm_router().enabled:
+        return get_llm_router().route(
+            Providers.OPENAI.value,
+            model,
+            lambda routed_provider, routed_model: chat_completion_request_instructor(
+                messages,
+                temperature=temperature,
+                seed=seed,
+                model=routed_model,
+                top_p=top_p,
+                max_tokens=max_tokens,
+                tools=tools,
+                function_call=function_call,
+                response_model=response_model,
+                provider=routed_provider,
+                on_partial=on_partial,
+            ),
+        )
     # if provider is None , assign default provider as OpenAI
     provider = provider or Providers.OPENAI.value
 
@@ -112,16 +212,40 @@ def chat_completion_request_instructor(
         model = model or get_default_model_for_provider(provider)
 
         try:
-            completion = openai_instructor.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                seed=seed,
-                top_p=top_p,
+            completion = get_llm_gateway().call(
+                Providers.OPENAI.value,
+                model,
+                messages,
+                lambda: _create_structured(
+                    openai_instructor,
+                    response_model,
+                    on_partial,
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    seed=seed,
+                    top_p=top_p,
+                    max_tokens=max_tokens,
+                    tools=tools,
+                    function_call=function_call,
+                ),
                 max_tokens=max_tokens,
-                tools=tools,
-                function_call=function_call,
-                response_model=response_model,
+                request_key=(
+                    None
+                    if on_partial
+                    else {
+                        "kind": "instructor",
+                        "temperature": temperature,
+                        "seed": seed,
+                        "top_p": top_p,
+                        "max_tokens": max_tokens,
+                        "tools": tools,
+                        "function_call": function_call,
+                        "response_model": (
+                            response_model.__qualname__ if response_model else None
+                        ),
+                    }
+                ),
             )
             return completion
         except Exception as e:
@@ -130,12 +254,33 @@ def chat_completion_request_instructor(
             return None
     elif provider == Providers.ANTHROPIC.value:
         model = model or get_default_model_for_provider(provider)
+        # Callers written for OpenAI, or failed over from it, may not set one
+        max_tokens = max_tokens or cfg.anthropic.max_tokens
         try:
-            completion = anthropic_instructor.chat.completions.create(
-                model=model,
-                messages=messages,
+            completion = get_llm_gateway().call(
+                Providers.ANTHROPIC.value,
+                model,
+                messages,
+                lambda: _create_structured(
+                    anthropic_instructor,
+                    response_model,
+                    on_partial,
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                ),
                 max_tokens=max_tokens,
-                response_model=response_model,
+                request_key=(
+                    None
+                    if on_partial
+                    else {
+                        "kind": "instructor",
+                        "max_tokens": max_tokens,
+                        "response_model": (
+                            response_model.__qualname__ if response_model else None
+                        ),
+                    }
+                ),
             )
             return completion
         except Exception as e:
@@ -158,7 +303,28 @@ async def async_chat_completion_request_instructor(
     function_call=None,
     response_model=None,
     provider: Optional[str] = None,
+    on_partial: Optional[Callable[[Any], Any]] = None,
 ):
+    # Without an explicit provider the router picks it, failing over to the
+    # other provider and hedging slow calls
+    if provider is None and model is not None and get_llm_router().enabled:
+        return await get_llm_router().async_route(
+            Providers.OPENAI.value,
+            model,
+            lambda routed_provider, routed_model: async_chat_completion_request_instructor(
+                messages,
+                temperature=temperature,
+                seed=seed,
+                model=routed_model,
+                top_p=top_p,
+                max_tokens=max_tokens,
+                tools=tools,
+                function_call=function_call,
+                response_model=response_model,
+                provider=routed_provider,
+                on_partial=on_partial,
+            ),
+        )
     # if provider is None , assign default provider as OpenAI
     provider = provider or Providers.OPENAI.value
 
@@ -166,16 +332,40 @@ async def async_chat_completion_request_instructor(
         model = model or get_default_model_for_provider(provider)
 
         try:
-            return await openai_instructor_async.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                seed=seed,
-                top_p=top_p,
+            return await get_llm_gateway().async_call(
+                Providers.OPENAI.value,
+                model,
+                messages,
+                lambda: _async_create_structured(
+                    openai_instructor_async,
+                    response_model,
+                    on_partial,
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    seed=seed,
+                    top_p=top_p,
+                    max_tokens=max_tokens,
+                    tools=tools,
+                    function_call=function_call,
+                ),
                 max_tokens=max_tokens,
-                tools=tools,
-                function_call=function_call,
-                response_model=response_model,
+                request_key=(
+                    None
+                    if on_partial
+                    else {
+                        "kind": "instructor",
+                        "temperature": temperature,
+                        "seed": seed,
+                        "top_p": top_p,
+                        "max_tokens": max_tokens,
+                        "tools": tools,
+                        "function_call": function_call,
+                        "response_model": (
+                            response_model.__qualname__ if response_model else None
+                        ),
+                    }
+                ),
             )
 
             # # Extract token usage from the completion response
@@ -190,13 +380,34 @@ async def async_chat_completion_request_instructor(
             return None
     elif provider == Providers.ANTHROPIC.value:
         model = model or get_default_model_for_provider(provider)
+        # Callers written for OpenAI, or failed over from it, may not set one
+        max_tokens = max_tokens or cfg.anthropic.max_tokens
 
         try:
-            return await anthropic_instructor_async.chat.completions.create(
-                model=model,
-                messages=messages,
+            return await get_llm_gateway().async_call(
+                Providers.ANTHROPIC.value,
+                model,
+                messages,
+                lambda: _async_create_structured(
+                    anthropic_instructor_async,
+                    response_model,
+                    on_partial,
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                ),
                 max_tokens=max_tokens,
-                response_model=response_model,
+                request_key=(
+                    None
+                    if on_partial
+                    else {
+                        "kind": "instructor",
+                        "max_tokens": max_tokens,
+                        "response_model": (
+                            response_model.__qualname__ if response_model else None
+                        ),
+                    }
+                ),
             )
         except Exception as e:
             logging.exception("Unable to generate ChatCompletion response")
@@ -226,16 +437,32 @@ async def async_chat_completion_request(
         model = model or get_default_model_for_provider(provider)
 
         try:
-            completion = await async_openai_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                seed=seed,
-                top_p=top_p,
-                response_format=response_format,
+            completion = await get_llm_gateway().async_call(
+                Providers.OPENAI.value,
+                model,
+                messages,
+                lambda: async_openai_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    seed=seed,
+                    top_p=top_p,
+                    response_format=response_format,
+                    max_tokens=max_tokens,
+                    functions=functions,
+                    function_call=function_call,
+                ),
                 max_tokens=max_tokens,
-                functions=functions,
-                function_call=function_call,
+                request_key={
+                    "kind": "chat",
+                    "temperature": temperature,
+                    "seed": seed,
+                    "top_p": top_p,
+                    "response_format": response_format,
+                    "max_tokens": max_tokens,
+                    "functions": functions,
+                    "function_call": function_call,
+                },
             )
 
             # Extract token usage from the completion response
@@ -249,12 +476,21 @@ async def async_chat_completion_request(
             return None, (0, 0, 0)
     elif provider == Providers.ANTHROPIC.value:
         model = model or get_default_model_for_provider(provider)
+        # Callers written for OpenAI, or failed over from it, may not set one
+        max_tokens = max_tokens or cfg.anthropic.max_tokens
 
         try:
-            completion = await anthropic_async_client.messages.create(
-                messages=messages,
-                model=model,
+            completion = await get_llm_gateway().async_call(
+                Providers.ANTHROPIC.value,
+                model,
+                messages,
+                lambda: anthropic_async_client.messages.create(
+                    messages=messages,
+                    model=model,
+                    max_tokens=max_tokens,
+                ),
                 max_tokens=max_tokens,
+                request_key={"kind": "chat", "max_tokens": max_tokens},
             )
             completion = convert_anthropic_to_openai_response_format(completion)
             # Extract token usage from the completion response
@@ -288,8 +524,15 @@ def vision_completion_request(image_url, model=None):
     ]
 
     try:
-        response = openai_client.chat.completions.create(
-            model=model, messages=messages, temperature=0.2, max_tokens=500
+        response = get_llm_gateway().call(
+            Providers.OPENAI.value,
+            model,
+            messages,
+            lambda: openai_client.chat.completions.create(
+                model=model, messages=messages, temperature=0.2, max_tokens=500
+            ),
+            max_tokens=500,
+            request_key={"kind": "vision", "temperature": 0.2, "max_tokens": 500},
         )
         return response
     except Exception as e:
@@ -311,8 +554,14 @@ def embeddings_request(text, model=None, dimensions=None):
         dimensions = cfg.rag.DIMENSIONS
 
     try:
-        response = openai_client.embeddings.create(
-            model=model, input=text, encoding_format="float", dimensions=dimensions
+        response = get_llm_gateway().call(
+            Providers.OPENAI.value,
+            model,
+            text,
+            lambda: openai_client.embeddings.create(
+                model=model, input=text, encoding_format="float", dimensions=dimensions
+            ),
+            request_key={"kind": "embedding", "dimensions": dimensions},
         )
         return response
     except Exception as e:
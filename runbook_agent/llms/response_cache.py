@@ -0,0 +1,339 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Type
+import numpy as np
+from pydantic import BaseModel
+from runbook_agent.embedding_provider.base_embedding_provider import (
+    BaseEmbeddingProvider,
+)
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    namespace: str
+    context_key: str
+    response: BaseModel
+    created_at: float
+    doc_ids: Set[str] = field(default_factory=set)
+    embedding: Optional[np.ndarray] = None
+
+
+class LLMResponseCache:
+    """
+    Cache for structured LLM responses.
+
+    Exact hits are keyed on the model, the response model and the normalized
+    prompt. Near-duplicate hits compare the embedding of the query text (usually
+    the incident description) with the cached entries that share the same
+    namespace and context, e.g. the same candidate runbooks and target entity,
+    so a semantic hit never crosses into a different decision.
+
+    Entries expire after a TTL and can be invalidated by the doc_ids of the
+    runbooks they were derived from, which the indexer does on reindex.
+    """
+
+    def __init__(
+        self,
+        embedding_provider: Optional[BaseEmbeddingProvider] = None,
+        ttl_seconds: float = cfg.llm_cache.ttl_seconds,
+        similarity_threshold: float = cfg.llm_cache.similarity_threshold,
+        max_entries: int = cfg.llm_cache.max_entries,
+        enabled: bool = cfg.llm_cache.enabled,
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            embedding_provider (BaseEmbeddingProvider, optional): Provider used for
+                near-duplicate lookups. Only exact hits are served without it.
+            ttl_seconds (float): Seconds after which an entry expires.
+            similarity_threshold (float): Minimum cosine similarity of a near-duplicate hit.
+            max_entries (int): Maximum number of cached responses.
+            enabled (bool): When False every lookup is a miss and nothing is stored.
+        """
+        self.embedding_provider = embedding_provider
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def key(
+        namespace: str,
+        messages: List[Dict[str, Any]],
+        model: str,
+        response_model: Type[BaseModel],
+    ) -> str:
+        """
+        Returns the exact-match key of a prompt.
+        """
+        normalized = [
+            {
+                role_key: " ".join(str(value).split())
+                for role_key, value in message.items()
+            }
+            for message in messages
+        ]
+        content = json.dumps(
+            [namespace, model, response_model.__name__, normalized], sort_keys=True
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def context_key(context: Optional[Iterable[str]]) -> str:
+        """
+        Returns the key of the context a near-duplicate hit must share.
+        """
+        content = json.dumps(sorted(context or []))
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        key: str,
+        namespace: str,
+        context_key: str,
+        embedding: Optional[np.ndarray] = None,
+    ) -> Optional[BaseModel]:
+        """
+        Returns a cached response by exact key, falling back to the most similar
+        entry of the same namespace and context when an embedding is given.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["exact_hits"] += 1
+                return entry.response.model_copy(deep=True)
+
+            if embedding is not None:
+                match = self._most_similar(namespace, context_key, embedding)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._counters["semantic_hits"] += 1
+                    return self._entries[match].response.model_copy(deep=True)
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(
+        self,
+        key: str,
+        namespace: str,
+        context_key: str,
+        response: BaseModel,
+        doc_ids: Optional[Iterable[str]] = None,
+        embedding: Optional[np.ndarray] = None,
+    ):
+        """
+        Stores a response.
+        """
+        if not self.enabled or response is None:
+            return
+        with self._lock:
+            self._entries[key] = CachedResponse(
+                namespace=namespace,
+                context_key=context_key,
+                response=response.model_copy(deep=True),
+                created_at=time.monotonic(),
+                doc_ids=set(doc_ids or []),
+                embedding=embedding,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    async def cached(
+        self,
+        namespace: str,
+        messages: List[Dict[str, Any]],
+        model: str,
+        response_model: Type[BaseModel],
+        request,
+        query_text: Optional[str] = None,
+        context: Optional[Iterable[str]] = None,
+        doc_ids: Optional[Iterable[str]] = None,
+    ) -> Optional[BaseModel]:
+        """
+        Returns the cached response of a prompt, or awaits `request` and caches its result.
+
+        Args:
+            namespace (str): Name of the prompt, responses are never shared across namespaces.
+            messages (List[Dict[str, Any]]): The prompt messages.
+            model (str): The model the prompt is sent to.
+            response_model (Type[BaseModel]): The structured response type.
+            request (Callable): Coroutine function performing the LLM call on a miss.
+            query_text (str, optional): Text compared for near-duplicate hits.
+                Only exact hits are served when it is not given.
+            context (Iterable[str], optional): Values a near-duplicate hit must share.
+            doc_ids (Iterable[str], optional): Runbooks the response depends on.
+
+        Returns:
+            Optional[BaseModel]: The cached or fresh response.
+        """
+        key = self.key(namespace, messages, model, response_model)
+        context_key = self.context_key(context)
+        embedding = None
+        if self.enabled and query_text and self.embedding_provider is not None:
+            try:
+                embedding = self._normalize(
+                    await self.embedding_provider.aget_text_embedding(query_text)
+                )
+            except Exception as e:
+                logger.warning(f"Unable to embed query for response cache: {str(e)}")
+
+        response = self.get(key, namespace, context_key, embedding)
+        if response is not None:
+            return response
+
+        response = await request()
+        self.put(key, namespace, context_key, response, doc_ids, embedding)
+        return response
+
+    def cached_sync(
+        self,
+        namespace: str,
+        messages: List[Dict[str, Any]],
+        model: str,
+        response_model: Type[BaseModel],
+        request,
+        doc_ids: Optional[Iterable[str]] = None,
+    ) -> Optional[BaseModel]:
+        """
+        Blocking variant of `cached`, serving exact hits only.
+        """
+        key = self.key(namespace, messages, model, response_model)
+        context_key = self.context_key(None)
+        response = self.get(key, namespace, context_key)
+        if response is not None:
+            return response
+
+        response = request()
+        self.put(key, namespace, context_key, response, doc_ids)
+        return response
+
+    def invalidate_doc_ids(self, doc_ids: Iterable[str]) -> int:
+        """
+        Drops every response derived from one of the given runbooks.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        doc_ids = set(doc_ids)
+        if not doc_ids:
+            return 0
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items() if entry.doc_ids & doc_ids
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._counters["invalidations"] += len(stale)
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached LLM responses")
+        return len(stale)
+
+    def clear(self):
+        """
+        Drops every cached response.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit/miss counters and the number of cached responses.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            hits = stats["exact_hits"] + stats["semantic_hits"]
+            lookups = hits + stats["misses"]
+            stats["hit_rate"] = hits / lookups if lookups else 0.0
+            stats["entries"] = len(self._entries)
+            return stats
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        now = time.monotonic()
+        # Entries are kept in recency order, not age order, so scan them all
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        self._counters["expirations"] += len(expired)
+
+    def _most_similar(
+        self, namespace: str, context_key: str, embedding: np.ndarray
+    ) -> Optional[str]:
+        candidates = [
+            (key, entry.embedding)
+            for key, entry in self._entries.items()
+            if entry.namespace == namespace
+            and entry.context_key == context_key
+            and entry.embedding is not None
+        ]
+        if not candidates:
+            return None
+        scores = np.stack([vector for _, vector in candidates]) @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        return candidates[best][0]
+
+
+# Singleton instance of the response cache
+_response_cache = None
+
+
+def init_response_cache(
+    embedding_provider: Optional[BaseEmbeddingProvider] = None,
+) -> LLMResponseCache:
+    """
+    Initializes the shared response cache, enabling near-duplicate lookups when
+    an embedding provider is given.
+    """
+    cache = get_response_cache()
+    if embedding_provider is not None:
+        cache.embedding_provider = embedding_provider
+    return cache
+
+
+def get_response_cache() -> LLMResponseCache:
+    """
+    Returns the shared response cache, creating it on first use.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache()
+    return _response_cache
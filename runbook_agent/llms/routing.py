@@ -0,0 +1,378 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from runbook_agent.llms.gateway import LLMPriority, current_llm_priority
+from runbook_agent.llms.utils import Providers
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = [0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120]
+
+Route = Tuple[str, str]
+
+
+class LatencyHistogram:
+    """
+    Latencies of the successful calls to one provider and model.
+
+    Bucket counts cover every call since startup and are what `stats` reports.
+    Percentiles are taken over a window of the most recent calls, so the hedging
+    delay follows the provider as it slows down or recovers.
+    """
+
+    def __init__(self, window: int = cfg.llm_routing.latency_window):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.total += 1
+            self.sum += seconds
+            self._recent.append(seconds)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """
+        Returns the latency below which `quantile` of the recent calls finished,
+        or None without any recent calls.
+        """
+        with self._lock:
+            if not self._recent:
+                return None
+            ordered = sorted(self._recent)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+    @property
+    def samples(self) -> int:
+        return len(self._recent)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["inf"]
+            stats = {
+                "count": self.total,
+                "mean": self.sum / self.total if self.total else 0.0,
+                "buckets": dict(zip(bounds, self.counts)),
+            }
+        for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            stats[name] = self.percentile(quantile)
+        return stats
+
+
+class CircuitBreaker:
+    """
+    Stops sending calls to a provider after `failure_threshold` failures in a
+    row. Once `reset_timeout` has passed a single probe call is let through, and
+    its outcome closes the breaker again or keeps it open.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = cfg.llm_routing.failure_threshold,
+        reset_timeout: float = cfg.llm_routing.reset_timeout,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Returns True if a call may be sent, claiming the probe when half open.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        # A probe cancelled before it finished says nothing about the provider
+        with self._lock:
+            self._probing = False
+
+
+class LLMRouter:
+    """
+    Routes a call between a model and its equivalent on the other provider.
+
+    The alternate of a model comes from `fallback_models`, which maps OpenAI
+    models to Anthropic-on-Bedrock models (the reverse is derived). A call goes
+    to its own model unless that route's circuit breaker is open. When the call
+    fails, or an interactive call takes longer than the `hedge_percentile`
+    latency of its route, the same call is sent on the alternate route and the
+    first successful answer wins. Background calls only fail over, they are
+    never hedged.
+
+    The LLM request functions return None instead of raising, so a None result
+    counts as a failure.
+    """
+
+    def __init__(
+        self,
+        fallback_models: Optional[Dict[str, str]] = None,
+        hedge_percentile: float = cfg.llm_routing.hedge_percentile,
+        hedge_min_delay: float = cfg.llm_routing.hedge_min_delay,
+        hedge_default_delay: float = cfg.llm_routing.hedge_default_delay,
+        min_samples: int = cfg.llm_routing.min_samples,
+        enabled: bool = cfg.llm_routing.enabled,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            fallback_models (Dict[str, str], optional): Anthropic model used for
+                each OpenAI model.
+            hedge_percentile (float): Latency quantile of a route after which a
+                hedged call is sent.
+            hedge_min_delay (float): Shortest wait before hedging.
+            hedge_default_delay (float): Wait before hedging while a route has
+                fewer than `min_samples` recorded latencies.
+            min_samples (int): Latencies needed before the percentile is trusted.
+            enabled (bool): When False calls always go to their own model.
+        """
+        fallback_models = (
+            fallback_models
+            if fallback_models is not None
+            else cfg.llm_routing.fallback_models
+        )
+        self._alternates: Dict[Route, Route] = {}
+        for openai_model, anthropic_model in fallback_models.items():
+            openai_route = (Providers.OPENAI.value, openai_model)
+            anthropic_route = (Providers.ANTHROPIC.value, anthropic_model)
+            self._alternates[openai_route] = anthropic_route
+            self._alternates.setdefault(anthropic_route, openai_route)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self._histograms: Dict[Route, LatencyHistogram] = {}
+        self._breakers: Dict[Route, CircuitBreaker] = {}
+        self._counters = {"hedged": 0, "hedge_wins": 0, "failovers": 0}
+        self._lock = threading.Lock()
+
+    def alternate(self, provider: str, model: str) -> Optional[Route]:
+        return self._alternates.get((provider, model))
+
+    def histogram(self, route: Route) -> LatencyHistogram:
+        with self._lock:
+            if route not in self._histograms:
+                self._histograms[route] = LatencyHistogram()
+            return self._histograms[route]
+
+    def breaker(self, route: Route) -> CircuitBreaker:
+        with self._lock:
+            if route not in self._breakers:
+                self._breakers[route] = CircuitBreaker()
+            return self._breakers[route]
+
+    def hedge_delay(self, route: Route) -> float:
+        """
+        Returns how long a call on `route` runs before it is hedged.
+        """
+        histogram = self.histogram(route)
+        if histogram.samples < self.min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, histogram.percentile(self.hedge_percentile))
+
+    def route(
+        self, provider: str, model: str, request: Callable[[str, str], Any]
+    ) -> Any:
+        """
+        Performs a blocking call, failing over to the alternate route on error.
+        Blocking calls are not hedged.
+
+        Args:
+            provider (str): Provider of the requested model.
+            model (str): Requested model.
+            request (Callable): Performs the call on a (provider, model) route.
+
+        Returns:
+            Any: The result of the first route that answered, None if none did.
+        """
+        routes = self._routes(provider, model)
+        for index, route in enumerate(routes):
+            if index > 0:
+                self._count("failovers")
+            started = time.monotonic()
+            try:
+                result = request(*route)
+            except Exception as e:
+                logger.warning(f"LLM call on {route} failed: {str(e)}")
+                result = None
+            self._record(route, result, time.monotonic() - started)
+            if result is not None:
+                for unused in routes[index + 1 :]:
+                    self.breaker(unused).release_probe()
+                return result
+        return None
+
+    async def async_route(
+        self,
+        provider: str,
+        model: str,
+        request: Callable[[str, str], Awaitable[Any]],
+    ) -> Any:
+        """
+        Performs a call, hedging slow interactive calls and failing over on error.
+
+        Args:
+            provider (str): Provider of the requested model.
+            model (str): Requested model.
+            request (Callable): Coroutine function performing the call on a
+                (provider, model) route.
+
+        Returns:
+            Any: The first successful result, None if every route failed.
+        """
+        routes = self._routes(provider, model)
+        primary = asyncio.create_task(self._attempt(routes[0], request))
+        secondary = None
+        pending = {primary}
+        try:
+            if len(routes) == 1:
+                return await primary
+
+            hedge = current_llm_priority() != LLMPriority.BACKGROUND
+            if hedge:
+                await asyncio.wait({primary}, timeout=self.hedge_delay(routes[0]))
+            else:
+                await asyncio.wait({primary})
+            if primary.done() and primary.result() is not None:
+                return primary.result()
+
+            if primary.done():
+                self._count("failovers")
+            else:
+                self._count("hedged")
+                logger.info(f"Hedging slow LLM call on {routes[0]} with {routes[1]}")
+            secondary = asyncio.create_task(self._attempt(routes[1], request))
+            pending = {secondary} if primary.done() else {primary, secondary}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.result() is not None:
+                        if task is secondary and not primary.done():
+                            self._count("hedge_wins")
+                        return task.result()
+            return None
+        finally:
+            # Also reached when the caller is cancelled, no call is left running
+            for task in pending:
+                task.cancel()
+            if len(routes) > 1 and secondary is None:
+                # The alternate route was not used, give back its probe if claimed
+                self.breaker(routes[1]).release_probe()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the latency histograms and breaker states of every route.
+        """
+        with self._lock:
+            routes = set(self._histograms) | set(self._breakers)
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "routes": {
+                f"{provider}:{model}": {
+                    "latency": self.histogram((provider, model)).stats(),
+                    "breaker": self.breaker((provider, model)).state,
+                }
+                for provider, model in sorted(routes)
+            },
+        }
+
+    def _routes(self, provider: str, model: str) -> List[Route]:
+        primary = (provider, model)
+        alternate = self.alternate(provider, model) if self.enabled else None
+        if alternate is None:
+            return [primary]
+        routes = [
+            route for route in (primary, alternate) if self.breaker(route).allow()
+        ]
+        # With both breakers open the requested model is still tried
+        return routes or [primary]
+
+    async def _attempt(
+        self, route: Route, request: Callable[[str, str], Awaitable[Any]]
+    ) -> Any:
+        started = time.monotonic()
+        try:
+            result = await request(*route)
+        except asyncio.CancelledError:
+            self.breaker(route).release_probe()
+            raise
+        except Exception as e:
+            logger.warning(f"LLM call on {route} failed: {str(e)}")
+            result = None
+        self._record(route, result, time.monotonic() - started)
+        return result
+
+    def _record(self, route: Route, result: Any, elapsed: float):
+        if result is None:
+            self.breaker(route).record_failure()
+            return
+        self.breaker(route).record_success()
+        self.histogram(route).observe(elapsed)
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+
+# Singleton instance of the LLM router
+_llm_router = None
+_llm_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """
+    Returns the shared LLM router, creating it on first use.
+    """
+    global _llm_router
+    if _llm_router is None:
+        with _llm_router_lock:
+            if _llm_router is None:
+                _llm_router = LLMRouter()
+    return _llm_router
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from runbook_agent.embedding_provider.base_embedding_provider import (
     BaseEmbeddingProvider,
@@ -5,9 +6,16 @@ from runbook_agent.embedding_provider.base_embedding_provider import (
 from runbook_agent.repository.vector_store.vector_store_service import (
     VectorStoreService,
 )
-from runbook_agent.repository.vector_store.schemas import QueryVectors
+from runbook_agent.repository.vector_store.schemas import (
+    QueryVectors,
+    QueryType,
+    VectorFilters,
+)
+from runbook_agent.config import init_config
+from typing import List, Optional
 
 # Initialize configuration and logger
+cfg = init_config()
 logging = logging.getLogger(__name__)
 
 
@@ -16,7 +24,9 @@ class QueryEngine:
         self,
         embedding_provider: BaseEmbeddingProvider,  # The embedding provider instance
         vector_store: VectorStoreService,  # The vector store instance (Faiss, Qdrant, etc.)
-        top_k: int = 5,  # The number of top results to fetch
+        top_k: int = cfg.vector_search.top_k,  # The number of top results to fetch
+        query_type: QueryType = QueryType(cfg.vector_search.query_type),
+        batch_workers: int = cfg.vector_search.batch_workers,
     ):
         """
         Initialize the query engine with the provided embedding provider and vector store.
@@ -25,10 +35,14 @@ class QueryEngine:
             embedding_provider (BaseEmbeddingRepository): The embedding provider instance.
             vector_store (VectorStoreService): The vector store instance (Faiss, Qdrant, etc.).
             top_k (int): The number of top k results to return from the query.
+            query_type (QueryType): Pure vector or hybrid (vector and keyword) search.
+            batch_workers (int): Searches of a batch run in parallel.
         """
         self.embedding_provider = embedding_provider
         self.vector_store = vector_store
         self.top_k = top_k
+        self.query_type = query_type
+        self.batch_workers = batch_workers
 
     def _get_embedding(self, query_text: str):
         """
@@ -42,12 +56,29 @@ class QueryEngine:
         """
         return self.embedding_provider.get_text_embedding(query_text)
 
-    def query_vector_store(self, query_text: str):
+    def _build_query(
+        self,
+        query_text: str,
+        query_embedding,
+        filters: Optional[VectorFilters] = None,
+    ) -> QueryVectors:
+        return QueryVectors(
+            query_vector=query_embedding,
+            k=self.top_k,
+            query_text=query_text,
+            query_type=self.query_type,
+            filters=filters,
+        )
+
+    def query_vector_store(
+        self, query_text: str, filters: Optional[VectorFilters] = None
+    ):
         """
         Query the vector store with the provided query text.
 
         Args:
             query_text (str): The query text to search for.
+            filters (VectorFilters, optional): Metadata the results must match.
 
         Returns:
             list: A list of top k results from the vector store.
@@ -56,10 +87,84 @@ class QueryEngine:
         query_embedding = self._get_embedding(query_text)
 
         # Construct query vectors for vector store
-        query_vectors = QueryVectors(query_vector=query_embedding, k=self.top_k)
+        query_vectors = self._build_query(query_text, query_embedding, filters)
 
         # Query the vector store for top k results
         results = self.vector_store.query_vectors(query_vectors)
 
         return results
 
+    async def async_query_vector_store(
+        self, query_text: str, filters: Optional[VectorFilters] = None
+    ):
+        """
+        Async version of `query_vector_store`.
+
+        The embedding uses the provider's async client and the vector search runs in
+        a worker thread, so the event loop is never blocked.
+
+        Args:
+            query_text (str): The query text to search for.
+            filters (VectorFilters, optional): Metadata the results must match.
+
+        Returns:
+            list: A list of top k results from the vector store.
+        """
+        query_embedding = await self.embedding_provider.aget_text_embedding(query_text)
+        query_vectors = self._build_query(query_text, query_embedding, filters)
+        return await asyncio.to_thread(self.vector_store.query_vectors, query_vectors)
+
+    def query_vector_store_batch(
+        self, query_texts: List[str], filters: Optional[VectorFilters] = None
+    ):
+        """
+        Query the vector store with many query texts at once.
+
+        All texts are embedded with one batch call to the provider, and the searches
+        are handed to the vector store as a single batch.
+
+        Args:
+            query_texts (List[str]): The query texts to search for.
+            filters (VectorFilters, optional): Metadata the results of every query must match.
+
+        Returns:
+            list: The top k results of each query text, in order.
+        """
+        if not query_texts:
+            return []
+        query_embeddings = self.embedding_provider.get_text_embedding_batch(query_texts)
+        queries = [
+            self._build_query(query_text, query_embedding, filters)
+            for query_text, query_embedding in zip(query_texts, query_embeddings)
+        ]
+        return self.vector_store.query_vectors_batch(
+            queries, max_workers=self.batch_workers
+        )
+
+    async def async_query_vector_store_batch(
+        self, query_texts: List[str], filters: Optional[VectorFilters] = None
+    ):
+        """
+        Async version of `query_vector_store_batch`.
+
+        Args:
+            query_texts (List[str]): The query texts to search for.
+            filters (VectorFilters, optional): Metadata the results of every query must match.
+
+        Returns:
+            list: The top k results of each query text, in order.
+        """
+        if not query_texts:
+            return []
+        query_embeddings = await self.embedding_provider.aget_text_embedding_batch(
+            query_texts
+        )
+        queries = [
+            self._build_query(query_text, query_embedding, filters)
+            for query_text, query_embedding in zip(query_texts, query_embeddings)
+        ]
+        return await asyncio.to_thread(
+            self.vector_store.query_vectors_batch,
+            queries,
+            max_workers=self.batch_workers,
+        )
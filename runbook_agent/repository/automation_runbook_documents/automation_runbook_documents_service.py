@@ -8,7 +8,12 @@ from runbook_agent.repository.automation_runbook_documents.automation_runbook_re
 from runbook_agent.repository.automation_runbook_documents.base_automation_runbook_documents_service import (
     AbstractAutomationRunbookService,
 )
-from typing import List, Optional
+from runbook_agent.repository.automation_runbook_documents.runbook_cache import (
+    RunbookMetadataCache,
+    get_runbook_cache,
+)
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 
 def getAutomationRunbookService(
@@ -18,8 +23,12 @@ def getAutomationRunbookService(
 
 
 class AutomationRunbookService(AbstractAutomationRunbookService):
-    def __init__(self, prisma_client: Prisma):
+    def __init__(
+        self, prisma_client: Prisma, cache: Optional[RunbookMetadataCache] = None
+    ):
         self.repository = AutomationRunbookClient(prisma_client)
+        # Read-through cache for the lookups made on every incident
+        self.cache = cache or get_runbook_cache()
 
     async def add_runbook(
         self, runbook_data: AutomationRunbookDocumentModel
@@ -33,6 +42,7 @@ class AutomationRunbookService(AbstractAutomationRunbookService):
         Returns:
             AutomationRunbookDocumentModel: The added runbook.
         """
+        self.cache.invalidate(name=runbook_data.name, source=runbook_data.source)
         return await self.repository.add_runbook(runbook_data)
 
     async def update_runbook_by_id(
@@ -47,7 +57,10 @@ class AutomationRunbookService(AbstractAutomationRunbookService):
             id (str): The id of the runbook to update.
             runbook_data (AutomationRunbookDocumentModel): The new data for the runbook.
         """
-        return await self.repository.update_runbook_by_id(id, runbook_data)
+        try:
+            return await self.repository.update_runbook_by_id(id, runbook_data)
+        finally:
+            self.cache.invalidate(runbook_id=id)
 
     async def update_runbook_by_name_and_source(
         self,
@@ -63,9 +76,12 @@ class AutomationRunbookService(AbstractAutomationRunbookService):
             source (str): The source of the runbook to update.
             runbook_data (AutomationRunbookDocumentModel): The new data for the runbook.
         """
-        return await self.repository.update_runbook_by_name_and_source(
-            name, source, runbook_data
-        )
+        try:
+            return await self.repository.update_runbook_by_name_and_source(
+                name, source, runbook_data
+            )
+        finally:
+            self.cache.invalidate(name=name, source=source)
 
     async def delete_runbook(self, runbook_name: str, source: str) -> bool:
         """
@@ -78,18 +94,24 @@ class AutomationRunbookService(AbstractAutomationRunbookService):
         Returns:
             bool: True if the deletion was successful, False otherwise.
         """
-        return await self.repository.delete_runbook(runbook_name, source)
+        try:
+            return await self.repository.delete_runbook(runbook_name, source)
+        finally:
+            self.cache.invalidate(name=runbook_name, source=source)
 
     async def get_unindexed_automation_runbook(
-        self,
+        self, ids: Optional[List[str]] = None
     ) -> List[AutomationRunbookDocumentModel]:
         """
         Gets unindexed runbook document.
 
+        Args:
+            ids (List[str], optional): Only consider the runbooks with these ids.
+
         Returns:
             runbook_data (AutomationRunbookDocumentModel): The data for the runbook.
         """
-        return await self.repository.get_unindexed_runbooks()
+        return await self.repository.get_unindexed_runbooks(ids)
 
     async def get_runbook_by_name_and_source(
         self, name: str, source: str
@@ -104,9 +126,71 @@ class AutomationRunbookService(AbstractAutomationRunbookService):
         Returns:
             bool: True if the deletion was successful, False otherwise.
         """
-        return await self.repository.get_by_name_and_source(name=name, source=source)
+        runbook = self.cache.get_by_name_and_source(name, source)
+        if runbook is not None:
+            return runbook
+        generation = self.cache.generation
+        runbook = await self.repository.get_by_name_and_source(name=name, source=source)
+        self.cache.put(runbook, generation)
+        return runbook
 
     async def get_by_id(
         self, runbook_id: str
     ) -> Optional[AutomationRunbookDocumentModel]:
-        return await self.repository.get_by_id(runbook_id=runbook_id)
+        """
+        Gets a runbook document by id, from the cache when possible.
+
+        Args:
+            runbook_id (str): The id of the runbook.
+
+        Returns:
+            Optional[AutomationRunbookDocumentModel]: The runbook, or None if not found.
+        """
+        runbook = self.cache.get_by_id(runbook_id)
+        if runbook is not None:
+            return runbook
+        generation = self.cache.generation
+        runbook = await self.repository.get_by_id(runbook_id=runbook_id)
+        self.cache.put(runbook, generation)
+        return runbook
+
+    async def get_runbooks_by_source(
+        self, source: str
+    ) -> List[AutomationRunbookDocumentModel]:
+        """
+        Gets every runbook document of a source in one query.
+
+        Args:
+            source (str): The source of the runbooks.
+
+        Returns:
+            List[AutomationRunbookDocumentModel]: The runbooks of the source.
+        """
+        return await self.repository.get_by_source(source)
+
+    async def sync_runbooks(
+        self,
+        new_runbooks: List[AutomationRunbookDocumentModel],
+        republished: List[Tuple[str, datetime]],
+        deleted: List[AutomationRunbookDocumentModel],
+    ):
+        """
+        Inserts, marks for reindexing and deletes runbooks in one transaction.
+
+        Args:
+            new_runbooks (List[AutomationRunbookDocumentModel]): Runbooks to add.
+            republished (List[Tuple[str, datetime]]): Ids and new published times of
+                runbooks that changed at the source.
+            deleted (List[AutomationRunbookDocumentModel]): Runbooks removed at the source.
+        """
+        try:
+            await self.repository.sync_runbooks(
+                new_runbooks, republished, [runbook.id for runbook in deleted]
+            )
+        finally:
+            for id, _ in republished:
+                self.cache.invalidate(runbook_id=id)
+            for runbook in deleted + new_runbooks:
+                self.cache.invalidate(
+                    runbook_id=runbook.id, name=runbook.name, source=runbook.source
+                )
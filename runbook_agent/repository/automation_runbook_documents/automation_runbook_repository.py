@@ -2,7 +2,18 @@ from prisma import Prisma
 from runbook_agent.repository.automation_runbook_documents.models import (
     AutomationRunbookDocumentModel,
 )
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+# Marks many runbooks as republished in one statement, each with its own time
+MARK_REPUBLISHED_QUERY = """
+UPDATE "automation_script_documents" AS d
+SET "published_time" = (v."published_time"::timestamptz AT TIME ZONE 'UTC'),
+    "is_indexed" = false,
+    "updated_time" = NOW()
+FROM unnest($1::text[], $2::text[]) AS v("id", "published_time")
+WHERE d."id" = v."id"::uuid
+"""
 
 
 class AutomationRunbookClient:
@@ -116,18 +127,24 @@ class AutomationRunbookClient:
             print(f"Error deleting runbook: {e}")
             return False
 
-    async def get_unindexed_runbooks(self) -> List[AutomationRunbookDocumentModel]:
+    async def get_unindexed_runbooks(
+        self, ids: Optional[List[str]] = None
+    ) -> List[AutomationRunbookDocumentModel]:
         """
         Fetches all runbooks from the database where the 'isIndexed' flag is False.
 
+        Args:
+            ids (List[str], optional): Only consider the runbooks with these ids.
+
         Returns:
             List[AutomationRunbookDocumentModel]: A list of unindexed runbook documents.
         """
         try:
+            where = {"is_indexed": False}
+            if ids is not None:
+                where["id"] = {"in": ids}
             unindexed_runbooks = (
-                await self.client.automation_script_documents.find_many(
-                    where={"is_indexed": False}
-                )
+                await self.client.automation_script_documents.find_many(where=where)
             )
 
             # Convert the results to a list of AutomationRunbookDocumentModel instances
@@ -143,6 +160,8 @@ class AutomationRunbookClient:
                     args=runbook.args,
                     type=runbook.type,
                     tags=runbook.tags,
+                    content_hash=runbook.content_hash,
+                    analysis_version=runbook.analysis_version,
                 )
                 for runbook in unindexed_runbooks
             ]
@@ -180,6 +199,8 @@ class AutomationRunbookClient:
                     args=runbook.args,
                     type=runbook.type,
                     tags=runbook.tags,
+                    content_hash=runbook.content_hash,
+                    analysis_version=runbook.analysis_version,
                 )
             else:
                 return None  # Return None if no matching runbook is found
@@ -216,6 +237,8 @@ class AutomationRunbookClient:
                     args=runbook.args,
                     type=runbook.type,
                     tags=runbook.tags,
+                    content_hash=runbook.content_hash,
+                    analysis_version=runbook.analysis_version,
                 )
             else:
                 return None
@@ -223,3 +246,76 @@ class AutomationRunbookClient:
         except Exception as e:
             print(f"Error fetching runbook by id: {e}")
             return None
+
+    async def get_by_source(self, source: str) -> List[AutomationRunbookDocumentModel]:
+        """
+        Fetches every runbook of a source in a single query.
+
+        Args:
+            source (str): The source of the runbooks.
+
+        Returns:
+            List[AutomationRunbookDocumentModel]: The runbooks, with their id, name,
+                source and published time.
+        """
+        runbooks = await self.client.automation_script_documents.find_many(
+            where={"source": source}
+        )
+        return [
+            AutomationRunbookDocumentModel(
+                id=runbook.id,
+                name=runbook.name,
+                source=runbook.source,
+                published_time=runbook.published_time,
+                is_indexed=runbook.is_indexed,
+                type=runbook.type,
+            )
+            for runbook in runbooks
+        ]
+
+    async def sync_runbooks(
+        self,
+        new_runbooks: List[AutomationRunbookDocumentModel],
+        republished: List[Tuple[str, datetime]],
+        deleted_ids: List[str],
+    ):
+        """
+        Applies the result of a source sync in a single transaction.
+
+        Args:
+            new_runbooks (List[AutomationRunbookDocumentModel]): Runbooks to insert.
+            republished (List[Tuple[str, datetime]]): Ids and new published times of
+                runbooks to mark for reindexing.
+            deleted_ids (List[str]): Ids of runbooks to delete.
+        """
+        async with self.client.tx() as tx:
+            if new_runbooks:
+                await tx.automation_script_documents.create_many(
+                    data=[
+                        {
+                            "name": runbook.name,
+                            "source": runbook.source,
+                            "published_time": runbook.published_time,
+                            "is_indexed": runbook.is_indexed,
+                            "description": runbook.description,
+                            "os_supported": runbook.os_supported,
+                            "args": runbook.args,
+                            "type": runbook.type,
+                            "tags": runbook.tags,
+                        }
+                        for runbook in new_runbooks
+                    ]
+                )
+            if republished:
+                await tx.execute_raw(
+                    MARK_REPUBLISHED_QUERY,
+                    [id for id, _ in republished],
+                    [
+                        published_time.astimezone(timezone.utc).isoformat()
+                        for _, published_time in republished
+                    ],
+                )
+            if deleted_ids:
+                await tx.automation_script_documents.delete_many(
+                    where={"id": {"in": deleted_ids}}
+                )
@@ -2,7 +2,8 @@ from abc import ABC, abstractmethod
 from runbook_agent.repository.automation_runbook_documents.models import (
     AutomationRunbookDocumentModel,
 )
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 
 class AbstractAutomationRunbookService(ABC):
@@ -37,7 +38,7 @@ class AbstractAutomationRunbookService(ABC):
 
     @abstractmethod
     async def get_unindexed_automation_runbook(
-        self,
+        self, ids: Optional[List[str]] = None
     ) -> List[AutomationRunbookDocumentModel]:
         pass
 
@@ -50,3 +51,21 @@ class AbstractAutomationRunbookService(ABC):
         self, runbook_id: str
     ) -> Optional[AutomationRunbookDocumentModel]:
         pass
+
+    @abstractmethod
+    async def get_runbooks_by_source(
+        self, source: str
+    ) -> List[AutomationRunbookDocumentModel]:
+        pass
+
+    @abstractmethod
+    async def sync_runbooks(
+        self,
+        new_runbooks: List[AutomationRunbookDocumentModel],
+        republished: List[Tuple[str, datetime]],
+        deleted: List[AutomationRunbookDocumentModel],
+    ):
+        """
+        Abstract method to insert, mark for reindexing and delete runbooks at once.
+        """
+        pass
@@ -28,6 +28,8 @@ class AutomationRunbookDocumentModel(BaseModel):
     tags: Optional[List[str]] = (
         None  # Tags associated with the runbook for categorization
     )
+    content_hash: Optional[str] = None  # Hash of the content the analysis was made from
+    analysis_version: Optional[str] = None  # Version of the analysis prompt and model
 
     class Config:
         # Custom configuration for serializing datetime objects to ISO format
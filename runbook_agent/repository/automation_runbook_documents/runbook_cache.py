@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from runbook_agent.repository.automation_runbook_documents.models import (
+    AutomationRunbookDocumentModel,
+)
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+
+class RunbookMetadataCache:
+    """
+    In-memory cache of runbook metadata, keyed by id with a secondary index on
+    (name, source).
+
+    Runbook metadata only changes when a runbook is republished or reindexed, and
+    both go through `AutomationRunbookService`, which invalidates the affected
+    entries. The TTL bounds staleness for changes made by other processes.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = cfg.runbook_cache.ttl_seconds,
+        max_entries: int = cfg.runbook_cache.max_entries,
+        enabled: bool = cfg.runbook_cache.enabled,
+    ):
+        """
+        Initialize the runbook cache.
+
+        Args:
+            ttl_seconds (float): Seconds after which an entry is reloaded.
+            max_entries (int): Maximum number of cached runbooks.
+            enabled (bool): When False every lookup is a miss and nothing is stored.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: (
+            "OrderedDict[str, Tuple[AutomationRunbookDocumentModel, float]]"
+        ) = OrderedDict()
+        self._ids_by_name: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a lookup that raced with one does not
+        # store the value it read before the change
+        self._generation = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_by_id(self, runbook_id: str) -> Optional[AutomationRunbookDocumentModel]:
+        """
+        Returns a copy of the cached runbook with the given id, if any.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._get(runbook_id)
+
+    def get_by_name_and_source(
+        self, name: str, source: str
+    ) -> Optional[AutomationRunbookDocumentModel]:
+        """
+        Returns a copy of the cached runbook with the given name and source, if any.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            runbook_id = self._ids_by_name.get((name, source))
+            if runbook_id is None:
+                self._counters["misses"] += 1
+                return None
+            return self._get(runbook_id)
+
+    def put(self, runbook: AutomationRunbookDocumentModel, generation: int):
+        """
+        Stores a runbook loaded from the database.
+
+        Args:
+            runbook (AutomationRunbookDocumentModel): The loaded runbook.
+            generation (int): The cache generation read before the runbook was
+                loaded. The runbook is dropped if an invalidation happened since.
+        """
+        if not self.enabled or runbook is None or runbook.id is None:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[runbook.id] = (
+                runbook.model_copy(deep=True),
+                time.monotonic(),
+            )
+            self._entries.move_to_end(runbook.id)
+            if runbook.name is not None and runbook.source is not None:
+                self._ids_by_name[(runbook.name, runbook.source)] = runbook.id
+            while len(self._entries) > self.max_entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._ids_by_name.pop((evicted.name, evicted.source), None)
+                self._counters["evictions"] += 1
+
+    def invalidate(
+        self,
+        runbook_id: Optional[str] = None,
+        name: Optional[str] = None,
+        source: Optional[str] = None,
+    ):
+        """
+        Drops a runbook by id, or by name and source.
+        """
+        with self._lock:
+            self._generation += 1
+            if runbook_id is None and name is not None:
+                runbook_id = self._ids_by_name.get((name, source))
+            if runbook_id is not None and self._remove(runbook_id):
+                self._counters["invalidations"] += 1
+            if name is not None:
+                self._ids_by_name.pop((name, source), None)
+
+    def clear(self):
+        """
+        Drops every cached runbook.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._ids_by_name.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit/miss counters and the number of cached runbooks.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["entries"] = len(self._entries)
+            return stats
+
+    def _get(self, runbook_id: str) -> Optional[AutomationRunbookDocumentModel]:
+        entry = self._entries.get(runbook_id)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        runbook, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(runbook_id)
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(runbook_id)
+        self._counters["hits"] += 1
+        return runbook.model_copy(deep=True)
+
+    def _remove(self, runbook_id: str) -> bool:
+        entry = self._entries.pop(runbook_id, None)
+        if entry is None:
+            return False
+        runbook, _ = entry
+        self._ids_by_name.pop((runbook.name, runbook.source), None)
+        return True
+
+
+# Singleton instance of the runbook cache, shared by every service instance so an
+# invalidation made through one is seen by all
+_runbook_cache = None
+
+
+def get_runbook_cache() -> RunbookMetadataCache:
+    """
+    Returns the shared runbook cache, creating it on first use.
+    """
+    global _runbook_cache
+    if _runbook_cache is None:
+        _runbook_cache = RunbookMetadataCache()
+    return _runbook_cache
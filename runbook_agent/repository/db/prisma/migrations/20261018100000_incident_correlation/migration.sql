@@ -0,0 +1,8 @@
+-- AlterTable
+ALTER TABLE "incident_jobs" ADD COLUMN     "correlation_key" TEXT;
+
+-- CreateIndex
+CREATE INDEX "incident_jobs_correlation_key_idx" ON "incident_jobs"("correlation_key");
+
+-- CreateIndex
+CREATE INDEX "Event_correlation_key_last_occurrence_time_idx" ON "Event"("correlation_key", "last_occurrence_time");
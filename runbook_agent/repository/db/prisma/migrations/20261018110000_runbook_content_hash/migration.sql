@@ -0,0 +1,3 @@
+-- AlterTable
+ALTER TABLE "automation_script_documents" ADD COLUMN     "analysis_version" TEXT,
+ADD COLUMN     "content_hash" TEXT;
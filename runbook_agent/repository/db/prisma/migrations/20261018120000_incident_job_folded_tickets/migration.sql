@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "incident_jobs" ADD COLUMN     "folded_sys_ids" TEXT[] DEFAULT ARRAY[]::TEXT[];
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "incident_jobs" ADD COLUMN     "progress" JSONB;
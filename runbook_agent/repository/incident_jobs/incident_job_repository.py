@@ -0,0 +1,265 @@
+from datetime import datetime, timedelta, timezone
+from prisma import Json, Prisma
+from runbook_agent.repository.incident_jobs.models import (
+    IncidentJobModel,
+    IncidentJobStatus,
+)
+from typing import Any, Dict, Optional
+
+# Leases the oldest due job. SKIP LOCKED lets any number of workers, in any number
+# of processes, lease concurrently without blocking on or double-leasing a row.
+# Leases that expired without being completed or failed are taken over as well.
+LEASE_JOB_QUERY = """
+UPDATE "incident_jobs"
+SET "status" = 'leased',
+    "leased_by" = $1,
+    "leased_until" = NOW() + make_interval(secs => $2),
+    "attempts" = "attempts" + 1,
+    "updated_at" = NOW()
+WHERE "id" = (
+    SELECT "id" FROM "incident_jobs"
+    WHERE ("status" = 'queued' AND "available_at" <= NOW())
+       OR ("status" = 'leased' AND "leased_until" < NOW())
+    ORDER BY "available_at"
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING "id"
+"""
+
+
+class IncidentJobClient:
+    def __init__(self, prisma_client: Prisma):
+        self.client = prisma_client
+
+    async def enqueue(
+        self,
+        sys_id: str,
+        payload: Dict[str, Any],
+        max_attempts: int,
+        correlation_key: Optional[str] = None,
+    ) -> IncidentJobModel:
+        """
+        Adds a new job to the queue.
+
+        Args:
+            sys_id (str): The ServiceNow sys_id of the incident.
+            payload (Dict[str, Any]): The webhook payload to process.
+            max_attempts (int): Number of attempts before the job is dead-lettered.
+            correlation_key (str, optional): Fingerprint of the incident.
+
+        Returns:
+            IncidentJobModel: The queued job.
+        """
+        job = await self.client.incident_jobs.create(
+            data={
+                "sys_id": sys_id,
+                "payload": Json(payload),
+                "max_attempts": max_attempts,
+                "correlation_key": correlation_key,
+            }
+        )
+        return self._to_model(job)
+
+    async def lease(
+        self, worker_id: str, lease_seconds: int
+    ) -> Optional[IncidentJobModel]:
+        """
+        Leases the next due job for a worker.
+
+        Args:
+            worker_id (str): Identifier of the worker taking the lease.
+            lease_seconds (int): Seconds after which the lease expires.
+
+        Returns:
+            Optional[IncidentJobModel]: The leased job, or None if no job is due.
+        """
+        leased = await self.client.query_first(
+            LEASE_JOB_QUERY, worker_id, float(lease_seconds)
+        )
+        if not leased:
+            return None
+        return await self.get_by_id(leased["id"])
+
+    async def extend_lease(self, id: str, worker_id: str, lease_seconds: int) -> bool:
+        """
+        Extends the lease of a job that is still being processed.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        updated = await self.client.incident_jobs.update_many(
+            where={
+                "id": id,
+                "status": IncidentJobStatus.LEASED.value,
+                "leased_by": worker_id,
+            },
+            data={
+                "leased_until": datetime.now(timezone.utc)
+                + timedelta(seconds=lease_seconds)
+            },
+        )
+        return updated > 0
+
+    async def complete(self, id: str, worker_id: str) -> bool:
+        """
+        Marks a job as completed.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        return await self._transition(
+            id,
+            worker_id,
+            {
+                "status": IncidentJobStatus.COMPLETED.value,
+                "leased_until": None,
+                "last_error": None,
+            },
+        )
+
+    async def retry(
+        self, id: str, worker_id: str, error: str, delay_seconds: float
+    ) -> bool:
+        """
+        Puts a failed job back on the queue once a backoff delay has passed.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        return await self._transition(
+            id,
+            worker_id,
+            {
+                "status": IncidentJobStatus.QUEUED.value,
+                "available_at": datetime.now(timezone.utc)
+                + timedelta(seconds=delay_seconds),
+                "leased_until": None,
+                "leased_by": None,
+                "last_error": error,
+            },
+        )
+
+    async def dead_letter(self, id: str, worker_id: str, error: str) -> bool:
+        """
+        Parks a job that exhausted its attempts so it is not leased again.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        return await self._transition(
+            id,
+            worker_id,
+            {
+                "status": IncidentJobStatus.DEAD.value,
+                "leased_until": None,
+                "last_error": error,
+            },
+        )
+
+    async def save_progress(
+        self, id: str, worker_id: str, progress: Dict[str, Any]
+    ) -> bool:
+        """
+        Stores the side effects a job already caused, so a retry resumes from them.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        updated = await self.client.incident_jobs.update_many(
+            where={
+                "id": id,
+                "status": IncidentJobStatus.LEASED.value,
+                "leased_by": worker_id,
+            },
+            data={"progress": Json(progress)},
+        )
+        return updated > 0
+
+    async def fold(self, id: str, sys_id: str) -> bool:
+        """
+        Attaches a duplicate incident to a job that is still queued or running,
+        so the job's outcome is reported on that incident as well.
+
+        Returns:
+            bool: False if the job already finished and nothing was attached.
+        """
+        updated = await self.client.incident_jobs.update_many(
+            where={
+                "id": id,
+                "status": {
+                    "in": [
+                        IncidentJobStatus.QUEUED.value,
+                        IncidentJobStatus.LEASED.value,
+                    ]
+                },
+            },
+            data={"folded_sys_ids": {"push": [sys_id]}},
+        )
+        return updated > 0
+
+    async def get_by_id(self, id: str) -> Optional[IncidentJobModel]:
+        """
+        Fetches a single job by its id.
+
+        Returns:
+            Optional[IncidentJobModel]: The job or None if not found.
+        """
+        job = await self.client.incident_jobs.find_unique(where={"id": id})
+        return self._to_model(job) if job else None
+
+    async def get_latest_by_correlation_key(
+        self, correlation_key: str
+    ) -> Optional[IncidentJobModel]:
+        """
+        Fetches the most recent job queued for a correlation key.
+
+        Returns:
+            Optional[IncidentJobModel]: The job or None if not found.
+        """
+        job = await self.client.incident_jobs.find_first(
+            where={"correlation_key": correlation_key},
+            order={"created_at": "desc"},
+        )
+        return self._to_model(job) if job else None
+
+    async def count_by_status(self) -> Dict[str, int]:
+        """
+        Returns the number of jobs in each status.
+        """
+        counts = await self.client.incident_jobs.group_by(
+            by=["status"], count={"_all": True}
+        )
+        return {row["status"]: row["_count"]["_all"] for row in counts}
+
+    async def _transition(self, id: str, worker_id: str, data: Dict[str, Any]) -> bool:
+        # Only the current lease holder may move a job on. A worker whose lease
+        # expired must not overwrite the state set by the worker that took over.
+        updated = await self.client.incident_jobs.update_many(
+            where={
+                "id": id,
+                "status": IncidentJobStatus.LEASED.value,
+                "leased_by": worker_id,
+            },
+            data=data,
+        )
+        return updated > 0
+
+    def _to_model(self, job) -> IncidentJobModel:
+        return IncidentJobModel(
+            id=job.id,
+            sys_id=job.sys_id,
+            payload=job.payload,
+            status=job.status,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            available_at=job.available_at,
+            leased_until=job.leased_until,
+            leased_by=job.leased_by,
+            last_error=job.last_error,
+            correlation_key=job.correlation_key,
+            folded_sys_ids=job.folded_sys_ids,
+            progress=job.progress,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
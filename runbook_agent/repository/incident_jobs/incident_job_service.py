@@ -0,0 +1,189 @@
+import logging
+import random
+from prisma import Prisma
+from runbook_agent.repository.incident_jobs.models import (
+    IncidentJobModel,
+    IncidentJobStatus,
+)
+from runbook_agent.repository.incident_jobs.incident_job_repository import (
+    IncidentJobClient,
+)
+from runbook_agent.config import init_config
+from typing import Any, Dict, Optional
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+
+class IncidentJobQueue:
+    """
+    Persistent queue of incidents waiting to be processed, stored in Postgres.
+
+    Jobs are leased rather than popped: a worker that dies mid-job leaves a lease
+    that expires, after which the job is picked up again. Failed jobs are retried
+    with exponential backoff and dead-lettered once they run out of attempts.
+    """
+
+    def __init__(
+        self,
+        prisma_client: Prisma,
+        max_attempts: int = cfg.incident_queue.max_attempts,
+        lease_seconds: int = cfg.incident_queue.lease_seconds,
+        retry_backoff_base: float = cfg.incident_queue.retry_backoff_base,
+        retry_backoff_max: float = cfg.incident_queue.retry_backoff_max,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            prisma_client (Prisma): Connected Prisma client.
+            max_attempts (int): Attempts before a job is dead-lettered.
+            lease_seconds (int): Seconds a worker may hold a job without renewing its lease.
+            retry_backoff_base (float): Delay, in seconds, before the first retry.
+            retry_backoff_max (float): Upper bound, in seconds, for the retry delay.
+        """
+        self.repository = IncidentJobClient(prisma_client)
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_max = retry_backoff_max
+
+    async def enqueue(
+        self,
+        sys_id: str,
+        payload: Dict[str, Any],
+        correlation_key: Optional[str] = None,
+        tx: Optional[Prisma] = None,
+    ) -> IncidentJobModel:
+        """
+        Adds an incident to the queue.
+
+        Args:
+            sys_id (str): The ServiceNow sys_id of the incident.
+            payload (Dict[str, Any]): The webhook payload to process.
+            correlation_key (str, optional): Fingerprint of the incident.
+            tx (Prisma, optional): Transaction to enqueue the job in.
+
+        Returns:
+            IncidentJobModel: The queued job.
+        """
+        return await self._repository(tx).enqueue(
+            sys_id, payload, self.max_attempts, correlation_key
+        )
+
+    async def fold(
+        self, job: IncidentJobModel, sys_id: str, tx: Optional[Prisma] = None
+    ) -> bool:
+        """
+        Attaches a duplicate incident to a queued or running job.
+
+        Returns:
+            bool: False if the job already finished, the incident needs its own job.
+        """
+        return await self._repository(tx).fold(job.id, sys_id)
+
+    async def lease(self, worker_id: str) -> Optional[IncidentJobModel]:
+        """
+        Leases the next due job, or returns None if the queue is empty.
+        """
+        return await self.repository.lease(worker_id, self.lease_seconds)
+
+    async def extend_lease(self, job: IncidentJobModel, worker_id: str) -> bool:
+        """
+        Renews the lease of a job that is still being processed.
+        """
+        return await self.repository.extend_lease(job.id, worker_id, self.lease_seconds)
+
+    async def complete(self, job: IncidentJobModel, worker_id: str) -> bool:
+        """
+        Marks a job as completed.
+
+        Returns:
+            bool: False if the worker lost its lease, the job is left untouched.
+        """
+        completed = await self.repository.complete(job.id, worker_id)
+        if not completed:
+            logger.warning(
+                f"Worker {worker_id} no longer holds job {job.id}, not completing it"
+            )
+        return completed
+
+    async def save_progress(
+        self, job: IncidentJobModel, worker_id: str, progress: Dict[str, Any]
+    ) -> bool:
+        """
+        Records the side effects of a leased job, see `JobProgress`.
+
+        Returns:
+            bool: False if the worker lost its lease, nothing was recorded.
+        """
+        return await self.repository.save_progress(job.id, worker_id, progress)
+
+    async def fail(
+        self, job: IncidentJobModel, error: str, worker_id: str
+    ) -> Optional[str]:
+        """
+        Records a failed attempt, retrying the job later or dead-lettering it.
+
+        Args:
+            job (IncidentJobModel): The leased job that failed.
+            error (str): Description of the failure.
+            worker_id (str): Worker holding the lease on the job.
+
+        Returns:
+            Optional[str]: The new status of the job, None if the worker lost its
+                lease and the job was left untouched.
+        """
+        if job.attempts >= job.max_attempts:
+            logger.error(
+                f"Incident job {job.id} failed {job.attempts} times, dead-lettering: {error}"
+            )
+            status = IncidentJobStatus.DEAD.value
+            updated = await self.repository.dead_letter(job.id, worker_id, error)
+        else:
+            delay = self.retry_delay(job.attempts)
+            logger.warning(
+                f"Incident job {job.id} failed on attempt {job.attempts}, retrying in {delay:.0f}s: {error}"
+            )
+            status = IncidentJobStatus.QUEUED.value
+            updated = await self.repository.retry(job.id, worker_id, error, delay)
+        if not updated:
+            logger.warning(
+                f"Worker {worker_id} no longer holds job {job.id}, not failing it"
+            )
+            return None
+        return status
+
+    def retry_delay(self, attempts: int) -> float:
+        """
+        Returns the backoff delay after the given number of attempts, with jitter.
+        """
+        delay = min(
+            self.retry_backoff_max, self.retry_backoff_base * (2 ** (attempts - 1))
+        )
+        return delay * random.uniform(0.8, 1.2)
+
+    async def get_status(self, id: str) -> Optional[IncidentJobModel]:
+        """
+        Returns a job by its id, or None if it does not exist.
+        """
+        return await self.repository.get_by_id(id)
+
+    async def get_latest_by_correlation_key(
+        self, correlation_key: str, tx: Optional[Prisma] = None
+    ) -> Optional[IncidentJobModel]:
+        """
+        Returns the most recent job queued for a correlation key, if any.
+        """
+        return await self._repository(tx).get_latest_by_correlation_key(correlation_key)
+
+    async def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of jobs in each status.
+        """
+        return await self.repository.count_by_status()
+
+    def _repository(self, tx: Optional[Prisma]) -> IncidentJobClient:
+        # Queries inside a transaction must go through the transaction's client
+        return IncidentJobClient(tx) if tx is not None else self.repository
@@ -0,0 +1,35 @@
+from enum import Enum
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+class IncidentJobStatus(Enum):
+    QUEUED = "queued"  # Waiting for a worker, possibly until a retry backoff expires
+    LEASED = "leased"  # Being processed by a worker
+    COMPLETED = "completed"  # Processed successfully
+    DEAD = "dead"  # Failed max_attempts times, kept for inspection
+
+
+class IncidentJobModel(BaseModel):
+    id: Optional[str] = None  # Unique identifier for the job
+    sys_id: Optional[str] = None  # ServiceNow sys_id of the incident
+    payload: Optional[Dict[str, Any]] = None  # Webhook payload to process
+    status: Optional[str] = None  # One of IncidentJobStatus
+    attempts: Optional[int] = None  # Number of times the job has been leased
+    max_attempts: Optional[int] = None  # Attempts before the job is dead-lettered
+    available_at: Optional[datetime] = None  # Earliest time the job can be leased
+    leased_until: Optional[datetime] = None  # Lease expiry of the current attempt
+    leased_by: Optional[str] = None  # Worker holding the lease
+    last_error: Optional[str] = None  # Error of the last failed attempt
+    correlation_key: Optional[str] = None  # Fingerprint shared by duplicate incidents
+    folded_sys_ids: Optional[List[str]] = None  # Incidents folded into the job
+    progress: Optional[Dict[str, Any]] = None  # Side effects of earlier attempts
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        # Custom configuration for serializing datetime objects to ISO format
+        json_encoders = {
+            datetime: lambda v: v.isoformat()  # Ensures datetime is serialized in ISO format
+        }
@@ -5,6 +5,7 @@ from runbook_agent.repository.vector_store.schemas import (
     QueryDocId,
     QueryVectors,
 )
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 
@@ -21,6 +22,13 @@ class VectorBaseRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def upsert_vectors(self, vectors: List[VectorTable]):
+        """
+        Inserts vectors, replacing the rows that have the same doc_id.
+        """
+        pass
+
     @abstractmethod
     def query_vectors(self, query: QueryVectors):
         """
@@ -28,6 +36,16 @@ class VectorBaseRepository(ABC):
         """
         pass
 
+    def query_vectors_batch(self, queries: List[QueryVectors], max_workers: int = 1):
+        """
+        Runs many queries, returning the results of each in order. Stores that
+        can answer a batch in one operation override it.
+        """
+        if max_workers <= 1 or len(queries) <= 1:
+            return [self.query_vectors(query) for query in queries]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+            return list(pool.map(self.query_vectors, queries))
+
     @abstractmethod
     def delete_by_doc_ids(self, query: List[QueryDocId]):
         """
@@ -41,3 +59,16 @@ class VectorBaseRepository(ABC):
         Queries vectors from the specified table.
         """
         pass
+
+    def maintain_index(self, force: bool = False):
+        """
+        Compacts the storage and brings the indexes up to date. Stores without
+        background maintenance don't need to override it.
+        """
+        return None
+
+    def get_index_state(self):
+        """
+        Returns the storage and index statistics of the store, if it tracks any.
+        """
+        return None
@@ -0,0 +1,235 @@
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import List, Optional
+from lancedb.table import Table
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Index types whose row addresses can be remapped when fragments are compacted.
+# Other vector indexes have to be rebuilt before the table can be compacted.
+REMAPPABLE_INDEX_TYPES = {"IVF_PQ", "IVF_FLAT", "IVF_SQ"}
+
+
+@dataclass
+class IndexState:
+    num_rows: int
+    num_fragments: int
+    num_small_files: int
+    num_deleted_rows: int
+    deleted_ratio: float
+    version: int
+    num_versions: int
+    vector_index_type: Optional[str] = None
+    vector_partitions: Optional[int] = None
+    vector_unindexed_rows: int = 0
+    fts_indexed: bool = False
+    fts_unindexed_rows: int = 0
+    maintenance_due: List[str] = field(default_factory=list)
+
+
+class LanceIndexManager:
+    """
+    Keeps a LanceDB table and its indexes in shape as rows are added and deleted.
+
+    Every write adds a fragment and every delete adds a deletion file, so a table
+    that churns slowly gets slower to scan even though its size barely changes.
+    `maintain` compacts the fragments, cleans up old versions and folds the
+    unindexed rows into the existing indexes once one of the thresholds is
+    crossed. The vector index is only rebuilt from scratch when it is missing or
+    the table outgrew the partition count it was trained with.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        vector_column: str,
+        text_column: str,
+        max_fragments: int = cfg.vector_index.max_fragments,
+        max_unindexed_rows: int = cfg.vector_index.max_unindexed_rows,
+        max_deleted_ratio: float = cfg.vector_index.max_deleted_ratio,
+        max_versions: int = cfg.vector_index.max_versions,
+        min_rows_for_ann: int = cfg.vector_index.min_rows_for_ann,
+        sub_vector_dim: int = cfg.vector_index.sub_vector_dim,
+        cleanup_older_than_seconds: int = cfg.vector_index.cleanup_older_than_seconds,
+    ):
+        """
+        Initialize the index manager.
+
+        Args:
+            table (Table): The LanceDB table to maintain.
+            vector_column (str): Column holding the embeddings.
+            text_column (str): Column covered by the full-text index.
+            max_fragments (int): Fragment count above which the table is compacted.
+            max_unindexed_rows (int): Rows missing from an index before it is updated.
+            max_deleted_ratio (float): Share of deleted rows above which the table is compacted.
+            max_versions (int): Table versions kept before old ones are cleaned up.
+            min_rows_for_ann (int): Rows below which the vector search stays exhaustive.
+            sub_vector_dim (int): Target dimension of each PQ sub-vector.
+            cleanup_older_than_seconds (int): Age of the versions removed on cleanup.
+        """
+        self.table = table
+        self.vector_column = vector_column
+        self.text_column = text_column
+        self.max_fragments = max_fragments
+        self.max_unindexed_rows = max_unindexed_rows
+        self.max_deleted_ratio = max_deleted_ratio
+        self.max_versions = max_versions
+        self.min_rows_for_ann = min_rows_for_ann
+        self.sub_vector_dim = sub_vector_dim
+        self.cleanup_older_than = timedelta(seconds=cleanup_older_than_seconds)
+
+    def get_state(self) -> IndexState:
+        """
+        Returns the fragment, version and index statistics of the table, with the
+        reasons maintenance is due, if any.
+        """
+        dataset = self.table.to_lance()
+        dataset_stats = dataset.stats.dataset_stats()
+        num_rows = self.table.count_rows()
+        state = IndexState(
+            num_rows=num_rows,
+            num_fragments=dataset_stats["num_fragments"],
+            num_small_files=dataset_stats["num_small_files"],
+            num_deleted_rows=dataset_stats["num_deleted_rows"],
+            deleted_ratio=dataset_stats["num_deleted_rows"]
+            / max(num_rows + dataset_stats["num_deleted_rows"], 1),
+            version=dataset.version,
+            num_versions=len(dataset.versions()),
+        )
+
+        for index in dataset.list_indices():
+            index_stats = dataset.stats.index_stats(index["name"])
+            if self.vector_column in index["fields"] and index["type"] != "Inverted":
+                state.vector_index_type = index_stats["index_type"]
+                state.vector_partitions = sum(
+                    delta.get("num_partitions", 0) for delta in index_stats["indices"]
+                )
+                state.vector_unindexed_rows = index_stats["num_unindexed_rows"]
+            elif self.text_column in index["fields"] and index["type"] == "Inverted":
+                state.fts_indexed = True
+                state.fts_unindexed_rows = index_stats["num_unindexed_rows"]
+
+        state.maintenance_due = self._maintenance_due(state)
+        return state
+
+    def maintain(self, force: bool = False) -> IndexState:
+        """
+        Compacts the table, cleans up old versions and updates or rebuilds its
+        indexes when one of the thresholds is crossed.
+
+        Args:
+            force (bool): Run every step even if no threshold is crossed.
+
+        Returns:
+            IndexState: The state of the table after maintenance.
+        """
+        state = self.get_state()
+        if not state.maintenance_due and not force:
+            return state
+        logger.info(
+            f"Maintaining table {self.table.name}: "
+            f"{', '.join(state.maintenance_due) or 'forced'}"
+        )
+
+        # Compaction can't remap the rows of these indexes, rebuild them first
+        if (
+            state.vector_index_type is not None
+            and state.vector_index_type not in REMAPPABLE_INDEX_TYPES
+        ):
+            self.build_vector_index(state.num_rows)
+
+        # Compacts fragments, materializes deletions, updates the indexes with the
+        # unindexed rows and removes versions older than the cleanup age
+        self.table.optimize(cleanup_older_than=self.cleanup_older_than)
+
+        state = self.get_state()
+        if self._needs_vector_rebuild(state):
+            self.build_vector_index(state.num_rows)
+        if not state.fts_indexed and state.num_rows > 0:
+            self.build_fts_index()
+        return self.get_state()
+
+    def build_vector_index(self, num_rows: Optional[int] = None):
+        """
+        Trains the vector index from scratch, sized for the current row count.
+        Tables below `min_rows_for_ann` are left without one, an exhaustive scan
+        over them is both exact and fast.
+        """
+        num_rows = self.table.count_rows() if num_rows is None else num_rows
+        if num_rows < self.min_rows_for_ann:
+            return
+        dimension = self.table.schema.field(self.vector_column).type.list_size
+        partitions = self._num_partitions(num_rows)
+        sub_vectors = self._num_sub_vectors(dimension)
+        logger.info(
+            f"Building vector index on {self.table.name} with {partitions} "
+            f"partitions and {sub_vectors} sub-vectors over {num_rows} rows"
+        )
+        self.table.create_index(
+            index_type="IVF_PQ",
+            metric="cosine",
+            vector_column_name=self.vector_column,
+            num_partitions=partitions,
+            num_sub_vectors=sub_vectors,
+            index_cache_size=102800,
+            replace=True,
+        )
+
+    def build_fts_index(self):
+        """
+        Builds the full-text index over the text column from scratch.
+        """
+        self.table.create_fts_index(self.text_column, use_tantivy=False, replace=True)
+
+    def _maintenance_due(self, state: IndexState) -> List[str]:
+        reasons = []
+        if state.num_fragments > self.max_fragments:
+            reasons.append(f"{state.num_fragments} fragments")
+        if state.deleted_ratio > self.max_deleted_ratio:
+            reasons.append(f"{state.deleted_ratio:.0%} deleted rows")
+        if state.num_versions > self.max_versions:
+            reasons.append(f"{state.num_versions} versions")
+        if state.vector_unindexed_rows > self.max_unindexed_rows:
+            reasons.append(
+                f"{state.vector_unindexed_rows} rows missing from vector index"
+            )
+        if state.fts_unindexed_rows > self.max_unindexed_rows:
+            reasons.append(f"{state.fts_unindexed_rows} rows missing from text index")
+        # A table that was empty at startup has no text index to update yet
+        if not state.fts_indexed and state.num_rows > 0:
+            reasons.append("no text index")
+        if self._needs_vector_rebuild(state):
+            reasons.append("vector index out of date")
+        return reasons
+
+    def _needs_vector_rebuild(self, state: IndexState) -> bool:
+        if state.num_rows < self.min_rows_for_ann:
+            return False
+        if state.vector_index_type is None:
+            return True
+        if state.vector_index_type not in REMAPPABLE_INDEX_TYPES:
+            return True
+        # Incremental updates reuse the trained centroids, retrain once the table
+        # is far from the size they were chosen for
+        ideal = self._num_partitions(state.num_rows)
+        return not state.vector_partitions or not (
+            state.vector_partitions / 2 <= ideal <= state.vector_partitions * 2
+        )
+
+    @staticmethod
+    def _num_partitions(num_rows: int) -> int:
+        return max(1, int(math.sqrt(num_rows)))
+
+    def _num_sub_vectors(self, dimension: int) -> int:
+        # Largest divisor of the dimension that keeps sub-vectors at least
+        # `sub_vector_dim` wide
+        target = max(1, dimension // self.sub_vector_dim)
+        for sub_vectors in range(target, 0, -1):
+            if dimension % sub_vectors == 0:
+                return sub_vectors
+        return 1
@@ -1,14 +1,28 @@
 # app/vector_store/lancedb_repository.py
 from runbook_agent.repository.vector_store.base_repository import VectorBaseRepository
+from runbook_agent.repository.vector_store.index_manager import (
+    IndexState,
+    LanceIndexManager,
+)
 from runbook_agent.repository.vector_store.schemas import (
     VectorTable,
     QueryDocId,
     QueryVectors,
+    QueryType,
     SearchResult,
+    VectorFilters,
 )
 from runbook_agent.clients.lance_db import lancedb_client
-from typing import List
+from runbook_agent.config import init_config
+from typing import Dict, List, Optional
 from lancedb.pydantic import pydantic_to_schema
+import logging
+import pyarrow as pa
+import threading
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
 
 
 # TODO : Check how concurrent writes are handled and implement necessary changes
@@ -17,16 +31,33 @@ class LanceDBRepository(VectorBaseRepository):
     LanceDB repository implementation for vector storage.
     """
 
-    def __init__(self, table_name: str):
+    def __init__(
+        self,
+        table_name: str,
+        rrf_k: int = cfg.vector_search.rrf_k,
+        candidate_multiplier: int = cfg.vector_search.candidate_multiplier,
+    ):
         """
         Initialize the LanceDB repository with the provided LanceDB client.
 
         Args:
-        client (LanceDBClient): The LanceDB client instance.
+            table_name (str): Name of the table holding the vectors.
+            rrf_k (int): Rank offset of reciprocal-rank fusion in hybrid search.
+            candidate_multiplier (int): Candidates fetched per result from each
+                search of a hybrid query.
         """
         self.client = lancedb_client
         self.table = None
+        self.rrf_k = rrf_k
+        self.candidate_multiplier = candidate_multiplier
+        # Serialises writes with compaction, which rewrites the same fragments
+        self._write_lock = threading.Lock()
         self._create_table(table_name=table_name)
+        self.index_manager = LanceIndexManager(
+            self.table,
+            vector_column=VectorTable.get_vector_field(),
+            text_column=VectorTable.get_text_field(),
+        )
         self.refine_factor = 3
 
     def _create_table(self, table_name: str):
@@ -43,20 +74,79 @@ class LanceDBRepository(VectorBaseRepository):
             self.table = self.client.create_table(name=table_name, schema=schema_dict)
         else:
             self.table = self.client.open_table(name=table_name)
+            self._add_missing_columns()
+        self._ensure_fts_index()
 
-    def create_index(self):
-        sub_vectors = 8
-        partitions = int((self.table.count_rows() * sub_vectors) / 20000)
-        if partitions <= 0:
-            return
-        self.table.create_index(
-            index_type="IVF_HNSW_PQ",
-            metric="cosine",
-            num_partitions=partitions,
-            num_sub_vectors=sub_vectors,
-            index_cache_size=102800,
+    def _add_missing_columns(self):
+        """
+        Adds the metadata columns to tables created before they existed.
+        """
+        existing_columns = set(self.table.schema.names)
+        missing_columns = {
+            field: "CAST(NULL AS STRING)"
+            for field in VectorTable.get_metadata_fields()
+            if field not in existing_columns
+        }
+        if missing_columns:
+            self.table.add_columns(missing_columns)
+
+    def _has_fts_index(self) -> bool:
+        try:
+            indices = self.table.to_lance().list_indices()
+        except Exception:
+            return False
+        return any(
+            index["type"] == "Inverted"
+            and VectorTable.get_text_field() in index["fields"]
+            for index in indices
         )
 
+    def _ensure_fts_index(self, replace: bool = False):
+        """
+        Creates the full-text index over the text column. Rows written after the
+        index was built are still searched, without the index, until it is rebuilt.
+        """
+        if not replace and self._has_fts_index():
+            return
+        # An index built over an empty table is not registered, build it once
+        # there are rows, which maintenance also does
+        if self.table.count_rows() == 0:
+            return
+        try:
+            self.table.create_fts_index(
+                VectorTable.get_text_field(), use_tantivy=False, replace=True
+            )
+        except Exception as e:
+            logger.warning(f"Unable to create full-text index: {str(e)}")
+
+    def create_index(self):
+        """
+        Rebuilds the vector and full-text indexes from scratch.
+        """
+        with self._write_lock:
+            self.index_manager.build_vector_index()
+            self._ensure_fts_index(replace=True)
+
+    def maintain_index(self, force: bool = False) -> IndexState:
+        """
+        Compacts the table and brings its indexes up to date once fragments,
+        deleted rows or unindexed rows cross their thresholds.
+
+        Args:
+            force (bool): Run maintenance even if no threshold is crossed.
+
+        Returns:
+            IndexState: The state of the table after maintenance.
+        """
+        with self._write_lock:
+            return self.index_manager.maintain(force=force)
+
+    def get_index_state(self) -> IndexState:
+        """
+        Returns the fragment, version and index statistics of the table.
+        """
+        return self.index_manager.get_state()
+
     def insert_vectors(self, vectors: List[VectorTable]):
         """
         Inserts vectors into the specified table in LanceDB.
@@ -65,8 +155,39 @@ class LanceDBRepository(VectorBaseRepository):
             table_name (str): The table where vectors will be inserted.
             vectors (list): List of vectors (dictionaries) to be inserted.
         """
-        vectors_dict = [vector.model_dump() for vector in vectors]
-        self.table.add(vectors_dict)
+        if not vectors:
+            return
+        # Build one Arrow table so the whole list lands in a single fragment
+        vectors_table = pa.Table.from_pylist(
+            [vector.model_dump() for vector in vectors], schema=self.table.schema
+        )
+        with self._write_lock:
+            self.table.add(vectors_table)
+
+    def upsert_vectors(self, vectors: List[VectorTable]):
+        """
+        Inserts vectors, replacing the rows that have the same doc_id, in a single
+        commit so a document is never missing while it is being rewritten.
+
+        Args:
+            vectors (List[VectorTable]): Vectors to upsert. When a doc_id appears
+                more than once the last vector wins.
+        """
+        if not vectors:
+            return
+        # merge_insert rejects a source with duplicate keys
+        latest = {vector.doc_id: vector for vector in vectors}
+        vectors_table = pa.Table.from_pylist(
+            [vector.model_dump() for vector in latest.values()],
+            schema=self.table.schema,
+        )
+        with self._write_lock:
+            (
+                self.table.merge_insert(VectorTable.get_doc_id_field())
+                .when_matched_update_all()
+                .when_not_matched_insert_all()
+                .execute(vectors_table)
+            )
 
     def delete_by_doc_ids(self, query_data: List[QueryDocId]):
         """
@@ -80,32 +201,114 @@ class LanceDBRepository(VectorBaseRepository):
             Exception: If deletion fails.
         """
         doc_ids = [query.doc_id for query in query_data]
-        doc_ids_string = ", ".join([f"'{str(v)}'" for v in doc_ids])
-        self.table.delete(f"{VectorTable.get_doc_id_field()} IN ({doc_ids_string})")
+        if not doc_ids:
+            return
+        doc_ids_string = ", ".join(self._quote(doc_id) for doc_id in doc_ids)
+        with self._write_lock:
+            self.table.delete(f"{VectorTable.get_doc_id_field()} IN ({doc_ids_string})")
 
-    def query_vectors(self, query_data: QueryVectors):
+    def query_vectors(self, query_data: QueryVectors) -> List[SearchResult]:
         """
         Queries vectors from the table using the given query.
 
+        Vector searches push the metadata filters down as a pre-filter. Hybrid
+        searches also run a full-text search over the text column and fuse both
+        rankings with reciprocal-rank fusion.
+
         Args:
-            query_data (List[QueryVectors]): List of query data, each item being a query object.
-        """
-        # Convert query objects to dictionary format
-        results = (
-            self.table.search(query=query_data.query_vector, query_type="vector")
-            .limit(query_data.k)
-            .refine_factor(self.refine_factor)
-            .metric("cosine")
-        )
-        resultsList = results.to_list()
-        search_results = [
-            SearchResult(
-                doc_id=resultsList[i][VectorTable.get_doc_id_field()],
-                distance=resultsList[i]["_distance"],
-                text=resultsList[i][VectorTable.get_text_field()],
-                file_name=resultsList[i][VectorTable.get_file_name_field()],
-                page_label=resultsList[i][VectorTable.get_page_label_field()],
+            query_data (QueryVectors): The query vector, k, filters and query type.
+        """
+        where = self._build_filter(query_data.filters)
+        if query_data.query_type == QueryType.HYBRID and query_data.query_text:
+            return self._hybrid_search(query_data, where)
+
+        rows = self._vector_search(query_data.query_vector, query_data.k, where)
+        return [self._to_search_result(row) for row in rows]
+
+    def _vector_search(
+        self, query_vector: List[float], limit: int, where: Optional[str]
+    ) -> List[Dict]:
+        query = self.table.search(query=query_vector, query_type="vector")
+        if where:
+            query = query.where(where, prefilter=True)
+        return (
+            query.limit(limit).refine_factor(self.refine_factor).metric("cosine")
+        ).to_list()
+
+    def _keyword_search(
+        self, query_text: str, limit: int, where: Optional[str]
+    ) -> List[Dict]:
+        query = self.table.search(query=query_text, query_type="fts")
+        if where:
+            # Pre-filtering full-text search is unreliable on this LanceDB
+            # version, so filter the already ranked candidates instead
+            query = query.where(where, prefilter=False)
+        return query.limit(limit).to_list()
+
+    def _hybrid_search(
+        self, query_data: QueryVectors, where: Optional[str]
+    ) -> List[SearchResult]:
+        candidates = query_data.k * self.candidate_multiplier
+        vector_rows = self._vector_search(query_data.query_vector, candidates, where)
+        try:
+            keyword_rows = self._keyword_search(
+                query_data.query_text, candidates, where
             )
-            for i in range(len(resultsList))
+        except Exception as e:
+            logger.warning(f"Full-text search failed, using vector search: {str(e)}")
+            keyword_rows = []
+
+        # Reciprocal-rank fusion, scores only depend on ranks so the vector
+        # distances and BM25 scores don't need to be on the same scale
+        scores: Dict[str, float] = {}
+        rows: Dict[str, Dict] = {}
+        for ranking in (vector_rows, keyword_rows):
+            for rank, row in enumerate(ranking):
+                doc_id = row[VectorTable.get_doc_id_field()]
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                # Keep the vector row so the result carries its distance
+                rows.setdefault(doc_id, row)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[: query_data.k]
+        return [
+            self._to_search_result(rows[doc_id], score=scores[doc_id])
+            for doc_id in ranked
         ]
-        return search_results
+
+    def _build_filter(self, filters: Optional[VectorFilters]) -> Optional[str]:
+        if filters is None:
+            return None
+        # Rows indexed before a column existed have no value for it, and are
+        # kept rather than silently dropped until they are reindexed
+        clauses = []
+        if filters.source:
+            clauses.append(
+                f"(source IS NULL OR source = {self._quote(filters.source)})"
+            )
+        if filters.runbook_type:
+            clauses.append(
+                f"(runbook_type IS NULL OR runbook_type = {self._quote(filters.runbook_type)})"
+            )
+        if filters.os_supported:
+            os_clauses = " OR ".join(
+                f"os_supported LIKE {self._quote(f'%,{os.strip().lower()},%')}"
+                for os in filters.os_supported
+            )
+            clauses.append(f"(os_supported IS NULL OR {os_clauses})")
+        return " AND ".join(clauses) or None
+
+    @staticmethod
+    def _quote(value: str) -> str:
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def _to_search_result(
+        self, row: Dict, score: Optional[float] = None
+    ) -> SearchResult:
+        return SearchResult(
+            doc_id=row[VectorTable.get_doc_id_field()],
+            distance=row.get("_distance"),
+            text=row[VectorTable.get_text_field()],
+            file_name=row[VectorTable.get_file_name_field()],
+            page_label=row[VectorTable.get_page_label_field()],
+            score=score,
+        )
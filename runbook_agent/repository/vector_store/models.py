@@ -3,3 +3,4 @@ from enum import Enum
 
 class VectorStores(Enum):
     LANCEDB = "lancedb"
+    NUMPY = "numpy"
@@ -0,0 +1,452 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from runbook_agent.repository.vector_store.base_repository import VectorBaseRepository
+from runbook_agent.repository.vector_store.schemas import (
+    VectorTable,
+    QueryDocId,
+    QueryVectors,
+    QueryType,
+    SearchResult,
+    VectorFilters,
+)
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Metadata columns stored next to the vectors
+ROW_FIELDS = [
+    "doc_id",
+    "text",
+    "file_name",
+    "page_label",
+    "source",
+    "runbook_type",
+    "os_supported",
+]
+
+
+@dataclass
+class NumpyStoreState:
+    num_rows: int
+    num_snapshot_rows: int
+    num_log_rows: int
+    num_deleted_rows: int
+    num_log_entries: int
+    generation: int
+    dtype: str
+    maintenance_due: bool
+
+
+class NumpyVectorRepository(VectorBaseRepository):
+    """
+    Exact nearest-neighbour search over an in-process NumPy matrix.
+
+    For a corpus of a few thousand vectors a brute-force dot product is cheaper
+    than any ANN index round trip, and it is exact. Vectors are normalized on
+    write so cosine similarity is a single matrix-vector product, and top-k is
+    selected with `argpartition`.
+
+    On disk a table is a generation of three files: a snapshot matrix that is
+    memory-mapped, the metadata of its rows, and an append-only log of the
+    upserts and deletes made since. The log is replayed on load and folded into a
+    new snapshot generation once it grows past `max_log_entries`, or once too
+    many snapshot rows are deleted.
+
+    There is no full-text index, hybrid queries are answered by vector search.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        directory: str = cfg.numpy_store.dir,
+        dtype: str = cfg.numpy_store.dtype,
+        max_log_entries: int = cfg.numpy_store.max_log_entries,
+        max_deleted_ratio: float = cfg.numpy_store.max_deleted_ratio,
+    ):
+        """
+        Initialize the repository, loading the table from disk if it exists.
+
+        Args:
+            table_name (str): Name of the table holding the vectors.
+            directory (str): Directory the tables are stored in.
+            dtype (str): "float32", or "float16" to halve the memory footprint.
+            max_log_entries (int): Log entries after which a new snapshot is written.
+            max_deleted_ratio (float): Share of deleted rows after which a new
+                snapshot is written.
+        """
+        self.path = os.path.join(directory, table_name)
+        self.dtype = np.dtype(dtype)
+        self.max_log_entries = max_log_entries
+        self.max_deleted_ratio = max_deleted_ratio
+        self._lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    def insert_vectors(self, vectors: List[VectorTable]):
+        """
+        Inserts vectors into the table.
+
+        Args:
+            vectors (List[VectorTable]): Vectors to insert. Rows are keyed on
+                doc_id, so a vector replaces any stored under the same doc_id.
+        """
+        self.upsert_vectors(vectors)
+
+    def upsert_vectors(self, vectors: List[VectorTable]):
+        """
+        Inserts vectors, replacing the rows that have the same doc_id.
+
+        Args:
+            vectors (List[VectorTable]): Vectors to upsert.
+        """
+        if not vectors:
+            return
+        rows = [
+            {field: getattr(vector, field) for field in ROW_FIELDS}
+            for vector in vectors
+        ]
+        matrix = self._normalize(
+            np.asarray([vector.vector for vector in vectors], dtype=np.float32)
+        )
+        with self._lock:
+            self._append_log({"op": "upsert", "rows": rows, "vectors": matrix.tolist()})
+            self._apply_upsert(rows, matrix)
+            self._compact_if_needed()
+
+    def delete_by_doc_ids(self, query_data: List[QueryDocId]):
+        """
+        Deletes the rows of the given doc_ids.
+
+        Args:
+            query_data (List[QueryDocId]): The doc_ids to delete.
+        """
+        doc_ids = [query.doc_id for query in query_data]
+        if not doc_ids:
+            return
+        with self._lock:
+            self._append_log({"op": "delete", "doc_ids": doc_ids})
+            self._apply_delete(doc_ids)
+            self._compact_if_needed()
+
+    def query_vectors(self, query_data: QueryVectors) -> List[SearchResult]:
+        """
+        Returns the k rows closest to the query vector.
+
+        Args:
+            query_data (QueryVectors): The query vector, k and filters.
+        """
+        return self.query_vectors_batch([query_data])[0]
+
+    def query_vectors_batch(
+        self, queries: List[QueryVectors], max_workers: int = 1
+    ) -> List[List[SearchResult]]:
+        """
+        Answers many queries with a single matrix product.
+
+        Args:
+            queries (List[QueryVectors]): The queries to answer.
+            max_workers (int): Unused, the matrix product is already parallel.
+
+        Returns:
+            List[List[SearchResult]]: The results of each query, in order.
+        """
+        if not queries:
+            return []
+        if any(query.query_type == QueryType.HYBRID for query in queries):
+            logger.debug("NumPy vector store has no text index, using vector search")
+
+        query_matrix = self._normalize(
+            np.asarray([query.query_vector for query in queries], dtype=np.float32)
+        )
+        with self._lock:
+            snapshot, log_matrix, rows, alive = (
+                self._snapshot,
+                self._log_matrix,
+                self._rows,
+                self._alive,
+            )
+            if not rows:
+                return [[] for _ in queries]
+            filter_masks = [self._filter_mask(query.filters) for query in queries]
+
+        # (queries x rows) cosine similarities, accumulated in float32
+        scores = np.concatenate(
+            [
+                query_matrix @ snapshot.T.astype(np.float32, copy=False),
+                query_matrix @ log_matrix.T.astype(np.float32, copy=False),
+            ],
+            axis=1,
+        )
+
+        results = []
+        for query, row_scores, mask in zip(queries, scores, filter_masks):
+            candidates = np.flatnonzero(alive if mask is None else alive & mask)
+            if candidates.size == 0 or query.k <= 0:
+                results.append([])
+                continue
+            candidate_scores = row_scores[candidates]
+            k = min(query.k, candidates.size)
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            top = top[np.argsort(-candidate_scores[top])]
+            results.append(
+                [
+                    self._to_search_result(
+                        rows[candidates[index]], candidate_scores[index]
+                    )
+                    for index in top
+                ]
+            )
+        return results
+
+    def create_index(self):
+        """
+        Writes a new snapshot. Exact search needs no other index.
+        """
+        with self._lock:
+            self._compact()
+
+    def maintain_index(self, force: bool = False) -> NumpyStoreState:
+        """
+        Folds the append log into a new snapshot when it grew too large.
+
+        Args:
+            force (bool): Write a new snapshot even if no threshold is crossed.
+
+        Returns:
+            NumpyStoreState: The state of the table after maintenance.
+        """
+        with self._lock:
+            if force:
+                self._compact()
+            else:
+                self._compact_if_needed()
+            return self.get_index_state()
+
+    def get_index_state(self) -> NumpyStoreState:
+        """
+        Returns the row, log and snapshot statistics of the table.
+        """
+        with self._lock:
+            return NumpyStoreState(
+                num_rows=int(self._alive.sum()),
+                num_snapshot_rows=len(self._snapshot),
+                num_log_rows=len(self._log_matrix),
+                num_deleted_rows=int((~self._alive).sum()),
+                num_log_entries=self._log_entries,
+                generation=self._generation,
+                dtype=self.dtype.name,
+                maintenance_due=self._needs_compaction(),
+            )
+
+    def _file(self, name: str, generation: int) -> str:
+        return os.path.join(self.path, f"{name}-{generation}")
+
+    def _load(self):
+        manifest_path = os.path.join(self.path, "CURRENT")
+        self._generation = 0
+        self._dimension: Optional[int] = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self._generation = manifest["generation"]
+            self._dimension = manifest["dimension"]
+
+        vectors_path = self._file("vectors", self._generation) + ".npy"
+        if os.path.exists(vectors_path):
+            self._snapshot = np.load(vectors_path, mmap_mode="r")
+            with open(self._file("rows", self._generation) + ".jsonl") as f:
+                self._rows = [json.loads(line) for line in f]
+        else:
+            self._snapshot = np.zeros((0, self._dimension or 0), dtype=self.dtype)
+            self._rows = []
+        self._log_matrix = np.zeros((0, self._snapshot.shape[1]), dtype=self.dtype)
+        self._alive = np.ones(len(self._rows), dtype=bool)
+        self._positions: Dict[str, int] = {
+            row["doc_id"]: position for position, row in enumerate(self._rows)
+        }
+        self._filter_masks: Dict[str, np.ndarray] = {}
+
+        # Replay the writes made since the snapshot
+        self._log_entries = 0
+        log_path = self._file("log", self._generation) + ".jsonl"
+        if os.path.exists(log_path):
+            # End of the last complete entry, anything past it is cut off
+            valid_size = 0
+            with open(log_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("missing newline")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash, the write was never acknowledged
+                        logger.warning(f"Skipping corrupt log entry in {log_path}")
+                        continue
+                    if entry["op"] == "upsert":
+                        self._apply_upsert(
+                            entry["rows"], np.asarray(entry["vectors"], np.float32)
+                        )
+                    elif entry["op"] == "delete":
+                        self._apply_delete(entry["doc_ids"])
+                    self._log_entries += 1
+                    valid_size = f.tell()
+            if os.path.getsize(log_path) > valid_size:
+                # Otherwise the next write would be appended to the torn line and
+                # be lost on the following load
+                with open(log_path, "r+b") as f:
+                    f.truncate(valid_size)
+                    os.fsync(f.fileno())
+        self._log = open(log_path, "a")
+        logger.info(
+            f"Loaded {int(self._alive.sum())} vectors from {self.path} "
+            f"(generation {self._generation}, {self._log_entries} log entries)"
+        )
+
+    def _append_log(self, entry: Dict):
+        self._log.write(json.dumps(entry) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log_entries += 1
+
+    def _apply_upsert(self, rows: List[Dict], matrix: np.ndarray):
+        if self._dimension is None:
+            self._dimension = matrix.shape[1]
+            self._snapshot = np.zeros((0, self._dimension), dtype=self.dtype)
+            self._log_matrix = np.zeros((0, self._dimension), dtype=self.dtype)
+        elif matrix.shape[1] != self._dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self._dimension}, got {matrix.shape[1]}"
+            )
+        self._apply_delete([row["doc_id"] for row in rows])
+
+        # Later rows win when a batch repeats a doc_id
+        latest = {row["doc_id"]: index for index, row in enumerate(rows)}
+        indices = sorted(latest.values())
+        start = len(self._rows)
+        self._log_matrix = np.concatenate(
+            [self._log_matrix, matrix[indices].astype(self.dtype)]
+        )
+        self._rows = self._rows + [rows[index] for index in indices]
+        self._alive = np.concatenate([self._alive, np.ones(len(indices), dtype=bool)])
+        for offset, index in enumerate(indices):
+            self._positions[rows[index]["doc_id"]] = start + offset
+        self._filter_masks = {}
+
+    def _apply_delete(self, doc_ids: List[str]):
+        positions = [
+            self._positions.pop(doc_id)
+            for doc_id in doc_ids
+            if doc_id in self._positions
+        ]
+        if positions:
+            # Copy so queries holding the previous mask are not affected
+            self._alive = self._alive.copy()
+            self._alive[positions] = False
+
+    def _needs_compaction(self) -> bool:
+        total = len(self._alive)
+        deleted = total - int(self._alive.sum())
+        return self._log_entries > self.max_log_entries or (
+            total > 0 and deleted / total > self.max_deleted_ratio
+        )
+
+    def _compact_if_needed(self):
+        if self._needs_compaction():
+            self._compact()
+
+    def _compact(self):
+        positions = np.flatnonzero(self._alive)
+        snapshot_size = len(self._snapshot)
+        snapshot_positions = positions[positions < snapshot_size]
+        log_positions = positions[positions >= snapshot_size] - snapshot_size
+        matrix = np.concatenate(
+            [self._snapshot[snapshot_positions], self._log_matrix[log_positions]]
+        ).astype(self.dtype)
+        rows = [self._rows[position] for position in positions]
+
+        # Write the next generation next to the current one, then switch over
+        generation = self._generation + 1
+        np.save(self._file("vectors", generation) + ".npy", matrix)
+        with open(self._file("rows", generation) + ".jsonl", "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        manifest_path = os.path.join(self.path, "CURRENT")
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump({"generation": generation, "dimension": self._dimension}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        previous = self._generation
+        self._log.close()
+        self._load()
+        for name, suffix in (
+            ("vectors", ".npy"),
+            ("rows", ".jsonl"),
+            ("log", ".jsonl"),
+        ):
+            try:
+                os.remove(self._file(name, previous) + suffix)
+            except FileNotFoundError:
+                pass
+        logger.info(f"Wrote snapshot {generation} of {self.path} with {len(rows)} rows")
+
+    def _filter_mask(self, filters: Optional[VectorFilters]) -> Optional[np.ndarray]:
+        if filters is None:
+            return None
+        key = filters.model_dump_json()
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            # Rows without a value for a field are kept, as in the LanceDB store
+            os_patterns = [
+                f",{os.strip().lower()}," for os in filters.os_supported or []
+            ]
+            mask = np.fromiter(
+                (
+                    (
+                        not filters.source
+                        or row.get("source") is None
+                        or row["source"] == filters.source
+                    )
+                    and (
+                        not filters.runbook_type
+                        or row.get("runbook_type") is None
+                        or row["runbook_type"] == filters.runbook_type
+                    )
+                    and (
+                        not os_patterns
+                        or row.get("os_supported") is None
+                        or any(
+                            pattern in row["os_supported"] for pattern in os_patterns
+                        )
+                    )
+                    for row in self._rows
+                ),
+                dtype=bool,
+                count=len(self._rows),
+            )
+            self._filter_masks[key] = mask
+        return mask
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def _to_search_result(self, row: Dict, similarity: float) -> SearchResult:
+        return SearchResult(
+            doc_id=row["doc_id"],
+            # Cosine distance, as returned by the LanceDB store
+            distance=float(1 - similarity),
+            text=row["text"],
+            file_name=row["file_name"],
+            page_label=row.get("page_label"),
+        )
@@ -1,3 +1,4 @@
+from enum import Enum
 from pydantic import BaseModel
 from typing import List, Optional
 from lancedb.pydantic import Vector
@@ -14,6 +15,21 @@ class VectorTable(BaseModel):
     text: str
     file_name: str
     page_label: Optional[str] = None
+    # Filterable metadata
+    source: Optional[str] = None
+    runbook_type: Optional[str] = None
+    # Delimited as ",linux,windows," so a single LIKE matches one OS
+    os_supported: Optional[str] = None
+
+    @classmethod
+    def get_metadata_fields(cls) -> List[str]:
+        return ["source", "runbook_type", "os_supported"]
+
+    @classmethod
+    def format_os_supported(cls, os_supported: Optional[List[str]]) -> Optional[str]:
+        if not os_supported:
+            return None
+        return "," + ",".join(os.strip().lower() for os in os_supported) + ","
 
     @classmethod
     def get_vector_field(cls) -> str:
@@ -44,14 +60,30 @@ class QueryDocId(BaseModel):
     doc_id: str
 
 
+class QueryType(Enum):
+    VECTOR = "vector"
+    HYBRID = "hybrid"
+
+
+class VectorFilters(BaseModel):
+    source: Optional[str] = None
+    runbook_type: Optional[str] = None
+    # Matches documents supporting any of the given operating systems
+    os_supported: Optional[List[str]] = None
+
+
 class QueryVectors(BaseModel):
     query_vector: List[float]
     k: int = 5
+    query_text: Optional[str] = None  # Keyword query, required for hybrid search
+    query_type: QueryType = QueryType.VECTOR
+    filters: Optional[VectorFilters] = None
 
 
 class SearchResult(BaseModel):
     doc_id: str
-    distance: float
+    distance: Optional[float] = None  # None when only the keyword search matched
     text: str
     file_name: str
     page_label: Optional[str]
+    score: Optional[float] = None  # Fused rank score of a hybrid search
@@ -3,6 +3,7 @@
 from typing import List
 from runbook_agent.repository.vector_store.base_repository import VectorBaseRepository
 from runbook_agent.repository.vector_store.lance_db import LanceDBRepository
+from runbook_agent.repository.vector_store.numpy_store import NumpyVectorRepository
 from runbook_agent.repository.vector_store.schemas import (
     VectorTable,
     QueryDocId,
@@ -42,6 +43,10 @@ class VectorStoreService:
             # Initialize LanceDB repository
             return LanceDBRepository(table_name=self.table_name)
 
+        elif self.vector_store_name == VectorStores.NUMPY:
+            # Exact in-process search, for corpora small enough to scan
+            return NumpyVectorRepository(table_name=self.table_name)
+
         else:
             raise ValueError(f"Unsupported vector store: {self.vector_store_name}")
 
@@ -54,6 +59,15 @@ class VectorStoreService:
         """
         self.repository.insert_vectors(vectors)
 
+    def upsert_vectors(self, vectors: List[VectorTable]):
+        """
+        Insert vectors, replacing any stored under the same doc_id, in a single write.
+
+        Args:
+            vectors (List[VectorTable]): List of vectors to upsert.
+        """
+        self.repository.upsert_vectors(vectors)
+
     def query_vectors(self, query: QueryVectors):
         """
         Query vectors from the selected vector store via the repository.
@@ -63,6 +77,20 @@ class VectorStoreService:
         """
         return self.repository.query_vectors(query)
 
+    def query_vectors_batch(self, queries: List[QueryVectors], max_workers: int = 1):
+        """
+        Run many queries against the selected vector store via the repository.
+
+        Args:
+            queries (List[QueryVectors]): Queries to search for vectors.
+            max_workers (int): Queries run in parallel by stores that search one
+                query at a time.
+
+        Returns:
+            List[List[SearchResult]]: The results of each query, in order.
+        """
+        return self.repository.query_vectors_batch(queries, max_workers=max_workers)
+
     def delete_by_doc_ids(self, query: List[QueryDocId]):
         """
         Delete vectors based on document name from the vector store.
@@ -77,3 +105,18 @@ class VectorStoreService:
         Create index on table
         """
         self.repository.create_index()
+
+    def maintain_index(self, force: bool = False):
+        """
+        Compact the table and update its indexes when they drifted.
+
+        Args:
+            force (bool): Run maintenance even if no threshold is crossed.
+        """
+        return self.repository.maintain_index(force=force)
+
+    def get_index_state(self):
+        """
+        Get the storage and index statistics of the table
+        """
+        return self.repository.get_index_state()
@@ -23,6 +23,13 @@ class BaseExecutionService(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_job_output(self, resource_group, automation_account_name, job_name):
+        """
+        Retrieve the output of the runbook job.
+        """
+        pass
+
     @abstractmethod
     def wait_for_runbook_completion(
         self, resource_group, automation_account_name, job_id, hook_function
@@ -0,0 +1,228 @@
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set, Tuple
+from runbook_agent.runbook_executor.base_execution_service import (
+    BaseExecutionService,
+)
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+logger = logging.getLogger(__name__)
+
+# Job states after which Azure Automation will not change the job any more
+TERMINAL_STATUSES = ("Completed", "Failed", "Suspended", "Stopped")
+# Job states for which the job output stream is worth fetching
+OUTPUT_STATUSES = ("Completed", "Failed")
+
+
+@dataclass
+class WatchedJob:
+    job_id: str
+    resource_group: str
+    automation_account_name: str
+    hook_function: Optional[Callable]
+    future: asyncio.Future
+    next_poll_at: float
+    poll_count: int = 0
+    last_status: Optional[str] = None
+
+
+class RunbookJobWatcher:
+    """
+    Watches runbook jobs on the event loop instead of sleeping in a thread.
+
+    All watched jobs are polled from a single background task. Jobs that are due
+    are polled together in batches, and each job backs off from a short interval
+    right after it starts to a longer one while it keeps running. Blocking SDK
+    calls are offloaded to worker threads so the event loop stays free to accept
+    webhooks.
+    """
+
+    def __init__(
+        self,
+        executor: BaseExecutionService,
+        initial_interval: float = cfg.job_watcher.initial_interval,
+        max_interval: float = cfg.job_watcher.max_interval,
+        backoff_factor: float = cfg.job_watcher.backoff_factor,
+        batch_size: int = cfg.job_watcher.batch_size,
+        max_concurrent_polls: int = cfg.job_watcher.max_concurrent_polls,
+    ):
+        """
+        Initialize the job watcher.
+
+        Args:
+            executor (BaseExecutionService): Executor used to query job status and output.
+            initial_interval (float): Seconds to wait before the first status poll of a job.
+            max_interval (float): Upper bound, in seconds, for the poll interval of a job.
+            backoff_factor (float): Multiplier applied to the interval after every poll.
+            batch_size (int): Maximum number of due jobs polled in one pass.
+            max_concurrent_polls (int): Maximum number of status requests in flight.
+        """
+        self.executor = executor
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.batch_size = batch_size
+        self.max_concurrent_polls = max_concurrent_polls
+        self._jobs: Dict[str, WatchedJob] = {}
+        self._completions: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def watch(
+        self,
+        resource_group: str,
+        automation_account_name: str,
+        job_id: str,
+        hook_function: Optional[Callable] = None,
+    ) -> asyncio.Future:
+        """
+        Start watching a job.
+
+        Args:
+            resource_group (str): Resource group of the automation account.
+            automation_account_name (str): Name of the automation account.
+            job_id (str): Name of the job to watch.
+            hook_function (Callable, optional): Called with (status, output) once the
+                job reaches a terminal state. May be a coroutine function.
+
+        Returns:
+            asyncio.Future: Resolves to a (status, output) tuple when the job finishes.
+        """
+        if job_id in self._jobs:
+            return self._jobs[job_id].future
+
+        loop = asyncio.get_running_loop()
+        job = WatchedJob(
+            job_id=job_id,
+            resource_group=resource_group,
+            automation_account_name=automation_account_name,
+            hook_function=hook_function,
+            future=loop.create_future(),
+            next_poll_at=loop.time() + self.initial_interval,
+        )
+        self._jobs[job_id] = job
+        self._ensure_running()
+        self._wakeup.set()
+        return job.future
+
+    async def wait_for_completion(
+        self,
+        resource_group: str,
+        automation_account_name: str,
+        job_id: str,
+        hook_function: Optional[Callable] = None,
+    ) -> Tuple[str, str]:
+        """
+        Watch a job and wait until it reaches a terminal state.
+
+        Returns:
+            Tuple[str, str]: The final job status and its output.
+        """
+        return await self.watch(
+            resource_group=resource_group,
+            automation_account_name=automation_account_name,
+            job_id=job_id,
+            hook_function=hook_function,
+        )
+
+    def watched_jobs(self) -> int:
+        """
+        Returns the number of jobs currently being watched.
+        """
+        return len(self._jobs)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_polls)
+            self._task = asyncio.create_task(self._run())
+
+    def _next_interval(self, job: WatchedJob) -> float:
+        return min(
+            self.max_interval,
+            self.initial_interval * (self.backoff_factor**job.poll_count),
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._jobs:
+            now = loop.time()
+            due = sorted(
+                (job for job in self._jobs.values() if job.next_poll_at <= now),
+                key=lambda job: job.next_poll_at,
+            )[: self.batch_size]
+            if due:
+                await asyncio.gather(*(self._poll(job) for job in due))
+                continue
+
+            # Sleep until the next job is due or a new job is registered
+            next_poll_at = min(job.next_poll_at for job in self._jobs.values())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=max(0.0, next_poll_at - now)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, job: WatchedJob):
+        loop = asyncio.get_running_loop()
+        status = None
+        async with self._semaphore:
+            try:
+                status = await asyncio.to_thread(
+                    self.executor.get_runbook_status,
+                    job.resource_group,
+                    job.automation_account_name,
+                    job.job_id,
+                )
+            except Exception as e:
+                logger.error(f"Error polling status of job {job.job_id}: {str(e)}")
+
+        job.poll_count += 1
+        if status not in TERMINAL_STATUSES:
+            if status != job.last_status:
+                logger.info(f"Job {job.job_id} status: {status}")
+            job.last_status = status
+            job.next_poll_at = loop.time() + self._next_interval(job)
+            return
+
+        logger.info(f"Job {job.job_id} finished with status: {status}")
+        del self._jobs[job.job_id]
+        # Hooks can be slow, run them outside of the polling pass
+        task = asyncio.create_task(self._complete(job, status))
+        self._completions.add(task)
+        task.add_done_callback(self._completions.discard)
+
+    async def _complete(self, job: WatchedJob, status: str):
+        output = ""
+        if status in OUTPUT_STATUSES:
+            try:
+                output = (
+                    await asyncio.to_thread(
+                        self.executor.get_job_output,
+                        job.resource_group,
+                        job.automation_account_name,
+                        job.job_id,
+                    )
+                    or ""
+                )
+            except Exception as e:
+                logger.error(f"Error fetching output of job {job.job_id}: {str(e)}")
+
+        if job.hook_function is not None:
+            try:
+                if inspect.iscoroutinefunction(job.hook_function):
+                    await job.hook_function(status, output)
+                else:
+                    await asyncio.to_thread(job.hook_function, status, output)
+            except Exception as e:
+                logger.error(f"Completion hook failed for job {job.job_id}: {str(e)}")
+
+        if not job.future.done():
+            job.future.set_result((status, output))
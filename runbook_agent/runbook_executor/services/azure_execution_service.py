@@ -1,6 +1,5 @@
 import time
-from azure.identity import ClientSecretCredential
-from azure.mgmt.automation import AutomationClient
+from runbook_agent.clients.azure_management import get_azure_management_client
 from azure.mgmt.automation.models import (
     JobCreateParameters,
     RunbookAssociationProperty,
@@ -16,19 +15,25 @@ class AzureRunbookExecutor:
         self.client_secret = client_secret
         self.subscription_id = subscription_id
 
-        # Authenticate using Client Secret Credentials
-        self.credentials = ClientSecretCredential(
+        # Shares the credential, token cache and connection pools of the other
+        # services using this service principal
+        self.azure = get_azure_management_client(
             tenant_id=self.tenant_id,
             client_id=self.client_id,
             client_secret=self.client_secret,
+            subscription_id=self.subscription_id,
         )
+        self.credentials = self.azure.credential
 
         # Create the Automation client to interact with Azure Automation
-        self.automation_client = AutomationClient(
-            self.credentials, self.subscription_id
-        )
+        self.automation_client = self.azure.automation_client
+        # Automation accounts found by (resource group, name), they don't move
+        self._automation_accounts = {}
 
     def get_automation_account(self, resource_group, automation_account_name):
+        key = (resource_group, automation_account_name)
+        if key in self._automation_accounts:
+            return self._automation_accounts[key]
         # List all automation accounts in the resource group
         automation_accounts = (
             self.automation_client.automation_account.list_by_resource_group(
@@ -37,6 +42,7 @@ class AzureRunbookExecutor:
         )
         for account in automation_accounts:
             if account.name == automation_account_name:
+                self._automation_accounts[key] = account
                 return account
         return None
 
@@ -175,9 +181,17 @@ class AzureRunbookExecutor:
 
         return job.status
 
+    def get_job_output(self, resource_group, automation_account_name, job_name):
+        return self.get_job_output_direct(
+            resource_group_name=resource_group,
+            automation_account_name=automation_account_name,
+            job_name=job_name,
+        )
+
     def wait_for_runbook_completion(
         self, resource_group, automation_account_name, job_id, hook_function
     ):
+        # Blocking variant, async callers should use RunbookJobWatcher instead
         # Keep checking the status of the job every 30 seconds
         while True:
             status = self.get_runbook_status(
@@ -203,28 +217,13 @@ class AzureRunbookExecutor:
         self, resource_group_name, automation_account_name, job_name
     ):
         try:
-            import requests
-
-            # Get access token
-            credential = self.credentials
-            token = credential.get_token("https://management.azure.com/.default").token
-
-            # Construct URL
-            url = (
-                f"https://management.azure.com/subscriptions/{self.subscription_id}"
-                f"/resourceGroups/{resource_group_name}"
-                f"/providers/Microsoft.Automation/automationAccounts/{automation_account_name}"
-                f"/jobs/{job_name}/streams?api-version=2023-11-01"
+            path = (
+                self.azure.automation_account_path(
+                    resource_group_name, automation_account_name
+                )
+                + f"/jobs/{job_name}/streams"
             )
-
-            # Make request
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            }
-
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+            response = self.azure.get(path, params={"api-version": "2023-11-01"})
 
             # Parse the response JSON
             response_data = response.json()
@@ -1,7 +1,13 @@
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
 import os
 from pydantic import BaseModel
-from runbook_agent.llms.open_ai import chat_completion_request_instructor
+from runbook_agent.llms.open_ai import (
+    chat_completion_request_instructor,
+    async_chat_completion_request_instructor,
+)
+from runbook_agent.llms.response_cache import get_response_cache
+import asyncio
+import hashlib
 import json
 
 
@@ -21,6 +27,14 @@ class ActionSequenceResponse(BaseModel):
     ambiguity: Optional[str]
 
 
+class EntityActionSequenceResponse(ActionSequenceResponse):
+    entity: str
+
+
+class BatchActionSequenceResponse(BaseModel):
+    actions: List[EntityActionSequenceResponse]
+
+
 class VMNamesResponse(BaseModel):
     vm_names: List[str]
 
@@ -298,14 +312,38 @@ def get_aws_region():
 
 
 def get_VM_names(description: str) -> VMNamesResponse:
-    response = chat_completion_request_instructor(
-        get_vm_names_from_description_prompt(description=description),
-        model="gpt-4o-mini",
-        temperature=0.2,
-        max_tokens=4000,
-        response_model=VMNamesResponse,
+    messages = get_vm_names_from_description_prompt(description=description)
+    return get_response_cache().cached_sync(
+        "vm_names",
+        messages,
+        "gpt-4o-mini",
+        VMNamesResponse,
+        lambda: chat_completion_request_instructor(
+            messages,
+            model="gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=4000,
+            response_model=VMNamesResponse,
+        ),
+    )
+
+
+async def async_get_VM_names(description: str) -> VMNamesResponse:
+    messages = get_vm_names_from_description_prompt(description=description)
+    # Exact hits only, similar descriptions usually name different VMs
+    return await get_response_cache().cached(
+        "vm_names",
+        messages,
+        "gpt-4o-mini",
+        VMNamesResponse,
+        lambda: async_chat_completion_request_instructor(
+            messages,
+            model="gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=4000,
+            response_model=VMNamesResponse,
+        ),
     )
-    return response
 
 
 function_map = {
@@ -347,6 +385,26 @@ def get_runbook_analysis_message(runbook: str, list_of_functions: List[str]) ->
     return messages
 
 
+def get_runbook_analysis_version(model: str) -> str:
+    """
+    Returns a fingerprint of everything besides the runbook content that shapes a
+    runbook analysis: the prompt, the functions offered, the response schema and
+    the model. A stored analysis with another version is redone.
+    """
+    content = json.dumps(
+        [
+            model,
+            get_runbook_analysis_message(
+                runbook="", list_of_functions=list_of_function
+            ),
+            RunbookAnalyserResponse.model_json_schema(),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
 def get_vm_names_from_description_prompt(description: str) -> str:
     messages = [
         {
@@ -381,33 +439,222 @@ def get_action_sequence_prompt(
     return messages
 
 
+batch_action_sequence_instructions = """
+
+### Multiple Entities:
+The incident concerns several entities, listed after the incident description.
+Plan the actions for each listed entity separately, as if the description only
+concerned that entity, and return one entry per entity with the entity name
+exactly as listed. Report ambiguity per entity, in the entry of that entity.
+"""
+
+
+def get_batch_action_sequence_prompt(
+    ticket_description: str,
+    selected_runbook_description: str,
+    entities: List[str],
+) -> str:
+    messages = [
+        {
+            "role": "system",
+            "content": action_sequence_prompt.replace(
+                "{description}", selected_runbook_description
+            )
+            + batch_action_sequence_instructions,
+        },
+        {
+            "role": "user",
+            "content": f"Incident description: {ticket_description}. "
+            f"Entities: {', '.join(entities)}",
+        },
+    ]
+    return messages
+
+
 def select_runbook_for_execution(
     description: str, runbooks: RunbookDetails
 ) -> RunbookSelectionResponse:
-    response = chat_completion_request_instructor(
-        runbook_selection(runbooks=runbooks, description=description),
-        model="gpt-4o-mini",
-        temperature=0.2,
-        max_tokens=4000,
-        response_model=RunbookSelectionResponse,
+    messages = runbook_selection(runbooks=runbooks, description=description)
+    return get_response_cache().cached_sync(
+        "runbook_selection",
+        messages,
+        "gpt-4o-mini",
+        RunbookSelectionResponse,
+        lambda: chat_completion_request_instructor(
+            messages,
+            model="gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=4000,
+            response_model=RunbookSelectionResponse,
+        ),
+        doc_ids=[runbook.doc_id for runbook in runbooks],
     )
-    return response
 
 
 def action_sequences(
     ticket_description: str,
     selected_runbook_description: str,
     user_entity_information: str,
+    doc_id: Optional[str] = None,
 ) -> RunbookSelectionResponse:
-    response = chat_completion_request_instructor(
-        get_action_sequence_prompt(
+    messages = get_action_sequence_prompt(
+        ticket_description=ticket_description,
+        selected_runbook_description=selected_runbook_description,
+        user_entity_information=user_entity_information,
+    )
+    return get_response_cache().cached_sync(
+        "action_sequence",
+        messages,
+        "gpt-4o-mini",
+        ActionSequenceResponse,
+        lambda: chat_completion_request_instructor(
+            messages,
+            model="gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=4000,
+            response_model=ActionSequenceResponse,
+        ),
+        doc_ids=[doc_id] if doc_id else None,
+    )
+
+
+async def async_select_runbook_for_execution(
+    description: str,
+    runbooks: RunbookDetails,
+    on_partial: Optional[Callable[[RunbookSelectionResponse], Any]] = None,
+) -> RunbookSelectionResponse:
+    """
+    Selects the runbook to execute for an incident. `on_partial` receives the
+    selection while it is streamed, it is not called on a cache hit.
+    """
+    messages = runbook_selection(runbooks=runbooks, description=description)
+    doc_ids = [runbook.doc_id for runbook in runbooks]
+    # Near-duplicate descriptions reuse a selection made from the same candidates
+    return await get_response_cache().cached(
+        "runbook_selection",
+        messages,
+        "gpt-4o-mini",
+        RunbookSelectionResponse,
+        lambda: async_chat_completion_request_instructor(
+            messages,
+            model="gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=4000,
+            response_model=RunbookSelectionResponse,
+            on_partial=on_partial,
+        ),
+        query_text=description,
+        context=doc_ids,
+        doc_ids=doc_ids,
+    )
+
+
+async def async_action_sequences(
+    ticket_description: str,
+    selected_runbook_description: str,
+    user_entity_information: str,
+    doc_id: Optional[str] = None,
+    on_partial: Optional[Callable[[ActionSequenceResponse], Any]] = None,
+) -> ActionSequenceResponse:
+    """
+    Plans the action to take for an incident with the selected runbook.
+    `on_partial` receives the plan while it is streamed, it is not called on a
+    cache hit.
+    """
+    messages = get_action_sequence_prompt(
+        ticket_description=ticket_description,
+        selected_runbook_description=selected_runbook_description,
+        user_entity_information=user_entity_information,
+    )
+    # Only exact repeats reuse a plan: its arguments (start time, interval, time
+    # zone...) are read from the ticket text, so a near-duplicate ticket asking
+    # for another time must get its own plan
+    return await get_response_cache().cached(
+        "action_sequence",
+        messages,
+        "gpt-4o-mini",
+        ActionSequenceResponse,
+        lambda: async_chat_completion_request_instructor(
+            messages,
+            model="gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=4000,
+            response_model=ActionSequenceResponse,
+            on_partial=on_partial,
+        ),
+        context=[selected_runbook_description, user_entity_information],
+        doc_ids=[doc_id] if doc_id else None,
+    )
+
+
+async def async_batch_action_sequences(
+    ticket_description: str,
+    selected_runbook_description: str,
+    entities: List[str],
+    doc_id: Optional[str] = None,
+    on_partial: Optional[Callable[[BatchActionSequenceResponse], Any]] = None,
+) -> Dict[str, Optional[ActionSequenceResponse]]:
+    """
+    Plans the actions for several entities of an incident with a single call.
+    Entities the plan misses or reports ambiguity for are planned again on
+    their own with `async_action_sequences`.
+
+    Args:
+        ticket_description (str): The incident description.
+        selected_runbook_description (str): Description of the selected runbook.
+        entities (List[str]): The entities to plan actions for.
+        doc_id (str, optional): The selected runbook.
+        on_partial (Callable, optional): Receives the batched plan while it is
+            streamed, it is not called on a cache hit.
+
+    Returns:
+        Dict[str, Optional[ActionSequenceResponse]]: The plan of each entity.
+    """
+    entities = list(dict.fromkeys(entities))
+    plans: Dict[str, Optional[ActionSequenceResponse]] = {}
+    if len(entities) > 1:
+        messages = get_batch_action_sequence_prompt(
             ticket_description=ticket_description,
             selected_runbook_description=selected_runbook_description,
-            user_entity_information=user_entity_information,
-        ),
-        model="gpt-4o-mini",
-        temperature=0.2,
-        max_tokens=4000,
-        response_model=ActionSequenceResponse,
+            entities=entities,
+        )
+        # Exact repeats only, like single plans the schedules come from the text
+        response = await get_response_cache().cached(
+            "batch_action_sequence",
+            messages,
+            "gpt-4o-mini",
+            BatchActionSequenceResponse,
+            lambda: async_chat_completion_request_instructor(
+                messages,
+                model="gpt-4o-mini",
+                temperature=0.2,
+                max_tokens=4000,
+                response_model=BatchActionSequenceResponse,
+                on_partial=on_partial,
+            ),
+            context=[selected_runbook_description, *sorted(entities)],
+            doc_ids=[doc_id] if doc_id else None,
+        )
+        for action in response.actions if response is not None else []:
+            if action.entity in entities and not (action.ambiguity or "").strip():
+                plans[action.entity] = ActionSequenceResponse(
+                    func_name=action.func_name,
+                    args=action.args,
+                    ambiguity=action.ambiguity,
+                )
+
+    # Entities the batched plan could not settle get a call of their own
+    remaining = [entity for entity in entities if entity not in plans]
+    fallbacks = await asyncio.gather(
+        *(
+            async_action_sequences(
+                ticket_description=ticket_description,
+                selected_runbook_description=selected_runbook_description,
+                user_entity_information=f"Focus only on actions to be taken for entity {entity}",
+                doc_id=doc_id,
+            )
+            for entity in remaining
+        )
     )
-    return response
+    plans.update(zip(remaining, fallbacks))
+    return plans
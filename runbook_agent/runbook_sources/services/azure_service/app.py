@@ -10,6 +10,7 @@ from runbook_agent.repository.automation_runbook_documents.models import (
     AutomationRunbookDocumentModel,
 )
 from runbook_agent.clients.prisma import get_prisma_client
+from runbook_agent.indexing_service.indexing_notifier import get_indexing_notifier
 
 # Create a router instance
 router = APIRouter()
@@ -71,8 +72,10 @@ async def handle_webhook(request: Request):
                     is_indexed=False,
                 ),
             )
+            # Index the new version now rather than on the next sweep
+            await get_indexing_notifier().publish([existing_runbook.id])
             return
-        await automation_runbook_repository.add_runbook(
+        created_runbook = await automation_runbook_repository.add_runbook(
             runbook_data=AutomationRunbookDocumentModel(
                 name=runbook_name,
                 source="azure",
@@ -84,6 +87,7 @@ async def handle_webhook(request: Request):
                 tags=[],
             )
         )
+        await get_indexing_notifier().publish([created_runbook.id])
 
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}")
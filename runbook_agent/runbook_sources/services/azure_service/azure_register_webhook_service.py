@@ -1,5 +1,4 @@
 import logging
-from azure.identity import ClientSecretCredential
 from azure.mgmt.monitor.v2017_04_01 import MonitorManagementClient
 from azure.mgmt.monitor.v2020_10_01.models import (
     AlertRuleAllOfCondition,
@@ -13,7 +12,7 @@ from azure.mgmt.monitor.v2023_01_01.models import (
     WebhookReceiver,
     ActionGroupResource,
 )
-from azure.mgmt.automation import AutomationClient
+from runbook_agent.clients.azure_management import get_azure_management_client
 from runbook_agent.runbook_sources.services.azure_service.azure_runbook_models import (
     WebhookConfig,
 )
@@ -24,8 +23,12 @@ from runbook_agent.repository.automation_runbook_documents.base_automation_runbo
     AbstractAutomationRunbookService,
 )
 from runbook_agent.repository.vector_store.base_repository import VectorBaseRepository
+from runbook_agent.repository.vector_store.schemas import QueryDocId
 from runbook_agent.indexing_service.indexing_engine import IndexingEngine
+from runbook_agent.indexing_service.indexing_notifier import get_indexing_notifier
+from runbook_agent.llms.response_cache import get_response_cache
 import asyncio
+import time
 
 
 class AzureRunbookSourceManager:
@@ -64,17 +67,17 @@ class AzureRunbookSourceManager:
 
     def _initialize_clients(self) -> None:
         try:
-            self.credentials = ClientSecretCredential(
+            azure = get_azure_management_client(
                 tenant_id=self.config.tenant_id,
                 client_id=self.config.client_id,
                 client_secret=self.config.client_secret,
+                subscription_id=self.config.subscription_id,
             )
+            self.credentials = azure.credential
             self.monitor_client = MonitorManagementClient(
                 self.credentials, self.config.subscription_id
             )
-            self.automation_client = AutomationClient(
-                self.credentials, self.config.subscription_id
-            )
+            self.automation_client = azure.automation_client
             self.logger.info("Azure clients initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize Azure clients: {str(e)}")
@@ -233,34 +236,72 @@ class AzureRunbookSourceManager:
 
     async def sync_existing_runbooks(self):
         """
-        Fetch the list of all runbooks in the specified Automation Account.
+        Reconcile the stored runbooks with the ones in the Automation Account.
 
-        :return: A list of dictionaries containing runbook details (name, type, state)
+        The account listing and the stored runbooks are each fetched once, then diffed
+        in memory. New runbooks are added, runbooks republished since they were
+        stored are marked for reindexing, and runbooks deleted in Azure are removed
+        from the repository and the vector store.
         """
-        runbooks = self.automation_client.runbook.list_by_automation_account(
-            self.config.resource_group, self.config.automation_account
+        started = time.monotonic()
+        # The SDK pages through the listing with blocking calls
+        runbooks = await asyncio.to_thread(
+            lambda: list(
+                self.automation_client.runbook.list_by_automation_account(
+                    self.config.resource_group, self.config.automation_account
+                )
+            )
         )
+        existing_runbooks = await self.repository.get_runbooks_by_source("azure")
 
-        for runbook in runbooks:
-            try:
-                existing_runbook = await self.repository.get_runbook_by_name_and_source(
-                    name=runbook.name, source="azure"
-                )
-                if existing_runbook is not None:
-                    continue
+        azure_by_name = {runbook.name: runbook for runbook in runbooks}
+        existing_by_name = {runbook.name: runbook for runbook in existing_runbooks}
 
-                await self.repository.add_runbook(
-                    runbook_data=AutomationRunbookDocumentModel(
-                        name=runbook.name,
-                        source="azure",
-                        published_time=runbook.last_modified_time,
-                        is_indexed=False,
-                        type=runbook.runbook_type,
-                        args=[],
-                        os_supported=[],
-                        tags=[],
-                    )
-                )
-            except Exception as e:
-                print(e)
-                continue
+        new_runbooks = [
+            AutomationRunbookDocumentModel(
+                name=runbook.name,
+                source="azure",
+                published_time=runbook.last_modified_time,
+                is_indexed=False,
+                type=runbook.runbook_type,
+                args=[],
+                os_supported=[],
+                tags=[],
+            )
+            for name, runbook in azure_by_name.items()
+            if name not in existing_by_name
+        ]
+        republished = [
+            (existing_by_name[name].id, runbook.last_modified_time)
+            for name, runbook in azure_by_name.items()
+            if name in existing_by_name
+            and runbook.last_modified_time is not None
+            and existing_by_name[name].published_time is not None
+            and runbook.last_modified_time > existing_by_name[name].published_time
+        ]
+        deleted = [
+            runbook
+            for name, runbook in existing_by_name.items()
+            if name not in azure_by_name
+        ]
+
+        await self.repository.sync_runbooks(new_runbooks, republished, deleted)
+        # create_many doesn't return ids, new runbooks are found by a scan
+        if new_runbooks:
+            await get_indexing_notifier().publish()
+        elif republished:
+            await get_indexing_notifier().publish([id for id, _ in republished])
+
+        if deleted:
+            deleted_ids = [runbook.id for runbook in deleted]
+            await asyncio.to_thread(
+                self.vector_store.delete_by_doc_ids,
+                [QueryDocId(doc_id=id) for id in deleted_ids],
+            )
+            get_response_cache().invalidate_doc_ids(deleted_ids)
+
+        self.logger.info(
+            f"Synced {len(runbooks)} Azure runbooks in "
+            f"{time.monotonic() - started:.1f}s: {len(new_runbooks)} new, "
+            f"{len(republished)} republished, {len(deleted)} deleted"
+        )
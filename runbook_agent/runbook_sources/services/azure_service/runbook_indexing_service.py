@@ -1,21 +1,74 @@
 import logging
-from azure.mgmt.automation import AutomationClient
+from runbook_agent.clients.azure_management import get_azure_management_client
 from runbook_agent.repository.automation_runbook_documents.models import (
     AutomationRunbookDocumentModel,
 )
 from runbook_agent.indexing_service.indexing_engine import IndexingEngine
+from runbook_agent.indexing_service.models import TextDocument
+from runbook_agent.indexing_service.indexing_notifier import get_indexing_notifier
 from runbook_agent.repository.automation_runbook_documents.base_automation_runbook_documents_service import (
     AbstractAutomationRunbookService,
 )
 import asyncio
-from runbook_agent.llms.open_ai import chat_completion_request_instructor
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from runbook_agent.llms.open_ai import async_chat_completion_request_instructor
+from runbook_agent.llms.response_cache import get_response_cache
+from runbook_agent.llms.gateway import LLMPriority, llm_priority
 from runbook_agent.runbook_sources.prompts import (
     get_runbook_analysis_message,
+    get_runbook_analysis_version,
     list_of_function,
     RunbookAnalyserResponse,
 )
-from runbook_agent.repository.vector_store.schemas import QueryDocId
 from runbook_agent.repository.vector_store.base_repository import VectorBaseRepository
+from runbook_agent.config import init_config
+
+cfg = init_config()
+
+RUNBOOK_ANALYSIS_MODEL = "gpt-4o-mini"
+
+
+@dataclass
+class AnalysedRunbook:
+    runbook: AutomationRunbookDocumentModel
+    analysis: RunbookAnalyserResponse
+    description: str
+    content_hash: Optional[str] = None
+
+
+@dataclass
+class StageMetrics:
+    """Throughput counters for a single stage of the indexing pipeline."""
+
+    name: str
+    items: int = 0
+    failures: int = 0
+    busy_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    def record(self, seconds: float, items: int = 1, failed: bool = False):
+        if failed:
+            self.failures += items
+        else:
+            self.items += items
+        self.busy_seconds += seconds
+        self.finished_at = time.monotonic()
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second of wall-clock time."""
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Stage '{self.name}': {self.items} ok, {self.failures} failed, "
+            f"{self.throughput:.2f} runbooks/s, {self.busy_seconds:.1f}s busy"
+        )
 
 
 class RunbookIndexer:
@@ -25,12 +78,24 @@ class RunbookIndexer:
         repository: AbstractAutomationRunbookService,
         vector_store: VectorBaseRepository,
         indexing_engine: IndexingEngine,
+        fetch_concurrency: int = cfg.indexing.fetch_concurrency,
+        analysis_concurrency: int = cfg.indexing.analysis_concurrency,
+        embed_batch_size: int = cfg.indexing.embed_batch_size,
+        embed_batch_timeout: float = cfg.indexing.embed_batch_timeout,
+        reconcile_interval: float = cfg.indexing_notifier.reconcile_interval,
     ):
         self.config = config
         self.logger = self._setup_logger()
         self.repository = repository
         self.indexing_engine = indexing_engine
         self.vector_store = vector_store
+        self.fetch_concurrency = fetch_concurrency
+        self.analysis_concurrency = analysis_concurrency
+        self.embed_batch_size = embed_batch_size
+        self.embed_batch_timeout = embed_batch_timeout
+        self.reconcile_interval = reconcile_interval
+        self.notifier = get_indexing_notifier()
+        self.analysis_version = get_runbook_analysis_version(RUNBOOK_ANALYSIS_MODEL)
         self.automation_client = None
         self._initialize_clients()
 
@@ -49,128 +114,310 @@ class RunbookIndexer:
     def _initialize_clients(self) -> None:
         """Initialize Azure clients for automation service."""
         try:
-            from azure.identity import ClientSecretCredential
-
-            self.credentials = ClientSecretCredential(
+            self.azure = get_azure_management_client(
                 tenant_id=self.config.tenant_id,
                 client_id=self.config.client_id,
                 client_secret=self.config.client_secret,
+                subscription_id=self.config.subscription_id,
             )
-            self.automation_client = AutomationClient(
-                self.credentials, self.config.subscription_id
-            )
+            self.credentials = self.azure.credential
+            self.automation_client = self.azure.automation_client
             self.logger.info("Automation client initialized successfully.")
         except Exception as e:
             self.logger.error(f"Failed to initialize Automation client: {str(e)}")
             raise
 
     async def get_runbook_content_direct(self, runbook_name):
-        import requests
-
-        # Get access token
-        credential = self.credentials
-        token = credential.get_token("https://management.azure.com/.default").token
-
-        # Construct URL
-        url = (
-            f"https://management.azure.com/subscriptions/{self.config.subscription_id}"
-            f"/resourceGroups/{self.config.resource_group}"
-            f"/providers/Microsoft.Automation/automationAccounts/{self.config.automation_account}"
-            f"/runbooks/{runbook_name}/content?api-version=2023-11-01"
+        path = (
+            self.azure.automation_account_path(
+                self.config.resource_group, self.config.automation_account
+            )
+            + f"/runbooks/{runbook_name}/content"
+        )
+        response = await self.azure.async_get(
+            path, params={"api-version": "2023-11-01"}
         )
-
-        # Make request
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
-
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
         return response.text
 
-    async def index_runbook(self, runbook):
-        """Index the runbook into the repository and vector store."""
-        try:
-            # Fetch the content of the runbook from Azure
-            runbook_content = await self.get_runbook_content_direct(runbook.name)
-            if not runbook_content:
-                self.logger.warning(
-                    f"Skipping indexing for runbook '{runbook.name}' due to missing content."
-                )
-                return
-
-            response = chat_completion_request_instructor(
+    async def analyse_runbook(
+        self, runbook: AutomationRunbookDocumentModel, runbook_content: str
+    ) -> Optional[AnalysedRunbook]:
+        """Run the LLM analysis of the runbook content."""
+        # Indexing yields to incident handling for the shared LLM rate limits
+        with llm_priority(LLMPriority.BACKGROUND):
+            response = await async_chat_completion_request_instructor(
                 get_runbook_analysis_message(
                     runbook=runbook_content, list_of_functions=list_of_function
                 ),
-                model="gpt-4o-mini",
+                model=RUNBOOK_ANALYSIS_MODEL,
                 temperature=0.2,
                 max_tokens=4000,
                 response_model=RunbookAnalyserResponse,
             )
+        if not isinstance(response, RunbookAnalyserResponse):
+            return None
 
-            responseModel = None
-            if isinstance(response, RunbookAnalyserResponse):
-                responseModel = response
-            else:
-                return
+        description = (
+            response.description
+            + "\n"
+            + "\n".join(response.issues_it_resolves)
+            + "\n"
+            + "\n".join(response.user_queries)
+        )
+        return AnalysedRunbook(
+            runbook=runbook,
+            analysis=response,
+            description=description,
+            content_hash=self.content_hash(runbook_content),
+        )
+
+    @staticmethod
+    def content_hash(runbook_content: str) -> str:
+        return hashlib.sha256(runbook_content.encode("utf-8")).hexdigest()
+
+    def is_unchanged(
+        self, runbook: AutomationRunbookDocumentModel, runbook_content: str
+    ) -> bool:
+        """
+        True if the stored analysis, and the vector built from it, were made from
+        this exact content with the current analysis prompt and model.
+        """
+        return (
+            bool(runbook.description)
+            and runbook.content_hash == self.content_hash(runbook_content)
+            and runbook.analysis_version == self.analysis_version
+        )
+
+    async def mark_unchanged_indexed(self, runbook: AutomationRunbookDocumentModel):
+        """Mark a republished runbook whose content did not change as indexed."""
+        await self.repository.update_runbook_by_name_and_source(
+            name=runbook.name,
+            source="azure",
+            runbook_data=AutomationRunbookDocumentModel(is_indexed=True),
+        )
+
+    async def upsert_analysed_runbooks(self, analysed_runbooks: List[AnalysedRunbook]):
+        """Embed and write a batch of analysed runbooks, then mark them as indexed."""
+        await asyncio.to_thread(
+            self.indexing_engine.insert_texts_to_vector_store,
+            [
+                TextDocument(
+                    doc_id=item.runbook.id,
+                    file_name=item.runbook.name,
+                    text=item.description,
+                    label="",
+                    source="azure",
+                    runbook_type=item.runbook.type,
+                    os_supported=item.analysis.array_of_os,
+                )
+                for item in analysed_runbooks
+            ],
+        )
 
+        await asyncio.gather(
+            *(
+                self.repository.update_runbook_by_name_and_source(
+                    name=item.runbook.name,
+                    source="azure",
+                    runbook_data=AutomationRunbookDocumentModel(
+                        is_indexed=True,
+                        description=item.description,
+                        os_supported=[os.lower() for os in item.analysis.array_of_os],
+                        args=[
+                            f"{argumentModel.name.lower()}:{argumentModel.function_to_extract.lower()}"
+                            for argumentModel in item.analysis.array_of_args
+                        ],
+                        content_hash=item.content_hash,
+                        analysis_version=self.analysis_version,
+                    ),
+                )
+                for item in analysed_runbooks
+            )
+        )
+        # Cached selections and plans were made from the previous descriptions
+        get_response_cache().invalidate_doc_ids(
+            [item.runbook.id for item in analysed_runbooks]
+        )
+
+    async def _fetch_worker(
+        self,
+        runbooks: asyncio.Queue,
+        analysis_queue: asyncio.Queue,
+        metrics: StageMetrics,
+    ):
+        while True:
+            try:
+                runbook = runbooks.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.monotonic()
             try:
-                self.vector_store.delete_by_doc_ids(
-                    query=[QueryDocId(doc_id=runbook.id)]
+                runbook_content = await self.get_runbook_content_direct(runbook.name)
+                metrics.record(time.monotonic() - started)
+                if not runbook_content:
+                    self.logger.warning(
+                        f"Skipping indexing for runbook '{runbook.name}' due to missing content."
+                    )
+                    continue
+                # A metadata-only republish keeps the stored analysis and vector
+                if self.is_unchanged(runbook, runbook_content):
+                    await self.mark_unchanged_indexed(runbook)
+                    self.logger.info(
+                        f"Runbook '{runbook.name}' content unchanged, skipped analysis."
+                    )
+                    continue
+                await analysis_queue.put((runbook, runbook_content))
+            except Exception as e:
+                metrics.record(time.monotonic() - started, failed=True)
+                self.logger.error(
+                    f"Error fetching content of runbook '{runbook.name}': {str(e)}"
                 )
+
+    async def _analysis_worker(
+        self,
+        analysis_queue: asyncio.Queue,
+        upsert_queue: asyncio.Queue,
+        metrics: StageMetrics,
+    ):
+        while True:
+            item = await analysis_queue.get()
+            if item is None:
+                return
+            runbook, runbook_content = item
+            started = time.monotonic()
+            try:
+                analysed_runbook = await self.analyse_runbook(runbook, runbook_content)
+                if analysed_runbook is None:
+                    metrics.record(time.monotonic() - started, failed=True)
+                    continue
+                metrics.record(time.monotonic() - started)
+                await upsert_queue.put(analysed_runbook)
             except Exception as e:
-                self.logger.error(f"Error deleting runbook '{runbook.id}': {str(e)}")
-
-            description = responseModel.description + '\n' + '\n'.join(responseModel.issues_it_resolves) + '\n' + '\n'.join(responseModel.user_queries)
-            self.indexing_engine.insert_text_to_vector_store(
-                doc_id=runbook.id,
-                file_name=runbook.name,
-                text=description,
-                label="",
-            )
-            runbook_document = AutomationRunbookDocumentModel(
-                is_indexed=True,
-                description=description,
-                os_supported=[os.lower() for os in responseModel.array_of_os],
-                args=[
-                    f"{argumentModel.name.lower()}:{argumentModel.function_to_extract.lower()}"
-                    for argumentModel in responseModel.array_of_args
-                ],
+                metrics.record(time.monotonic() - started, failed=True)
+                self.logger.error(f"Error analysing runbook '{runbook.name}': {str(e)}")
+
+    async def _upsert_worker(self, upsert_queue: asyncio.Queue, metrics: StageMetrics):
+        finished = False
+        while not finished:
+            item = await upsert_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Fill the batch until it is full, the stream ends or the batch timeout expires
+            deadline = time.monotonic() + self.embed_batch_timeout
+            while len(batch) < self.embed_batch_size:
+                try:
+                    item = await asyncio.wait_for(
+                        upsert_queue.get(),
+                        timeout=max(0.0, deadline - time.monotonic()),
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+
+            started = time.monotonic()
+            try:
+                await self.upsert_analysed_runbooks(batch)
+                metrics.record(time.monotonic() - started, items=len(batch))
+                for analysed_runbook in batch:
+                    self.logger.info(
+                        f"Runbook '{analysed_runbook.runbook.name}' indexed successfully."
+                    )
+            except Exception as e:
+                metrics.record(
+                    time.monotonic() - started, items=len(batch), failed=True
+                )
+                self.logger.error(
+                    f"Error writing batch of {len(batch)} runbooks: {str(e)}"
+                )
+
+    async def index_runbooks(
+        self, runbooks: List[AutomationRunbookDocumentModel]
+    ) -> Dict[str, StageMetrics]:
+        """
+        Index runbooks through a staged pipeline: fetch content, run the LLM analysis,
+        then embed and write in batches. Every stage has its own concurrency limit.
+
+        Returns:
+            Dict[str, StageMetrics]: Per-stage throughput metrics of this run.
+        """
+        metrics = {
+            stage: StageMetrics(stage) for stage in ("fetch", "analysis", "upsert")
+        }
+        runbook_queue = asyncio.Queue()
+        for runbook in runbooks:
+            runbook_queue.put_nowait(runbook)
+        # Bounded queues give back pressure to the faster upstream stages
+        analysis_queue = asyncio.Queue(maxsize=self.analysis_concurrency * 2)
+        upsert_queue = asyncio.Queue(maxsize=self.embed_batch_size * 2)
+
+        fetch_workers = [
+            asyncio.create_task(
+                self._fetch_worker(runbook_queue, analysis_queue, metrics["fetch"])
             )
-            # Add the runbook to the repository
-            await self.repository.update_runbook_by_name_and_source(
-                name=runbook.name,
-                source="azure",
-                runbook_data=runbook_document,
+            for _ in range(min(self.fetch_concurrency, len(runbooks)) or 1)
+        ]
+        analysis_workers = [
+            asyncio.create_task(
+                self._analysis_worker(analysis_queue, upsert_queue, metrics["analysis"])
             )
+            for _ in range(self.analysis_concurrency)
+        ]
+        upsert_worker = asyncio.create_task(
+            self._upsert_worker(upsert_queue, metrics["upsert"])
+        )
 
-            self.logger.info(f"Runbook '{runbook.name}' indexed successfully.")
+        await asyncio.gather(*fetch_workers)
+        for _ in analysis_workers:
+            await analysis_queue.put(None)
+        await asyncio.gather(*analysis_workers)
+        await upsert_queue.put(None)
+        await upsert_worker
 
-        except Exception as e:
-            self.logger.error(f"Error indexing runbook '{runbook.name}': {str(e)}")
+        for stage_metrics in metrics.values():
+            self.logger.info(stage_metrics.summary())
+        return metrics
 
-    async def index_unindexed_runbooks(self):
-        """Fetch all unindexed runbooks from the repository and index them."""
+    async def index_runbook(self, runbook):
+        """Index the runbook into the repository and vector store."""
+        await self.index_runbooks([runbook])
+
+    async def index_unindexed_runbooks(self, ids: Optional[List[str]] = None):
+        """
+        Fetch unindexed runbooks from the repository and index them.
+
+        Args:
+            ids (List[str], optional): Only index the runbooks with these ids.
+        """
         try:
             # Fetch runbooks from the repository where is_indexed is False
-            runbooks_to_index = await self.repository.get_unindexed_automation_runbook()
+            runbooks_to_index = await self.repository.get_unindexed_automation_runbook(
+                ids
+            )
 
             if not runbooks_to_index:
                 self.logger.info("No unindexed runbooks found.")
                 return
 
-            # Index each runbook
-            for runbook in runbooks_to_index:
-                await self.index_runbook(runbook)
+            self.logger.info(f"Indexing {len(runbooks_to_index)} runbooks.")
+            await self.index_runbooks(runbooks_to_index)
 
         except Exception as e:
             self.logger.error(f"Error indexing unindexed runbooks: {str(e)}")
 
     async def poll_for_unindexed_runbooks(self):
-        """Polls every 5 minutes to index unindexed runbooks."""
+        """
+        Index runbooks as soon as they are announced through the indexing notifier.
+        A full scan for unindexed runbooks runs on startup, when a scan is requested
+        and every `reconcile_interval` seconds as a safety net.
+        """
+        await self.index_unindexed_runbooks()
         while True:
-            await self.index_unindexed_runbooks()
-            await asyncio.sleep(300)  # Sleep for 5 minutes (300 seconds)
+            runbook_ids = await self.notifier.wait(self.reconcile_interval)
+            if runbook_ids is None:
+                await self.index_unindexed_runbooks()
+            elif runbook_ids:
+                await self.index_unindexed_runbooks(sorted(runbook_ids))
@@ -11,6 +11,10 @@ from runbook_agent.runbook_sources.services.azure_service.runbook_indexing_servi
 from runbook_agent.runbook_sources.services.azure_service.azure_register_webhook_service import (
     AzureRunbookSourceManager,
 )
+from runbook_agent.indexing_service.indexing_notifier import get_indexing_notifier
+from runbook_agent.config import init_config
+
+cfg = init_config()
 
 
 class RunbookManager:
@@ -60,8 +64,20 @@ class RunbookManager:
         # Create the Activity Log alert
         self.azure_runbook_source_manager.create_activity_log_alert()
 
-        # Start polling for unindexed runbooks in the background
-        self.logger.info(
-            "Starting background polling for unindexed runbooks every 5 minutes."
-        )
+        # Start indexing runbooks as they are published, in the background
+        self.logger.info("Starting background indexing of published runbooks.")
         asyncio.create_task(self.runbook_indexer.poll_for_unindexed_runbooks())
+        # Relay the publish notifications of other replicas to this indexer
+        asyncio.create_task(get_indexing_notifier().listen())
+
+        # Keep the vector table compacted and its indexes current as runbooks churn
+        asyncio.create_task(self.poll_for_index_maintenance())
+
+    async def poll_for_index_maintenance(self):
+        """Periodically compacts the vector table and updates its indexes when they drifted."""
+        while True:
+            await asyncio.sleep(cfg.vector_index.maintenance_interval)
+            try:
+                await asyncio.to_thread(self.vector_store.maintain_index)
+            except Exception as e:
+                self.logger.error(f"Error maintaining vector index: {str(e)}")